@@ -0,0 +1,62 @@
+"""Closure composed SquadBehaviour trees vs the compiled state machine.
+
+The leaves do nothing but return not met, so the numbers are the cost of the combinators
+alone (per tick of one squad).
+
+Run from the repository root:  PYTHONPATH=src python benchmark/bench_behaviour_compiler.py
+"""
+import timeit
+
+from steer.behaviour_compiler import compile_behaviour
+from steer.squad_behaviour import loop_ex
+from steer.squad_behaviour import repeat_ex
+from steer.squad_behaviour import SquadBehaviour
+from steer.squad_behaviour import zero_behaviour
+from steer.squad_behaviour_condition import CondRes
+from steer.squad_behaviour_condition import infinite_behaviour_condition
+from steer.squad_behaviour_condition import time_elapsed
+
+CALLS = 20_000
+
+
+def leaf() -> SquadBehaviour:
+    return SquadBehaviour(lambda restart, dt: CondRes(CondRes.not_met))
+
+
+def sequence(n: int) -> SquadBehaviour:
+    b = leaf()
+    for _ in range(n - 1):
+        b = b >> leaf()
+    return b
+
+
+def main():
+    cases = [
+        ('a | b', lambda: leaf() | leaf()),
+        ('(a & b) | (c & d)', lambda: (leaf() & leaf()) | (leaf() & leaf())),
+        ('loop_ex(a >> b >> c)', lambda: loop_ex(time_elapsed(1e9), sequence(3))),
+        (
+            'repeat_ex((a | wait) & b)',
+            lambda: repeat_ex(
+                infinite_behaviour_condition(),
+                (leaf() | zero_behaviour(time_elapsed(1e9))) & leaf(),
+                3,
+            ),
+        ),
+    ]
+    print(f'{"behaviour":<28} {"closure us":>11} {"compiled us":>12} {"speedup":>8}')
+    for name, make in cases:
+        tree = make()
+        compiled = compile_behaviour(make())
+        closure = min(timeit.repeat(lambda: tree(False, 0.016), number=CALLS, repeat=5))
+        flat = min(
+            timeit.repeat(lambda: compiled(False, 0.016), number=CALLS, repeat=5)
+        )
+        print(
+            f'{name:<28} {closure / CALLS * 1e6:11.2f} {flat / CALLS * 1e6:12.2f} '
+            f'{closure / flat:7.2f}x'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Integration throughput of EntityWorld vs per entity update_steer_behaviour.
+
+Run from the repository root:  PYTHONPATH=src python benchmark/bench_entity_world.py
+"""
+import time
+
+import numpy as np
+
+from infra.vmath import Vector
+from steer.entity_world import EntityWorld
+from steer.movable_entity import MovableEntity
+from steer.movable_entity import Waypoint
+from steer.steer_behaviour import seek
+
+TICK = 1 / 60
+
+
+def make_world(count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    world = EntityWorld(capacity=count)
+    entities = [MovableEntity(world=world) for _ in range(count)]
+    rows = world.active_rows()
+    world.pos[rows] = rng.uniform(0, 1000, (count, 2))
+    world.velocity[rows] = rng.uniform(-50, 50, (count, 2))
+    return world, entities, rows, rng
+
+
+def bench_integrate(count: int, ticks: int = 120) -> float:
+    """Vectorized integration only - forces come from a batch source (here random)"""
+    world, entities, rows, rng = make_world(count)
+    forces = rng.uniform(-40, 40, (ticks, count, 2))
+    start = time.perf_counter()
+    for t in range(ticks):
+        world.begin_step(rows)
+        world.force[rows] = forces[t]
+        world.integrate(TICK, rows)
+    return (time.perf_counter() - start) / ticks
+
+
+def bench_per_entity(count: int, ticks: int = 20) -> float:
+    world, entities, rows, rng = make_world(count)
+    target = Waypoint(Vector(500, 500))
+    for e in entities:
+        e.steer_force = seek(30)
+        e.target = target
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for e in entities:
+            e.update_steer_behaviour(TICK)
+    return (time.perf_counter() - start) / ticks
+
+
+def bench_world_update(count: int, ticks: int = 20) -> float:
+    world, entities, rows, rng = make_world(count)
+    target = Waypoint(Vector(500, 500))
+    for e in entities:
+        e.steer_force = seek(30)
+        e.target = target
+    start = time.perf_counter()
+    for _ in range(ticks):
+        world.update(TICK)
+    return (time.perf_counter() - start) / ticks
+
+
+def main():
+    print(
+        f'{"entities":>9} {"integrate ms":>13} {"world.update ms":>16} {"per entity ms":>14}'
+    )
+    for count in (1_000, 10_000, 50_000):
+        integrate = bench_integrate(count) * 1000
+        if count <= 10_000:
+            update = f'{bench_world_update(count) * 1000:16.2f}'
+            per_entity = f'{bench_per_entity(count) * 1000:14.2f}'
+        else:
+            update = per_entity = f'{"-":>14}'
+        print(f'{count:9d} {integrate:13.2f} {update:>16} {per_entity:>14}')
+    print(f'60 Hz budget: {TICK * 1000:.2f} ms per tick')
+
+
+if __name__ == '__main__':
+    main()
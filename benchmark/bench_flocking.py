@@ -0,0 +1,59 @@
+"""flocking() per entity vs flocking_batch for a whole squad, one tick.
+
+Run from the repository root:  PYTHONPATH=src python benchmark/bench_flocking.py
+"""
+import math
+import time
+
+import numpy as np
+
+from infra.vmath import Vector
+from steer.entity_world import EntityWorld
+from steer.movable_entity import MovableEntity
+from steer.squad import Squad
+from steer.steer_batch import flocking_batch
+from steer.steer_batch import world_state
+from steer.steer_behaviour import flocking
+
+SPACING = 12.0
+
+
+def make_squad(count: int):
+    rng = np.random.default_rng(0)
+    side = math.ceil(math.sqrt(count))
+    world = EntityWorld(capacity=count)
+    squad = Squad()
+    squad.entities = [
+        MovableEntity(Vector((i % side) * SPACING, (i // side) * SPACING), world=world)
+        for i in range(count)
+    ]
+    rows = world.active_rows()
+    world.pos[rows] += rng.uniform(-4, 4, (count, 2))
+    world.velocity[rows] = rng.uniform(-20, 20, (count, 2))
+    return world, squad, rows
+
+
+def main():
+    print(f'{"members":>8} {"per entity ms":>14} {"batch ms":>9}')
+    for count in (100, 1_000, 5_000, 20_000):
+        world, squad, rows = make_squad(count)
+        if count <= 5_000:
+            force = flocking(squad)
+            squad.spatial_hash.sync(squad.entities)
+            squad._updating = True  # as inside update_squad_behaviour
+            start = time.perf_counter()
+            for e in squad.entities:
+                force(e, None)
+            per_entity = f'{(time.perf_counter() - start) * 1e3:14.2f}'
+            squad._updating = False
+        else:
+            per_entity = f'{"-":>14}'
+        pos, velocity, max_force, force_mul = world_state(world, rows)
+        start = time.perf_counter()
+        flocking_batch(pos, velocity, max_force, force_mul)
+        batch = (time.perf_counter() - start) * 1e3
+        print(f'{count:8d} {per_entity} {batch:9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""A 50 squad scene, every squad fully simulated vs far squads as impostors.
+
+The camera (focus) is at one corner of the scene, squads beyond 1000 units of it only
+simulate their leader and carry the other members along at their formation slots.
+
+Run from the repository root:  PYTHONPATH=src python benchmark/bench_impostor.py
+"""
+import random
+import time
+
+from infra.vmath import Rect
+from infra.vmath import Vector
+from steer.entity_world import EntityWorld
+from steer.formation import FormationGrid
+from steer.lod import ImpostorPolicy
+from steer.movable_entity import MovableEntity
+from steer.squad import Squad
+from steer.squad_behaviour import patrol_ext
+from steer.squad_behaviour_condition import infinite_behaviour_condition
+from steer.world import World
+
+SQUADS = 50
+MEMBERS = 20
+TICKS = 120
+COLUMNS = 10
+SPACING = 500
+
+
+def make_world(impostors: bool) -> World:
+    random.seed(0)
+    entities = EntityWorld(capacity=SQUADS * MEMBERS)
+    world = World()
+    for i in range(SQUADS):
+        s = Squad()
+        x = 100 + (i % COLUMNS) * SPACING
+        y = 100 + (i // COLUMNS) * SPACING
+        s.entities = [
+            MovableEntity(Vector(x + j, y), world=entities) for j in range(MEMBERS)
+        ]
+        s.formation = FormationGrid(columns=5, spacing=20)
+        s.squad_behaviour = patrol_ext(
+            infinite_behaviour_condition(), s, 4, i % 2 == 0, Rect(x, y, 300, 300)
+        )
+        if impostors:
+            s.impostor = ImpostorPolicy(Vector(0, 0), near=800, far=1000)
+        world.add(s)
+    return world
+
+
+def main():
+    print(f'{SQUADS} squads x {MEMBERS} members, {TICKS} ticks')
+    print(f'{"mode":>10} {"ms/tick":>8} {"aggregate":>10} {"steered/tick":>13}')
+    results = {}
+    for impostors in (False, True):
+        world = make_world(impostors)
+        world.step(1 / 60)
+        start = time.perf_counter()
+        for _ in range(TICKS):
+            world.step(1 / 60)
+        elapsed = (time.perf_counter() - start) / TICKS
+        aggregate = sum(s.aggregate for s in world.squads)
+        placed = sum(s.impostor_stats.placed for s in world.squads)
+        steered = SQUADS * MEMBERS - placed
+        mode = 'impostors' if impostors else 'full'
+        results[mode] = elapsed
+        print(f'{mode:>10} {elapsed * 1e3:8.2f} {aggregate:10d} {steered:13d}')
+    saved = 1 - results['impostors'] / results['full']
+    print(f'per tick savings: {saved:.0%}')
+
+
+if __name__ == '__main__':
+    main()
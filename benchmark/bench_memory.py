@@ -0,0 +1,42 @@
+"""Per object memory footprint of MovableEntity and Waypoint.
+
+Run from the repository root:  PYTHONPATH=src python benchmark/bench_memory.py
+"""
+import gc
+import tracemalloc
+
+from infra.vmath import Vector
+from steer.entity_world import EntityWorld
+from steer.movable_entity import MovableEntity
+from steer.movable_entity import Waypoint
+
+COUNT = 20_000
+
+
+def footprint(factory) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = [factory(i) for i in range(COUNT)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    # the list holding the objects is not part of the footprint
+    size -= objects.__sizeof__()
+    del objects
+    return size / COUNT
+
+
+def main():
+    # preallocated so the row storage growth isn't counted
+    world = EntityWorld(capacity=COUNT)
+    entity = footprint(lambda i: MovableEntity(Vector(i, i), world=world))
+    row = sum(getattr(world, name)[0].nbytes for name in EntityWorld._fields)
+    print(
+        f'MovableEntity: {entity:8.1f} bytes + {row} bytes of EntityWorld row storage'
+    )
+    print(f'Waypoint:      {footprint(lambda i: Waypoint(Vector(i, i))):8.1f} bytes')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Obstacle feeler queries: brute force scan vs ObstacleBVH, scalar and batch.
+
+Run from the repository root:  PYTHONPATH=src python benchmark/bench_obstacles.py
+"""
+import random
+import time
+
+import numpy as np
+
+from infra.vmath import Rect
+from infra.vmath import Vector
+from steer.obstacles import CircleObstacle
+from steer.obstacles import ObstacleBVH
+from steer.obstacles import RectObstacle
+
+SCENE = 5_000.0
+FEELERS = 1_000
+MARGIN = 10.0
+
+
+def make_obstacles(count: int):
+    rng = random.Random(0)
+    obstacles = []
+    for _ in range(count):
+        x = rng.uniform(0, SCENE)
+        y = rng.uniform(0, SCENE)
+        if rng.random() < 0.5:
+            obstacles.append(CircleObstacle(Vector(x, y), rng.uniform(5, 20)))
+        else:
+            obstacles.append(
+                RectObstacle(Rect(x, y, rng.uniform(5, 40), rng.uniform(5, 40)))
+            )
+    return obstacles
+
+
+def brute_force(obstacles, p1, p2):
+    best = None
+    dx = p2.x - p1.x
+    dy = p2.y - p1.y
+    for o in obstacles:
+        t = o.intersect_segment(p1.x, p1.y, dx, dy, MARGIN)
+        if t is not None and (best is None or t < best[0]):
+            best = (t, o)
+    return best
+
+
+def main():
+    rng = np.random.default_rng(1)
+    start = rng.uniform(0, SCENE, (FEELERS, 2))
+    end = start + rng.uniform(-50, 50, (FEELERS, 2))
+    starts = [Vector(x, y) for x, y in start.tolist()]
+    ends = [Vector(x, y) for x, y in end.tolist()]
+    print(f'{FEELERS} feelers per tick')
+    print(
+        f'{"obstacles":>10} {"depth":>6} {"build ms":>9} {"brute ms":>9} '
+        f'{"bvh ms":>7} {"batch ms":>9}'
+    )
+    for count in (100, 1_000, 10_000):
+        obstacles = make_obstacles(count)
+        t0 = time.perf_counter()
+        bvh = ObstacleBVH(obstacles)
+        build = time.perf_counter() - t0
+        if count <= 1_000:
+            t0 = time.perf_counter()
+            for p1, p2 in zip(starts, ends):
+                brute_force(obstacles, p1, p2)
+            brute = f'{(time.perf_counter() - t0) * 1e3:9.2f}'
+        else:
+            brute = f'{"-":>9}'
+        t0 = time.perf_counter()
+        for p1, p2 in zip(starts, ends):
+            bvh.segment_query(p1, p2, MARGIN)
+        scalar = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        bvh.segment_query_batch(start, end, MARGIN)
+        batch = time.perf_counter() - t0
+        print(
+            f'{count:10d} {bvh.depth:6d} {build * 1e3:9.2f} {brute} '
+            f'{scalar * 1e3:7.2f} {batch * 1e3:9.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Squad member lookups per tick: scanning the members vs the indexed active roster.
+
+Every member looks up its index, the member in front of it and the member count,
+once per tick, as the follow behaviours do. A member is deactivated and another one reactivated
+every tick.
+
+Run from the repository root:  PYTHONPATH=src python benchmark/bench_roster.py
+"""
+import time
+
+from infra.vmath import Vector
+from steer.movable_entity import MovableEntity
+from steer.squad import Squad
+
+TICKS = 5
+
+
+def scan_index_of(squad: Squad, entity: MovableEntity):
+    # the lookups before the roster, a scan of the active members per call
+    active = (e for e in squad.entities if e.is_active is True)
+    return next((i for i, e1 in enumerate(active) if e1 == entity), None)
+
+
+def scan_by_index(squad: Squad, index: int):
+    if index < 0:
+        return None
+    active = (e for e in squad.entities if e.is_active is True)
+    return next((e1 for i, e1 in enumerate(active) if i == index), None)
+
+
+def tick_scan(squad: Squad):
+    for e in [e for e in squad.entities if e.is_active is True]:
+        index = scan_index_of(squad, e)
+        scan_by_index(squad, index - 1)
+        len([e for e in squad.entities if e.is_active is True])
+
+
+def tick_roster(squad: Squad):
+    for e in squad.active_iter():
+        squad.get_index_of_entity(e)
+        squad.get_member_in_front_of(e)
+        squad.count()
+
+
+def run(count: int, tick) -> float:
+    squad = Squad()
+    squad.entities = [MovableEntity(Vector(i, 0)) for i in range(count)]
+    start = time.perf_counter()
+    for t in range(TICKS):
+        squad.entities[(t * 7) % count].is_active = False
+        squad.entities[(t * 13) % count].is_active = True
+        tick(squad)
+    return (time.perf_counter() - start) / TICKS
+
+
+def main():
+    print(f'{"members":>8} {"scan ms/tick":>13} {"roster ms/tick":>15}')
+    for count in (10, 100, 1_000):
+        scan = run(count, tick_scan)
+        roster = run(count, tick_roster)
+        print(f'{count:8d} {scan * 1e3:13.2f} {roster * 1e3:15.3f}')
+
+
+if __name__ == '__main__':
+    main()
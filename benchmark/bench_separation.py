@@ -0,0 +1,78 @@
+"""separation() cost per tick with the squad spatial hash vs the brute force scan.
+
+Members are spread at a constant density, so every member has about the same number of
+neighbours whatever the squad size - the spatial hash cost should grow linearly.
+
+Run from the repository root:  PYTHONPATH=src python benchmark/bench_separation.py
+"""
+import math
+import random
+import time
+
+from infra.vmath import distance
+from infra.vmath import Vector
+from steer.globals import separation_radius
+from steer.movable_entity import MovableEntity
+from steer.squad import Squad
+from steer.steer_behaviour import separation
+
+SPACING = 10.0
+
+
+def make_squad(count: int) -> Squad:
+    random.seed(0)
+    side = math.ceil(math.sqrt(count))
+    squad = Squad()
+    squad.entities = [
+        MovableEntity(
+            Vector(
+                (i % side) * SPACING + random.uniform(-3, 3),
+                (i // side) * SPACING + random.uniform(-3, 3),
+            )
+        )
+        for i in range(count)
+    ]
+    return squad
+
+
+def brute_force(squad: Squad):
+    # the scan separation used before the spatial hash
+    def steering_force(entity, leader):
+        added_forces = Vector.zero()
+        count_neighbors = 0
+        for e1 in (e1 for e1 in squad.active_iter() if e1 != entity):
+            delta = distance(e1.pos, entity.pos)
+            if delta < separation_radius and delta > 0.01:
+                added_forces += e1.pos - entity.pos
+                count_neighbors += 1
+        return added_forces
+
+    return steering_force
+
+
+def tick(squad: Squad, force) -> float:
+    start = time.perf_counter()
+    squad.spatial_hash.sync(squad.entities)
+    squad._updating = True  # as inside update_squad_behaviour
+    for e in squad.entities:
+        force(e, None)
+    squad._updating = False
+    return time.perf_counter() - start
+
+
+def main():
+    print(
+        f'{"members":>8} {"hash ms":>9} {"us/member":>10} {"brute ms":>10} {"us/member":>10}'
+    )
+    for count in (10, 100, 500, 1_000, 2_000, 5_000):
+        squad = make_squad(count)
+        hashed = min(tick(squad, separation(squad)) for _ in range(3))
+        line = f'{count:8d} {hashed * 1e3:9.2f} {hashed / count * 1e6:10.2f}'
+        if count <= 2_000:
+            brute = tick(squad, brute_force(squad))
+            line += f' {brute * 1e3:10.2f} {brute / count * 1e6:10.2f}'
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""ShardedRunner throughput with 1, 2, 4 and 8 worker processes.
+
+The workers only scale up to the number of cores, beyond that they take turns and the
+barrier at the end of every tick costs a round of context switches.
+
+Run from the repository root:  PYTHONPATH=src python benchmark/bench_sharded.py
+"""
+import os
+import random
+import time
+
+from infra.vmath import Rect
+from infra.vmath import Vector
+from steer.formation import FormationGrid
+from steer.movable_entity import MovableEntity
+from steer.sharded import ShardedRunner
+from steer.squad import Squad
+from steer.squad_behaviour import patrol_ext
+from steer.squad_behaviour_condition import infinite_behaviour_condition
+
+SQUADS = 64
+MEMBERS = 20
+TICKS = 120
+
+
+def make_squad(number, world):
+    random.seed(number)
+    s = Squad()
+    x = 100 + (number % 8) * 120
+    y = 100 + (number // 8) * 120
+    s.entities = [MovableEntity(Vector(x + j, y), world=world) for j in range(MEMBERS)]
+    s.formation = FormationGrid(columns=5, spacing=20)
+    s.squad_behaviour = patrol_ext(
+        infinite_behaviour_condition(), s, 4, number % 2 == 0, Rect(50, 50, 900, 500)
+    )
+    return s
+
+
+def main():
+    print(
+        f'{SQUADS} squads x {MEMBERS} members, {TICKS} ticks, '
+        f'{os.cpu_count()} cores'
+    )
+    print(f'{"workers":>8} {"ms/tick":>8} {"entity ticks/s":>15}')
+    for workers in (1, 2, 4, 8):
+        with ShardedRunner(make_squad, SQUADS, workers, MEMBERS) as runner:
+            runner.run(1, 1 / 60)  # warm up
+            start = time.perf_counter()
+            runner.run(TICKS, 1 / 60)
+            elapsed = time.perf_counter() - start
+        print(
+            f'{workers:8d} {elapsed / TICKS * 1e3:8.2f} '
+            f'{SQUADS * MEMBERS * TICKS / elapsed:15,.0f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
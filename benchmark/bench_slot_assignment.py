@@ -0,0 +1,97 @@
+"""Slot assignment per call cost, and the travel it saves when members are lost.
+
+A squad in a grid formation loses a few random members. Slot = roster index moves
+everybody behind a lost member up a slot, SlotAssignment moves as few as it can.
+
+Run from the repository root:  PYTHONPATH=src python benchmark/bench_slot_assignment.py
+"""
+import math
+import time
+
+import numpy as np
+
+from infra.vmath import Vector
+from steer.formation import FormationGrid
+from steer.movable_entity import MovableEntity
+from steer.slot_assignment import greedy_assignment
+from steer.slot_assignment import hungarian
+from steer.slot_assignment import SlotAssignment
+from steer.squad import Squad
+
+LOST = 5
+
+
+def travel(squad: Squad) -> float:
+    """Total distance from the members to their slots"""
+    leader = squad.get_leader()
+    total = 0.0
+    for e in squad.roster.active[1:]:
+        delta = squad.get_position_delta(e, leader)
+        total += (e.pos - (leader.pos + delta)).length()
+    return total
+
+
+def make_squad(count: int) -> Squad:
+    squad = Squad()
+    squad.formation = FormationGrid(columns=math.ceil(math.sqrt(count)))
+    squad.formation.fit(count)
+    squad.entities = [
+        MovableEntity(Vector(*p)) for p in squad.formation.slots().tolist()
+    ]
+    for e in squad.entities:
+        e.rotation = math.pi  # heading down, formation space is world space
+    return squad
+
+
+def run(count: int) -> tuple[float, float, float, str]:
+    rng = np.random.default_rng(count)
+    lost = rng.choice(np.arange(1, count), LOST, replace=False)
+    squad = make_squad(count)
+    assigned = make_squad(count)
+    assigned.slot_assignment = SlotAssignment()
+    assigned.slot_index(assigned.get_leader())
+    for i in lost.tolist():
+        squad.entities[i].is_active = False
+        assigned.entities[i].is_active = False
+    start = time.perf_counter()
+    assigned.slot_index(assigned.get_leader())
+    elapsed = time.perf_counter() - start
+    method = 'hungarian' if count - LOST - 1 <= 64 else 'greedy'
+    return travel(squad), travel(assigned), elapsed, method
+
+
+def main():
+    print(f'{"size":>6} {"hungarian ms":>13} {"greedy ms":>10} {"greedy/optimal":>15}')
+    rng = np.random.default_rng(0)
+    for n in (10, 32, 64, 128, 256):
+        points = rng.uniform(0, 100, (n, 2))
+        slots = rng.uniform(0, 100, (n, 2))
+        cost = np.hypot(*(points[:, None] - slots[None]).transpose(2, 0, 1))
+        start = time.perf_counter()
+        exact = hungarian(cost)
+        exact_time = time.perf_counter() - start
+        start = time.perf_counter()
+        approx = greedy_assignment(cost)
+        greedy_time = time.perf_counter() - start
+        rows = np.arange(n)
+        ratio = cost[rows, approx].sum() / cost[rows, exact].sum()
+        print(
+            f'{n:6d} {exact_time * 1e3:13.2f} {greedy_time * 1e3:10.2f} {ratio:15.3f}'
+        )
+
+    print()
+    print(f'{LOST} members lost')
+    print(
+        f'{"members":>8} {"slot=index travel":>18} {"assigned travel":>16} '
+        f'{"assign ms":>10} {"method":>10}'
+    )
+    for count in (10, 50, 200, 1_000):
+        shifted, assigned, elapsed, method = run(count)
+        print(
+            f'{count:8d} {shifted:18.0f} {assigned:16.0f} {elapsed * 1e3:10.2f} '
+            f'{method:>10}'
+        )
+
+
+if __name__ == '__main__':
+    main()
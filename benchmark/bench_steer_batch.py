@@ -0,0 +1,85 @@
+"""Steering a swarm with the batch kernels vs the per entity seek force.
+
+Run from the repository root:  PYTHONPATH=src python benchmark/bench_steer_batch.py
+"""
+import time
+
+import numpy as np
+
+from infra.vmath import Vector
+from steer.entity_world import EntityWorld
+from steer.movable_entity import MovableEntity
+from steer.movable_entity import Waypoint
+from steer.steer_batch import apply_steering
+from steer.steer_batch import pursuit_batch
+from steer.steer_batch import seek_batch
+from steer.steer_batch import world_state
+from steer.steer_behaviour import seek
+
+TICK = 1 / 60
+
+
+def make_world(count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    world = EntityWorld(capacity=count)
+    entities = [MovableEntity(world=world) for _ in range(count)]
+    rows = world.active_rows()
+    world.pos[rows] = rng.uniform(0, 1000, (count, 2))
+    world.velocity[rows] = rng.uniform(-50, 50, (count, 2))
+    return world, entities, rows, rng
+
+
+def bench_batch(count: int, per_entity_targets: bool, ticks: int = 60) -> float:
+    world, entities, rows, rng = make_world(count)
+    if per_entity_targets:
+        targets = rng.uniform(0, 1000, (count, 2))
+        target_velocity = rng.uniform(-20, 20, (count, 2))
+    start = time.perf_counter()
+    for _ in range(ticks):
+        world.begin_step(rows)
+        pos, velocity, max_force, force_mul = world_state(world, rows)
+        if per_entity_targets:
+            batch = pursuit_batch(
+                pos, velocity, targets, target_velocity, max_force, force_mul
+            )
+        else:
+            batch = seek_batch(
+                pos, velocity, Vector(500, 500), max_force, force_mul, 30
+            )
+        apply_steering(world, rows, batch)
+        world.integrate(TICK, rows)
+    return (time.perf_counter() - start) / ticks
+
+
+def bench_per_entity(count: int, ticks: int = 5) -> float:
+    world, entities, rows, rng = make_world(count)
+    target = Waypoint(Vector(500, 500))
+    for e in entities:
+        e.steer_force = seek(30)
+        e.target = target
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for e in entities:
+            e.update_steer_behaviour(TICK)
+    return (time.perf_counter() - start) / ticks
+
+
+def main():
+    print(
+        f'{"entities":>9} {"seek batch ms":>14} {"pursuit batch ms":>17} '
+        f'{"per entity seek ms":>19}'
+    )
+    for count in (1_000, 10_000, 50_000):
+        seek_ms = bench_batch(count, False) * 1000
+        pursuit_ms = bench_batch(count, True) * 1000
+        per_entity = (
+            f'{bench_per_entity(count) * 1000:19.2f}'
+            if count <= 10_000
+            else f'{"-":>19}'
+        )
+        print(f'{count:9d} {seek_ms:14.2f} {pursuit_ms:17.2f} {per_entity}')
+    print(f'60 Hz budget: {TICK * 1000:.2f} ms per tick')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Closure composed SteeringForce vs the compiled flat plan.
+
+Run from the repository root:  PYTHONPATH=src python benchmark/bench_steer_compiler.py
+"""
+import timeit
+
+from infra.vmath import Vector
+from steer.movable_entity import MovableEntity
+from steer.movable_entity import Waypoint
+from steer.squad import Squad
+from steer.steer_behaviour import evade
+from steer.steer_behaviour import flee
+from steer.steer_behaviour import follow
+from steer.steer_behaviour import pursuit
+from steer.steer_behaviour import seek
+from steer.steer_behaviour import separation
+from steer.steer_compiler import compile_force
+
+CALLS = 20_000
+
+
+def main():
+    squad = Squad()
+    for i in range(10):
+        squad.entities.append(MovableEntity(Vector(i * 12.0, i * 5.0)))
+    leader = squad.entities[0]
+    leader.velocity = Vector(20, 10)
+    entity = squad.entities[3]
+    waypoint = Waypoint().reset(Vector(300, 200), Vector(5, 0))
+
+    cases = [
+        (
+            'follow + separation * 0.5',
+            follow(Vector(-20, 20)) + separation(squad) * 0.5,
+            leader,
+        ),
+        ('seek * 0.3 + flee * 0.7', seek(30) * 0.3 + flee() * 0.7, waypoint),
+        ('pursuit + evade * 0.1', pursuit() + evade() * 0.1, waypoint),
+    ]
+    print(f'{"force":<28} {"closure us":>11} {"compiled us":>12} {"speedup":>8}')
+    for name, force, target in cases:
+        compiled = compile_force(force)
+        a = force(entity, target)
+        b = compiled(entity, target)
+        assert (a.x, a.y) == (b.x, b.y)
+        closure = min(
+            timeit.repeat(lambda: force(entity, target), number=CALLS, repeat=5)
+        )
+        flat = min(
+            timeit.repeat(lambda: compiled(entity, target), number=CALLS, repeat=5)
+        )
+        print(
+            f'{name:<28} {closure / CALLS * 1e6:11.2f} {flat / CALLS * 1e6:12.2f} '
+            f'{closure / flat:7.2f}x'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""TickTimers vs a binary heap, and squads waiting on time: polled vs sleeping.
+
+TickTimers costs the same per timer however many are pending (plus a small cost per
+tick), the heap log(pending). The heap is timed behind the TickTimers interface (what
+World would use) and as a bare heapq loop, the least a heap can cost.
+
+Run from the repository root:  PYTHONPATH=src python benchmark/bench_timers.py
+"""
+import heapq
+import random
+import time
+
+from infra.tick_timers import Timer
+from infra.tick_timers import TickTimers
+from infra.vmath import Vector
+from steer.behaviour_compiler import compile_behaviour
+from steer.movable_entity import MovableEntity
+from steer.squad import Squad
+from steer.squad_behaviour import dive_to
+from steer.squad_behaviour import repeat_ex
+from steer.squad_behaviour import zero_behaviour
+from steer.squad_behaviour_condition import infinite_behaviour_condition
+from steer.squad_behaviour_condition import time_elapsed
+from steer.world import World
+
+HORIZON = 20_000  # ticks the timers are spread over
+SQUADS = 200
+TICKS = 600
+
+
+class HeapTimers(TickTimers):
+    """schedule / cancel / advance of TickTimers on a heap of (deadline, seq, timer)"""
+
+    def __init__(self):
+        super().__init__()
+        self._heap = []
+
+    def schedule(self, ticks, callback):
+        if ticks < 1:
+            raise ValueError('a timer has to be at least 1 tick ahead')
+        timer = Timer(self.now + ticks, callback, self.scheduled)
+        heapq.heappush(self._heap, (timer.deadline, timer.seq, timer))
+        self.scheduled += 1
+        self._pending += 1
+        return timer
+
+    def advance(self):
+        self.now += 1
+        heap = self._heap
+        fired = 0
+        while heap and heap[0][0] <= self.now:
+            timer = heapq.heappop(heap)[2]
+            if timer.cancelled:
+                continue
+            timer.cancelled = True
+            self._pending -= 1
+            fired += 1
+            timer.callback()
+        self.fired += fired
+        return fired
+
+
+def bench_timers(delays, timers):
+    start = time.perf_counter()
+    for d in delays:
+        timers.schedule(d, int)
+    while len(timers):
+        timers.advance()
+    return time.perf_counter() - start
+
+
+def bench_heapq(delays):
+    heap = []
+    start = time.perf_counter()
+    for seq, d in enumerate(delays):
+        heapq.heappush(heap, (d, seq, int))
+    now = 0
+    while heap:
+        now += 1
+        while heap and heap[0][0] <= now:
+            heapq.heappop(heap)[2]()
+    return time.perf_counter() - start
+
+
+def make_world(timers):
+    random.seed(0)
+    world = World(timers=timers)
+    for i in range(SQUADS):
+        s = Squad()
+        s.entities = [MovableEntity(Vector(i * 10, 0)) for _ in range(3)]
+        # waits 2-4 s, then dives for half a second, three times
+        b = repeat_ex(
+            infinite_behaviour_condition(),
+            zero_behaviour(time_elapsed(random.uniform(2, 4), timers))
+            >> dive_to(time_elapsed(0.5, timers), s, i * 10, 500),
+            3,
+        )
+        s.squad_behaviour = b if timers is None else compile_behaviour(b)
+        world.add(s)
+    return world
+
+
+def main():
+    rng = random.Random(1)
+    print(f'timers spread over {HORIZON} ticks, schedule + fire')
+    print(f'{"timers":>8} {"us/timer: TickTimers":>21} {"heap":>8} {"heapq loop":>11}')
+    for n in (10_000, 100_000, 1_000_000):
+        delays = [rng.randint(1, HORIZON) for _ in range(n)]
+        print(
+            f'{n:8d} {bench_timers(delays, TickTimers()) / n * 1e6:21.3f} '
+            f'{bench_timers(delays, HeapTimers()) / n * 1e6:8.3f} '
+            f'{bench_heapq(delays) / n * 1e6:11.3f}'
+        )
+    print()
+    print(f'{SQUADS} squads, mostly waiting on time, {TICKS} ticks')
+    print(f'{"mode":>10} {"ms/step":>8} {"behaviour runs skipped":>23}')
+    for mode, timers in (('polled', None), ('sleeping', TickTimers())):
+        world = make_world(timers)
+        start = time.perf_counter()
+        for _ in range(TICKS):
+            world.step(1 / 60)
+        elapsed = (time.perf_counter() - start) / TICKS
+        print(f'{mode:>10} {elapsed * 1e3:8.2f} {world.skipped:23d}')
+
+
+if __name__ == '__main__':
+    main()
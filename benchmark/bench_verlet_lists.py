@@ -0,0 +1,104 @@
+"""separation() tick cost and Verlet list rebuild rate for a few skin sizes.
+
+A formation of members flies across the scene while each member jitters a little
+around its slot, the way followers move relative to each other. Once at a slow speed,
+once at the speed of a fast ship (more than skin / 2 per tick).
+
+Run from the repository root:  PYTHONPATH=src python benchmark/bench_verlet_lists.py
+"""
+import math
+import random
+import time
+
+from infra.vmath import Vector
+from steer.globals import separation_radius
+from steer.movable_entity import MovableEntity
+from steer.squad import Squad
+from steer.steer_behaviour import _separation_force
+from steer.verlet_lists import VerletLists
+
+SPACING = 10.0
+TICKS = 60
+JITTER = 0.2
+# per tick, ~80 and 240 units per second at 60 Hz
+VELOCITIES = (Vector(1.2, 0.4), Vector(3.8, 1.2))
+
+
+def make_squad(count: int, skin: float) -> Squad:
+    random.seed(0)
+    side = math.ceil(math.sqrt(count))
+    squad = Squad()
+    squad.entities = [
+        MovableEntity(Vector((i % side) * SPACING, (i // side) * SPACING))
+        for i in range(count)
+    ]
+    squad.neighbour_lists = VerletLists(squad.spatial_hash, separation_radius, skin)
+    return squad
+
+
+def run(squad: Squad, use_lists: bool, velocity: Vector) -> tuple[float, float]:
+    """Returns the neighbour lookup (grid and lists upkeep included) and the
+    separation force time per tick"""
+    max_move = velocity.length() + JITTER * math.sqrt(2)
+    grid = squad.spatial_hash
+    lists = squad.neighbour_lists
+    query = []
+    lookup = 0.0
+    force = 0.0
+    clock = time.perf_counter
+    for _ in range(TICKS):
+        start = clock()
+        grid.sync(squad.entities)
+        lists.check(max_move)
+        lookup += clock() - start
+        for e in squad.entities:
+            t0 = clock()
+            if use_lists:
+                neighbours = lists.neighbours(e)
+            else:
+                neighbours = grid.query(e.pos, separation_radius, query)
+            t1 = clock()
+            _separation_force(e, neighbours)
+            t2 = clock()
+            e.pos = (
+                e.pos
+                + velocity
+                + Vector(
+                    random.uniform(-JITTER, JITTER), random.uniform(-JITTER, JITTER)
+                )
+            )
+            t3 = clock()
+            pos = e.pos
+            grid.move(e, pos)
+            lists.moved(e, pos)
+            lookup += (t1 - t0) + (clock() - t3)
+            force += t2 - t1
+    return lookup / TICKS, force / TICKS
+
+
+def main():
+    count = 1_000
+    for velocity in VELOCITIES:
+        speed = velocity.length() * 60
+        lookup, force = run(make_squad(count, 0), False, velocity)
+        print(
+            f'{count} members at {speed:.0f} units/s, spatial hash query per call: '
+            f'lookup {lookup * 1e3:.2f} ms/tick, force {force * 1e3:.2f} ms/tick'
+        )
+        print(
+            f'{"skin":>6} {"lookup ms":>10} {"force ms":>9} {"rebuilds/tick":>14} '
+            f'{"fallbacks/tick":>15}'
+        )
+        for skin in (1.0, 2.0, 4.0, 6.0, 10.0):
+            squad = make_squad(count, skin)
+            lookup, force = run(squad, True, velocity)
+            lists = squad.neighbour_lists
+            print(
+                f'{skin:6.1f} {lookup * 1e3:10.2f} {force * 1e3:9.2f} '
+                f'{lists.rebuilds / lists.checks:14.2f} '
+                f'{lists.fallbacks / lists.checks:15.1f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""World.step with the squads updated in order vs on a thread pool.
+
+On a CPython with the GIL the threads mostly take turns, the speedup shows on free
+threaded builds (python3.13t and later).
+
+Run from the repository root:  PYTHONPATH=src python benchmark/bench_world.py
+"""
+import random
+import sys
+import sysconfig
+import time
+
+from infra.vmath import Rect
+from infra.vmath import Vector
+from steer.entity_world import EntityWorld
+from steer.formation import FormationGrid
+from steer.movable_entity import MovableEntity
+from steer.neighbour_index import NeighbourIndex
+from steer.squad import Squad
+from steer.squad_behaviour import patrol_ext
+from steer.squad_behaviour_condition import infinite_behaviour_condition
+from steer.world import World
+
+SQUADS = 32
+MEMBERS = 20
+TICKS = 60
+
+
+def make_world(max_workers: int) -> World:
+    random.seed(0)
+    entities = EntityWorld(capacity=SQUADS * MEMBERS)
+    world = World(neighbour_index=NeighbourIndex(entities), max_workers=max_workers)
+    for i in range(SQUADS):
+        s = Squad()
+        x = 100 + (i % 8) * 120
+        y = 100 + (i // 8) * 120
+        s.entities = [
+            MovableEntity(Vector(x + j, y), world=entities) for j in range(MEMBERS)
+        ]
+        s.formation = FormationGrid(columns=5, spacing=20)
+        s.squad_behaviour = patrol_ext(
+            infinite_behaviour_condition(), s, 4, i % 2 == 0, Rect(50, 50, 900, 500)
+        )
+        world.add(s)
+    return world
+
+
+def main():
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(
+        f'{SQUADS} squads x {MEMBERS} members, GIL '
+        f'{"enabled" if gil else "disabled"} '
+        f'(Py_GIL_DISABLED={sysconfig.get_config_var("Py_GIL_DISABLED")})'
+    )
+    print(f'{"workers":>8} {"ms/step":>8}')
+    for workers in (1, 2, 4, 8):
+        with make_world(workers) as world:
+            world.step(1 / 60)  # warm up
+            start = time.perf_counter()
+            for _ in range(TICKS):
+                world.step(1 / 60)
+            elapsed = (time.perf_counter() - start) / TICKS
+        print(f'{workers:8d} {elapsed * 1e3:8.2f}')
+
+
+if __name__ == '__main__':
+    main()
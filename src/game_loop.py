@@ -1,17 +1,18 @@
-import math
 import sys
 
 import pygame
 from pygame.math import Vector2
 
 from gfx.sprite import MySprite
+from infra.sim_clock import SimClock
+from infra.vmath import lerp
 from infra.vmath import Rect
 from infra.vmath import Vector
-from steer.formation import Formation
 from steer.formation import FormationArrowHead  # noqa: F401
 from steer.formation import FormationColumn  # noqa: F401
 from steer.movable_entity import MovableEntity
 from steer.movable_entity import Waypoint
+from steer.neighbour_index import NeighbourIndex
 from steer.path import flower_path_area  # noqa: F401
 from steer.path import in_and_out_path  # noqa: F401
 from steer.path import Path
@@ -23,6 +24,7 @@ from steer.squad_behaviour import patrol_ext  # noqa: F401
 from steer.squad_behaviour import spiral  # noqa: F401
 from steer.squad_behaviour import spiral_in_out  # noqa: F401
 from steer.squad_behaviour_condition import infinite_behaviour_condition
+from steer.world import World
 
 
 # from steer.path import circle_path
@@ -35,6 +37,8 @@ from steer.squad_behaviour_condition import infinite_behaviour_condition
 
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 800
+SIM_HZ = 60  # fixed simulation rate, independent of the render rate
+RENDER_FPS = 60
 
 
 class Ship(MySprite, MovableEntity):
@@ -54,7 +58,8 @@ class Ship(MySprite, MovableEntity):
         self.target = Waypoint.NAWaypoint()
         self.lead = False
 
-    def update(self, dt: float):
+    def update(self, alpha: float):
+        # alpha - interpolation between the last two simulation steps (SimClock.alpha)
         global screen
         # self.update_steer_behaviour(dt)
         # self.movement = Vector2(self.velocity.x, self.velocity.y)
@@ -69,7 +74,8 @@ class Ship(MySprite, MovableEntity):
         rot_image = pygame.transform.rotate(self.orig_image, self.angle)
         self.rect = rot_image.get_rect(center=self.fpos)
         # self.fpos = self.fpos + self.movement
-        self.fpos = Vector2(self.pos.x, self.pos.y)
+        render_pos = lerp(self.prev_pos, self.pos, alpha)
+        self.fpos = Vector2(render_pos.x, render_pos.y)
 
         # vertical correction to screen height
         if self.fpos.y < (-self.rect.height / 2):
@@ -127,6 +133,7 @@ class Level:
         self.display_surface = surface
         self.setup_level()
         self.leader = None
+        self.sim_clock = SimClock.from_rate(SIM_HZ)
 
     def setup_level(self):
         self.players = pygame.sprite.Group()  # GroupSingle()
@@ -151,6 +158,9 @@ class Level:
 
         self.s1 = Squad()
         self.s1.entities = [Ship([100, 100]) for _ in range(8)]
+        # every squad of the level, they share a neighbour index rebuilt once per step
+        self.world = World(neighbour_index=NeighbourIndex())
+        self.world.add(self.s1)
         self.s1.formation = FormationColumn()
         self.s1.formation.scale = 0.75
         # self.s1.squad_behaviour = path(
@@ -188,8 +198,9 @@ class Level:
                     formation_vector = self.s1.get_position_delta(
                         entity, entity_in_front
                     )
-                    rot = entity_in_front.rotation - math.pi
-                    formation_vector = Formation.rotate(formation_vector, rot)
+                    formation_vector = entity_in_front.formation_rotation().apply(
+                        formation_vector
+                    )
                     formation_vector = entity_in_front.shift(formation_vector)
                     pygame.draw.rect(
                         screen,
@@ -199,12 +210,15 @@ class Level:
                         ),
                     )
 
-    def run(self, dt: float) -> None:
+    def step(self, dt: float) -> None:
+        self.world.step(dt)
+
+    def run(self, frame_dt: float) -> None:
         # draw level
         screen.fill("black")
         self.path.draw(self.display_surface)
         # self.display_surface.blit(self.background, [0, 0])
-        self.s1.update_squad_behaviour(dt)
+        self.sim_clock.run(frame_dt, self.step)
 
         new_leader = self.s1.get_leader()
         if new_leader != self.leader:
@@ -215,7 +229,7 @@ class Level:
         # player
         player: MySprite
         for player in self.players:
-            player.update(dt)
+            player.update(self.sim_clock.alpha)
             player.draw(self.display_surface)
         self.draw_formation()
 
@@ -244,7 +258,7 @@ def game_loop():
         level.run(dt)
 
         pygame.display.update()
-        clock.tick(60)
+        clock.tick(RENDER_FPS)
 
 
 if __name__ == "__main__":
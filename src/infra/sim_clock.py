@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from typing import Callable
+
+
+class SimClock:
+    """Fixed timestep simulation clock.
+
+    The wall clock frame time is accumulated and consumed in steps of exactly `step`
+    seconds, so the simulation always integrates with the same dt regardless of the
+    render frame rate, and the same sequence of frame times always produces the same
+    sequence of steps.
+
+    At most `max_substeps` steps run per frame. When a frame hitch would need more, the
+    excess time is dropped (the simulation slows down) instead of falling further and
+    further behind (spiral of death).
+
+    `alpha` is how far the render time is between the last two simulation steps (0..1),
+    renderers interpolate prev_pos -> pos with it.
+    """
+
+    def __init__(self, step: float = 1 / 60, max_substeps: int = 5):
+        if step <= 0:
+            raise ValueError('step must be > 0')
+        if max_substeps < 1:
+            raise ValueError('max_substeps must be >= 1')
+        self.step = step
+        self.max_substeps = max_substeps
+        self.ticks: int = 0  # number of steps since the clock started
+        self.dropped_time: float = 0.0  # time discarded by the max_substeps cap
+        self._accumulator: float = 0.0
+
+    @staticmethod
+    def from_rate(hz: float, max_substeps: int = 5) -> SimClock:
+        return SimClock(1 / hz, max_substeps)
+
+    @property
+    def time(self) -> float:
+        """Simulation time, counted in whole steps so it doesn't drift"""
+        return self.ticks * self.step
+
+    @property
+    def alpha(self) -> float:
+        return self._accumulator / self.step
+
+    def advance(self, frame_dt: float) -> int:
+        """Add a frame's worth of time and return how many steps to simulate"""
+        self._accumulator += max(0.0, frame_dt)
+        steps = min(int(self._accumulator // self.step), self.max_substeps)
+        self._accumulator -= steps * self.step
+        if self._accumulator >= self.step:
+            excess = self._accumulator - self._accumulator % self.step
+            self.dropped_time += excess
+            self._accumulator -= excess
+        self.ticks += steps
+        return steps
+
+    def run(self, frame_dt: float, update: Callable[[float], None]) -> int:
+        """advance and call update(step) once per step, returns the number of steps"""
+        steps = self.advance(frame_dt)
+        for _ in range(steps):
+            update(self.step)
+        return steps
+
+    def reset(self) -> None:
+        self.ticks = 0
+        self.dropped_time = 0.0
+        self._accumulator = 0.0
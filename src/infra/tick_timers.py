@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import bisect
+import math
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+_MAX_SUMS = 1 << 16  # longest duration (in ticks) ticks_for converts exactly
+
+
+class Timer:
+    __slots__ = ('deadline', 'callback', 'seq', 'cancelled')
+
+    def __init__(self, deadline: int, callback: Callable[[], None], seq: int):
+        self.deadline = deadline
+        self.callback = callback
+        self.seq = seq
+        self.cancelled = False
+
+    def __repr__(self) -> str:
+        return f'Timer(deadline={self.deadline}, cancelled={self.cancelled})'
+
+
+class TickTimers:
+    """Timers on the simulation tick count, a dict from the tick to the timers due at it.
+
+    schedule appends a timer to the list of its tick and advance pops the list of the
+    new tick, so both cost the same however many timers are pending, and the timers due
+    on the same tick fire in the order they were scheduled. A cancelled timer stays in
+    its list and is skipped when its tick is reached.
+
+    advance is called once per simulation step (World.step does when it has timers),
+    now is the number of the step being simulated.
+    """
+
+    def __init__(self) -> None:
+        self.now: int = 0
+        self.scheduled: int = 0
+        self.fired: int = 0
+        self.cancelled: int = 0
+        self._due: Dict[int, List[Timer]] = {}
+        self._pending = 0
+        # running sums of a step dt, see ticks_for
+        self._sums_dt: Optional[float] = None
+        self._sums: List[float] = [0.0]
+
+    def __len__(self) -> int:
+        """Number of pending timers"""
+        return self._pending
+
+    def schedule(self, ticks: int, callback: Callable[[], None]) -> Timer:
+        """Call callback ticks (>= 1) steps from now, in that step's advance"""
+        if ticks < 1:
+            raise ValueError('a timer has to be at least 1 tick ahead')
+        deadline = self.now + ticks
+        timer = Timer(deadline, callback, self.scheduled)
+        self.scheduled += 1
+        self._pending += 1
+        due = self._due.get(deadline)
+        if due is None:
+            self._due[deadline] = [timer]
+        else:
+            due.append(timer)
+        return timer
+
+    def cancel(self, timer: Timer) -> None:
+        # left in the list of its tick and skipped when the tick is reached
+        if not timer.cancelled:
+            timer.cancelled = True
+            self.cancelled += 1
+            self._pending -= 1
+
+    def advance(self) -> int:
+        """Step to the next tick and fire its timers, returns how many fired"""
+        self.now += 1
+        due = self._due.pop(self.now, None)
+        if due is None:
+            return 0
+        fired = 0
+        for timer in due:
+            if timer.cancelled:
+                continue
+            timer.cancelled = True  # done, cancel is a no-op from here on
+            self._pending -= 1
+            fired += 1
+            timer.callback()
+        self.fired += fired
+        return fired
+
+    def ticks_for(self, duration: float, dt: float) -> int:
+        """Steps of dt until duration elapsed (at least 1), counted the way a polling
+        timer does it: the first step at which dt added up step by step is >= duration.
+
+        The running sums are kept for the last dt, so converting is a binary search.
+        """
+        if dt <= 0:
+            raise ValueError('dt must be > 0')
+        if dt != self._sums_dt:
+            self._sums_dt = dt
+            self._sums = [0.0]
+        sums = self._sums
+        while sums[-1] < duration and len(sums) <= _MAX_SUMS:
+            sums.append(sums[-1] + dt)
+        if sums[-1] < duration:  # beyond the exact range
+            return math.ceil(duration / dt)
+        return max(1, bisect.bisect_left(sums, duration))
+
+    def __repr__(self) -> str:
+        return (
+            f'TickTimers(now={self.now}, pending={self._pending}, '
+            f'fired={self.fired}, cancelled={self.cancelled})'
+        )
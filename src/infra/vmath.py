@@ -1,11 +1,19 @@
 from __future__ import annotations
 
 import math
+from typing import Iterable
+from typing import List
+from typing import Union
+
+import numpy as np
+import numpy.typing as npt
 
 from steer.globals import FAST_CHECK_INTERSECTION
 
 
 class Vector:
+    __slots__ = ('x', 'y')
+
     def __init__(self, x: float = 0, y: float = 0):
         self.x = x
         self.y = y
@@ -14,11 +22,13 @@ class Vector:
     def zero() -> Vector:
         return Vector(0, 0)
 
+    # x * x rather than x**2 - it is exact to the last bit (pow isn't always) and it is
+    # what the numpy (VectorArray / EntityWorld) code computes
     def length(self) -> float:
-        return math.sqrt(self.x**2 + self.y**2)
+        return math.sqrt(self.x * self.x + self.y * self.y)
 
     def sqr_length(self) -> float:
-        return self.x**2 + self.y**2
+        return self.x * self.x + self.y * self.y
 
     def truncate(self, v: float) -> Vector:
         ln = self.length()
@@ -33,6 +43,52 @@ class Vector:
             return Vector(0, 0)
         return self * n
 
+    # In place API - these mutate the vector and return it so calls can be chained.
+    # Use only on vectors that are owned by the caller (temporaries or scratch vectors),
+    # since other objects may hold a reference to the same vector. The vectors a
+    # MovableEntity returns (pos, velocity ...) are copies of its row, mutating them
+    # doesn't move the entity.
+    def set(self, x: float, y: float) -> Vector:
+        self.x = x
+        self.y = y
+        return self
+
+    def iadd(self, other: Vector) -> Vector:
+        self.x += other.x
+        self.y += other.y
+        return self
+
+    def isub(self, other: Vector) -> Vector:
+        self.x -= other.x
+        self.y -= other.y
+        return self
+
+    def imul(self, scalar: float) -> Vector:
+        self.x *= scalar
+        self.y *= scalar
+        return self
+
+    def idiv(self, scalar: float) -> Vector:
+        self.x /= scalar
+        self.y /= scalar
+        return self
+
+    def truncate_(self, v: float) -> Vector:
+        ln = self.length()
+        if ln > v:
+            self.x = self.x / ln * v
+            self.y = self.y / ln * v
+        return self
+
+    def normalize_(self) -> Vector:
+        try:
+            n = 1 / self.length()
+        except ZeroDivisionError:
+            return self.set(0, 0)
+        self.x *= n
+        self.y *= n
+        return self
+
     def __add__(self, other: Vector) -> Vector:
         return Vector(self.x + other.x, self.y + other.y)
 
@@ -64,12 +120,66 @@ class Vector:
         )
 
     def set_angle(self, angle: float) -> Vector:
-        return Vector(math.cos(angle) * self.length(), math.sin(angle) * self.length())
+        ln = self.length()
+        return Vector(math.cos(angle) * ln, math.sin(angle) * ln)
 
     def rotate(self, angle: float) -> Vector:
+        return Rotation2D(angle).apply(self)
+
+
+class Rotation2D:
+    """A rotation around 0,0 with its cos/sin computed once.
+
+    Build it once and apply it to as many vectors as needed. Rotations compose with *
+    (a * b rotates by b and then by a) and invert without calling cos/sin again.
+    """
+
+    __slots__ = ('angle', 'cos', 'sin')
+
+    def __init__(self, angle: float = 0.0):
+        self.angle = angle
+        self.cos = math.cos(angle)
+        self.sin = math.sin(angle)
+
+    @staticmethod
+    def _from_cos_sin(angle: float, cos: float, sin: float) -> Rotation2D:
+        r = Rotation2D.__new__(Rotation2D)
+        r.angle = angle
+        r.cos = cos
+        r.sin = sin
+        return r
+
+    def __mul__(self, other: Rotation2D) -> Rotation2D:
+        return Rotation2D._from_cos_sin(
+            self.angle + other.angle,
+            self.cos * other.cos - self.sin * other.sin,
+            self.sin * other.cos + self.cos * other.sin,
+        )
+
+    def inverse(self) -> Rotation2D:
+        return Rotation2D._from_cos_sin(-self.angle, self.cos, -self.sin)
+
+    def __repr__(self) -> str:
+        return f"Rotation2D({self.angle:.4f})"
+
+    def apply(self, v: Vector) -> Vector:
         return Vector(
-            (self.x * math.cos(angle)) - (self.y * math.sin(angle)),
-            (self.x * math.sin(angle)) + (self.y * math.cos(angle)),
+            (v.x * self.cos) - (v.y * self.sin), (v.x * self.sin) + (v.y * self.cos)
+        )
+
+    def apply_(self, v: Vector) -> Vector:
+        # in place version of apply
+        return v.set(
+            (v.x * self.cos) - (v.y * self.sin), (v.x * self.sin) + (v.y * self.cos)
+        )
+
+    def apply_batch(self, points: VectorArray) -> VectorArray:
+        x = points.data[:, 0]
+        y = points.data[:, 1]
+        return VectorArray(
+            np.column_stack(
+                ((x * self.cos) - (y * self.sin), (x * self.sin) + (y * self.cos))
+            )
         )
 
 
@@ -87,6 +197,22 @@ def dot(v1: Vector, v2: Vector) -> float:
     return v1.x * v2.x + v1.y * v2.y
 
 
+def sqr_distance(v1: Vector, v2: Vector) -> float:
+    dx = v1.x - v2.x
+    dy = v1.y - v2.y
+    return dx * dx + dy * dy
+
+
+def distance(v1: Vector, v2: Vector) -> float:
+    dx = v1.x - v2.x
+    dy = v1.y - v2.y
+    return math.sqrt(dx * dx + dy * dy)
+
+
+def lerp(v1: Vector, v2: Vector, t: float) -> Vector:
+    return Vector(v1.x + (v2.x - v1.x) * t, v1.y + (v2.y - v1.y) * t)
+
+
 def angle_between(v1, v2) -> float:
     len_mul = v1.length() * v2.length()
     if len_mul == 0:
@@ -95,6 +221,154 @@ def angle_between(v1, v2) -> float:
     return math.acos(clamp(dot(v1, v2) / len_mul, -1, 1))
 
 
+FloatArray = npt.NDArray[np.float64]
+BoolArray = npt.NDArray[np.bool_]
+
+
+class VectorArray:
+    """Structure of arrays counterpart of Vector - N vectors stored as an Nx2 float64 buffer.
+
+    Operations mirror Vector (same formulas, same zero length handling) but run over all
+    rows at once. Scalars may be replaced by an array of N values (one per row).
+    """
+
+    __slots__ = ('data',)
+
+    def __init__(self, data: npt.ArrayLike | None = None):
+        if data is None:
+            data = np.zeros((0, 2))
+        self.data: FloatArray = np.ascontiguousarray(data, dtype=np.float64)
+        if self.data.ndim != 2 or self.data.shape[1] != 2:
+            raise ValueError(f'VectorArray expects an Nx2 array, got {self.data.shape}')
+
+    @staticmethod
+    def zeros(n: int) -> VectorArray:
+        return VectorArray(np.zeros((n, 2)))
+
+    @staticmethod
+    def from_vectors(vectors: Iterable[Vector]) -> VectorArray:
+        flat = np.fromiter((c for v in vectors for c in (v.x, v.y)), dtype=np.float64)
+        return VectorArray(flat.reshape(-1, 2))
+
+    def to_vectors(self) -> List[Vector]:
+        return [Vector(x, y) for x, y in self.data.tolist()]
+
+    def copy(self) -> VectorArray:
+        return VectorArray(self.data.copy())
+
+    @property
+    def x(self) -> FloatArray:
+        return self.data[:, 0]
+
+    @property
+    def y(self) -> FloatArray:
+        return self.data[:, 1]
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, index: int) -> Vector:
+        x, y = self.data[index].tolist()
+        return Vector(x, y)
+
+    def __setitem__(self, index: int, v: Vector) -> None:
+        self.data[index, 0] = v.x
+        self.data[index, 1] = v.y
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, VectorArray):
+            return NotImplemented
+        return bool(np.array_equal(self.data, other.data))
+
+    def __repr__(self) -> str:
+        return f"VectorArray({len(self)})"
+
+    @staticmethod
+    def _operand(other: VectorArray | Vector) -> FloatArray | tuple[float, float]:
+        if isinstance(other, Vector):
+            return (other.x, other.y)
+        return other.data
+
+    @staticmethod
+    def _column(scalar: float | npt.ArrayLike) -> float | FloatArray:
+        if np.ndim(scalar) == 0:
+            return scalar  # type: ignore[return-value]
+        return np.asarray(scalar, dtype=np.float64).reshape(-1, 1)
+
+    def __add__(self, other: VectorArray | Vector) -> VectorArray:
+        return VectorArray(self.data + self._operand(other))
+
+    def __sub__(self, other: VectorArray | Vector) -> VectorArray:
+        return VectorArray(self.data - self._operand(other))
+
+    def __mul__(self, scalar: float | npt.ArrayLike) -> VectorArray:
+        return VectorArray(self.data * self._column(scalar))
+
+    def __truediv__(self, scalar: float | npt.ArrayLike) -> VectorArray:
+        return VectorArray(self.data / self._column(scalar))
+
+    def iadd(self, other: VectorArray | Vector) -> VectorArray:
+        self.data += self._operand(other)
+        return self
+
+    def isub(self, other: VectorArray | Vector) -> VectorArray:
+        self.data -= self._operand(other)
+        return self
+
+    def imul(self, scalar: float | npt.ArrayLike) -> VectorArray:
+        self.data *= self._column(scalar)
+        return self
+
+    def sqr_length(self) -> FloatArray:
+        x: FloatArray = self.data[:, 0]
+        y: FloatArray = self.data[:, 1]
+        return x * x + y * y
+
+    def length(self) -> FloatArray:
+        return np.sqrt(self.sqr_length())
+
+    def normalize(self) -> VectorArray:
+        ln = self.length()
+        with np.errstate(divide='ignore'):
+            n = np.where(ln > 0, 1 / ln, 0.0)
+        return VectorArray(self.data * n[:, None])
+
+    def truncate(self, v: float | npt.ArrayLike) -> VectorArray:
+        ln = self.length()
+        v = np.broadcast_to(np.asarray(v, dtype=np.float64), ln.shape)
+        over = ln > v
+        data = self.data.copy()
+        data[over] = (data[over] / ln[over, None]) * v[over, None]
+        return VectorArray(data)
+
+    def rotate(self, angle: float | npt.ArrayLike) -> VectorArray:
+        cos = np.cos(angle)
+        sin = np.sin(angle)
+        x = self.data[:, 0]
+        y = self.data[:, 1]
+        return VectorArray(np.column_stack((x * cos - y * sin, x * sin + y * cos)))
+
+    def dot(self, other: VectorArray | Vector) -> FloatArray:
+        o = self._operand(other)
+        x: FloatArray = self.data[:, 0]
+        y: FloatArray = self.data[:, 1]
+        if isinstance(o, tuple):
+            return x * o[0] + y * o[1]
+        ox: FloatArray = o[:, 0]
+        oy: FloatArray = o[:, 1]
+        return x * ox + y * oy
+
+    def angle_between(self, other: VectorArray | Vector) -> FloatArray:
+        if isinstance(other, Vector):
+            other_length: float | FloatArray = other.length()
+        else:
+            other_length = other.length()
+        len_mul = self.length() * other_length
+        safe = np.where(len_mul == 0, 1.0, len_mul)
+        angle = np.arccos(np.clip(self.dot(other) / safe, -1, 1))
+        return np.where(len_mul == 0, 0.0, angle)
+
+
 class Rect:
     def __init__(self, x: float, y: float, width: float, height: float):
         self.x = x
@@ -109,7 +383,7 @@ def get_angle_from(new_position: Vector, old_position: Vector) -> float | None:
 
     angle = 0.0
     if ydt != 0 and xdt != 0:
-        hyp = math.sqrt(math.pow(xdt, 2) + math.pow(ydt, 2))
+        hyp = math.sqrt(xdt * xdt + ydt * ydt)
         if ydt >= 0:
             angle = math.asin(ydt / hyp)
             if xdt < 0:
@@ -126,50 +400,76 @@ def get_angle_from(new_position: Vector, old_position: Vector) -> float | None:
     return angle
 
 
-def point_on_segment(seg_start: Vector, seg_end: Vector, point: Vector) -> bool:
-    min_x = min(seg_start.x, seg_end.x)
-    max_x = max(seg_start.x, seg_end.x)
-    if point.x < min_x or point.x > max_x:
+def get_angle_from_batch(delta: FloatArray) -> tuple[FloatArray, BoolArray]:
+    """get_angle_from for an Nx2 array of (new - old) deltas.
+
+    Returns the angles and a mask of the rows that have one (get_angle_from returns None
+    for the others).
+    """
+    x = delta[:, 0]
+    y = delta[:, 1]
+    valid = (x != 0) & (y != 0)
+    hyp = np.sqrt(x * x + y * y)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        a = np.arcsin(np.abs(y) / hyp)
+    angle = np.where(
+        y >= 0,
+        np.where(x < 0, a + 2 * (math.pi / 2 - a), a),
+        np.where(x < 0, a + math.pi, 2 * math.pi - a),
+    )
+    return angle, valid
+
+
+def _on_segment(
+    x1: float, y1: float, x2: float, y2: float, px: float, py: float
+) -> bool:
+    if px < min(x1, x2) or px > max(x1, x2):
         return False
-    min_y = min(seg_start.y, seg_end.y)
-    max_y = max(seg_start.y, seg_end.y)
-    if point.y < min_y or point.y > max_y:
+    if py < min(y1, y2) or py > max(y1, y2):
         return False
-
     return True
 
 
+def point_on_segment(seg_start: Vector, seg_end: Vector, point: Vector) -> bool:
+    return _on_segment(seg_start.x, seg_start.y, seg_end.x, seg_end.y, point.x, point.y)
+
+
 def line_segment_intersect_circle(
     pos1: Vector, pos2: Vector, center: Vector, radius: float
 ) -> bool:
-    pos1t = pos1 - center
-    pos2t = pos2 - center
-    dx = pos2t.x - pos1t.x
-    dy = pos2t.y - pos2t.y
+    # Everything is computed relative to the circle center
+    x1 = pos1.x - center.x
+    y1 = pos1.y - center.y
+    x2 = pos2.x - center.x
+    y2 = pos2.y - center.y
+    # Early out - the segment bounding box has to overlap the circle bounding box
+    if (
+        min(x1, x2) > radius
+        or max(x1, x2) < -radius
+        or min(y1, y2) > radius
+        or max(y1, y2) < -radius
+    ):
+        return False
+
+    dx = x2 - x1
+    dy = y2 - y1
     dr2 = dx * dx + dy * dy
-    d = pos1t.x * pos2t.y - pos2t.x * pos1t.y
+    d = x1 * y2 - x2 * y1
     delta = (radius * radius * dr2) - (d * d)
     if delta < 0 or dr2 == 0:
         return False
 
-    # find the points
-    intersect1: Vector = Vector.zero()
-    intersect2: Vector = Vector.zero()
-
-    part_x = sign(dy) * dx * math.sqrt(delta)
+    # find the points where the (infinite) line crosses the circle
+    sqrt_delta = math.sqrt(delta)
+    part_x = sign(dy) * dx * sqrt_delta
     part_x2 = d * dy
-    intersect1.x = (part_x2 + part_x) / dr2
-    intersect2.x = (part_x2 - part_x) / dr2
-
-    part_y = abs(dy) * math.sqrt(delta)
+    part_y = abs(dy) * sqrt_delta
     part_y2 = -d * dx
-    intersect1.y = (part_y2 + part_y) / dr2
-    intersect2.y = (part_y2 - part_y) / dr2
 
-    if point_on_segment(pos1, pos2, intersect1) is True:
+    if _on_segment(x1, y1, x2, y2, (part_x2 + part_x) / dr2, (part_y2 + part_y) / dr2):
         return True
 
-    if point_on_segment(pos1, pos2, intersect2) is True:
+    if _on_segment(x1, y1, x2, y2, (part_x2 - part_x) / dr2, (part_y2 - part_y) / dr2):
         return True
 
     return False
@@ -178,12 +478,11 @@ def line_segment_intersect_circle(
 def did_reach_target(
     current_pos: Vector, prev_pos: Vector, target: Vector, radius: float
 ) -> bool:
-    if FAST_CHECK_INTERSECTION is True:
-        if (current_pos - target).length() < radius:
-            return True
-    else:
-        if (current_pos - target).length() < radius:
-            return True
+    dx = current_pos.x - target.x
+    dy = current_pos.y - target.y
+    if dx * dx + dy * dy < radius * radius:
+        return True
+    if FAST_CHECK_INTERSECTION is False:
         if (
             line_segment_intersect_circle(
                 current_pos, pos2=prev_pos, center=target, radius=radius
@@ -192,3 +491,101 @@ def did_reach_target(
         ):
             return True
     return False
+
+
+PointsLike = Union[VectorArray, Vector, npt.ArrayLike]
+
+
+def as_points(points: PointsLike) -> FloatArray:
+    # Vector -> shape (2,) so it broadcasts against Nx2 arrays
+    if isinstance(points, Vector):
+        return np.array((points.x, points.y))
+    if isinstance(points, VectorArray):
+        return points.data
+    return np.asarray(points, dtype=np.float64)
+
+
+def line_segment_intersect_circle_batch(
+    pos1: PointsLike,
+    pos2: PointsLike,
+    center: PointsLike,
+    radius: float | npt.ArrayLike,
+) -> BoolArray:
+    """Row by row line_segment_intersect_circle, same formulas so the results are identical"""
+    p1 = as_points(pos1)
+    p2 = as_points(pos2)
+    c = as_points(center)
+    x1 = p1[..., 0] - c[..., 0]
+    y1 = p1[..., 1] - c[..., 1]
+    x2 = p2[..., 0] - c[..., 0]
+    y2 = p2[..., 1] - c[..., 1]
+    r = np.broadcast_to(np.asarray(radius, dtype=np.float64), x1.shape)
+
+    result = np.zeros(x1.shape, dtype=np.bool_)
+    min_x = np.minimum(x1, x2)
+    max_x = np.maximum(x1, x2)
+    min_y = np.minimum(y1, y2)
+    max_y = np.maximum(y1, y2)
+    candidates = np.flatnonzero(
+        (min_x <= r) & (max_x >= -r) & (min_y <= r) & (max_y >= -r)
+    )
+    if len(candidates) == 0:
+        return result
+
+    x1, y1, x2, y2, r = (a[candidates] for a in (x1, y1, x2, y2, r))
+    min_x, max_x, min_y, max_y = (a[candidates] for a in (min_x, max_x, min_y, max_y))
+    dx = x2 - x1
+    dy = y2 - y1
+    dr2 = dx * dx + dy * dy
+    d: FloatArray = x1 * y2 - x2 * y1
+    delta = (r * r * dr2) - (d * d)
+    valid = (delta >= 0) & (dr2 != 0)
+    dr2 = np.where(valid, dr2, 1.0)
+    sqrt_delta = np.sqrt(np.where(valid, delta, 0.0))
+    part_x = np.where(dy < 0, -1.0, 1.0) * dx * sqrt_delta
+    part_x2 = d * dy
+    part_y = np.abs(dy) * sqrt_delta
+    part_y2 = -d * dx
+
+    hit = np.zeros(len(candidates), dtype=np.bool_)
+    for px, py in (
+        ((part_x2 + part_x) / dr2, (part_y2 + part_y) / dr2),
+        ((part_x2 - part_x) / dr2, (part_y2 - part_y) / dr2),
+    ):
+        hit |= (px >= min_x) & (px <= max_x) & (py >= min_y) & (py <= max_y)
+    result[candidates] = hit & valid
+    return result
+
+
+def did_reach_target_batch(
+    current_pos: PointsLike,
+    prev_pos: PointsLike,
+    target: PointsLike,
+    radius: float | npt.ArrayLike,
+) -> BoolArray:
+    """Vectorized did_reach_target - returns a mask with one entry per entity.
+
+    target may be a single Vector (shared by all) or one target per entity, radius may
+    be a scalar or one radius per entity. The segment sweep only runs for the rows that
+    failed the squared distance check.
+    """
+    cur = as_points(current_pos)
+    tgt = as_points(target)
+    dx = cur[..., 0] - tgt[..., 0]
+    dy = cur[..., 1] - tgt[..., 1]
+    r = np.broadcast_to(np.asarray(radius, dtype=np.float64), dx.shape)
+    reached = dx * dx + dy * dy < r * r
+    if FAST_CHECK_INTERSECTION is True:
+        return reached
+
+    rest = np.flatnonzero(~reached)
+    if len(rest) == 0:
+        return reached
+    prev = as_points(prev_pos)
+    reached[rest] = line_segment_intersect_circle_batch(
+        cur[rest],
+        prev if prev.ndim == 1 else prev[rest],
+        tgt if tgt.ndim == 1 else tgt[rest],
+        r[rest],
+    )
+    return reached
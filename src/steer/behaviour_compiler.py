@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from steer.squad_behaviour import SquadBehaviour
+from steer.squad_behaviour_condition import CondRes
+from steer.squad_behaviour_condition import TimedCondition
+
+# result codes, the interned CondRes of each is _RESULTS[code]
+_NOT_MET = 0
+_MET = 1
+_ABORT = 2
+_NONE = 3  # a behaviour that returned None (wander), neither met nor not met
+
+_RESULTS: Tuple[Optional[CondRes], ...] = (
+    CondRes(CondRes.not_met),
+    CondRes(CondRes.met),
+    CondRes(CondRes.abort),
+    None,
+)
+_CODES: Dict[str, int] = {
+    CondRes.not_met: _NOT_MET,
+    CondRes.met: _MET,
+    CondRes.abort: _ABORT,
+}
+
+# node kinds
+_LEAF = 0  # a behaviour function
+_OR = 1
+_AND = 2
+_THEN = 3
+_CHECK = 4  # a condition (zero_behaviour)
+_LOOP = 5
+_REPEAT = 6
+
+_KINDS = {
+    SquadBehaviour.op_leaf: _LEAF,
+    SquadBehaviour.op_or: _OR,
+    SquadBehaviour.op_and: _AND,
+    SquadBehaviour.op_then: _THEN,
+    SquadBehaviour.op_check: _CHECK,
+    SquadBehaviour.op_loop: _LOOP,
+    SquadBehaviour.op_repeat: _REPEAT,
+}
+
+# restart ops
+_RESET = 0  # arg: node, its child results back to not met
+_RESTART_COND = 1  # arg: condition
+_RESTART_LEAF = 2  # arg: behaviour function (or None)
+
+Op = Tuple[int, Any]
+
+
+class CompiledSquadBehaviour(SquadBehaviour):
+    """A SquadBehaviour combinator tree flattened into an integer state machine.
+
+    Every node of the tree gets a number and its state (the results of its children so
+    far, the repeat count) is kept in flat lists as result codes. A tick walks the nodes
+    in one dispatch loop over an explicit stack, instead of a closure per |, &, >>,
+    loop_ex and repeat_ex node each creating CondRes objects to compare with. Only the
+    leaves (path, dive_to, conditions ...) are still called, and their results mapped to
+    codes. The results, and the order the leaves are called and restarted in, are the
+    same as the source tree's.
+
+    The compiled behaviour starts from the initial state, so compile a tree before running
+    it. A behaviour used twice in the tree is one node, its state shared as in the source.
+
+    wake_tick is set when the last tick only checked timed conditions (TimedCondition)
+    and wasn't done: nothing changes until the first of them is met, at wake_tick.
+    """
+
+    def __init__(self, source: SquadBehaviour):
+        super().__init__(None, source._debug_path, source.op, source.operands)
+        self._kind: List[int] = []
+        self._first: List[Any] = []  # left child, condition or leaf function
+        self._second: List[Any] = []  # right child or loop body
+        self._times: List[int] = []
+        self._left: List[int] = []  # result of the left child so far
+        self._right: List[int] = []  # result of the right child so far
+        self._count: List[int] = []
+        self._timed: List[bool] = []  # the node's condition is a TimedCondition
+        self.wake_tick: Optional[int] = None
+        self._restart_ops: Dict[int, List[Op]] = {}
+        self._nodes: Dict[int, int] = {}  # id of a source behaviour -> node
+        self._sources: List[SquadBehaviour] = []  # keeps the ids valid
+        self._root = self._add(source)
+        self._restart_ops[self._root] = self._emit_restart(self._root, [])
+        self.f = self._run
+
+    def __len__(self) -> int:
+        return len(self._kind)
+
+    def _add(self, b: SquadBehaviour) -> int:
+        node = self._nodes.get(id(b))
+        if node is not None:
+            return node
+        kind = _KINDS.get(b.op)
+        if kind is None:
+            raise ValueError(f'Unknown SquadBehaviour op {b.op}')
+        first: Any = None
+        second: Any = None
+        times = 0
+        if kind == _LEAF:
+            first = b.f
+        elif kind == _CHECK:
+            first = b.operands[0]
+        elif kind == _LOOP or kind == _REPEAT:
+            first = b.operands[0]
+            second = self._add(b.operands[1])
+            if kind == _REPEAT:
+                times = b.operands[2]
+        else:
+            first = self._add(b.operands[0])
+            second = self._add(b.operands[1])
+        node = len(self._kind)
+        self._kind.append(kind)
+        self._first.append(first)
+        self._second.append(second)
+        self._times.append(times)
+        self._left.append(_NOT_MET)
+        self._right.append(_NOT_MET)
+        self._count.append(0)
+        self._timed.append(isinstance(first, TimedCondition))
+        self._nodes[id(b)] = node
+        self._sources.append(b)
+        if kind == _LOOP or kind == _REPEAT:
+            self._restart_ops[second] = self._emit_restart(second, [])
+        return node
+
+    def _emit_restart(self, node: int, ops: List[Op]) -> List[Op]:
+        # what calling the source node with restart=True does, in the same order
+        kind = self._kind[node]
+        if kind == _LEAF:
+            ops.append((_RESTART_LEAF, self._first[node]))
+        elif kind == _CHECK or kind == _LOOP or kind == _REPEAT:
+            # check_condition, the loop body isn't restarted and the repeat count kept
+            ops.append((_RESTART_COND, self._first[node]))
+        else:
+            ops.append((_RESET, node))
+            self._emit_restart(self._first[node], ops)
+            self._emit_restart(self._second[node], ops)
+        return ops
+
+    def _restart(self, node: int) -> None:
+        left = self._left
+        right = self._right
+        for code, arg in self._restart_ops[node]:
+            if code == _RESET:
+                left[arg] = _NOT_MET
+                right[arg] = _NOT_MET
+            elif code == _RESTART_COND:
+                arg.check(True, 0)
+            elif arg is not None:
+                arg(True, 0)
+
+    def _run(self, restart: bool, dt: float) -> Optional[CondRes]:
+        root = self._root
+        kind = self._kind
+        self.wake_tick = None
+        if restart is True:
+            if kind[root] == _LEAF:
+                f = self._first[root]
+                return None if f is None else f(True, 0)
+            self._restart(root)
+            return _RESULTS[_NOT_MET if kind[root] <= _THEN else _MET]
+        first = self._first
+        second = self._second
+        left = self._left
+        right = self._right
+        codes = _CODES
+        timed = self._timed
+        only_timed = True  # only timed conditions were checked
+        wake: Optional[int] = None  # the first tick one of them is met at
+        nodes = [root]
+        steps = [0]  # where to continue in the node, after its child returned
+        ret = _NOT_MET  # result of the last node run
+        while nodes:
+            node = nodes.pop()
+            step = steps.pop()
+            k = kind[node]
+            if k == _LEAF:
+                f = first[node]
+                res = None if f is None else f(False, dt)
+                ret = _NONE if res is None else codes[res.state]
+                only_timed = False
+            elif k == _CHECK:
+                cond = first[node]
+                ret = codes[cond.check(False, dt).state]
+                if not timed[node]:
+                    only_timed = False
+                elif cond.wake_tick is not None and (
+                    wake is None or cond.wake_tick < wake
+                ):
+                    wake = cond.wake_tick
+            elif k == _OR or k == _AND:
+                if step == 1:
+                    left[node] = ret
+                elif step == 2:
+                    right[node] = ret
+                if step == 0 and left[node] == _NOT_MET:
+                    nodes += (node, first[node])
+                    steps += (1, 0)
+                    continue
+                if step < 2 and right[node] == _NOT_MET:
+                    nodes += (node, second[node])
+                    steps += (2, 0)
+                    continue
+                lres = left[node]
+                rres = right[node]
+                if k == _OR:
+                    done = lres != _NOT_MET or rres != _NOT_MET
+                else:
+                    done = lres != _NOT_MET and rres != _NOT_MET
+                if not done:
+                    ret = _NOT_MET
+                elif lres == _ABORT or rres == _ABORT:
+                    ret = _ABORT
+                else:
+                    ret = _MET
+            elif k == _THEN:
+                if step == 1:
+                    left[node] = ret
+                    ret = _NOT_MET
+                elif left[node] == _NOT_MET:
+                    nodes += (node, first[node])
+                    steps += (1, 0)
+                elif left[node] == _ABORT:
+                    ret = _ABORT
+                else:
+                    # the right result is this node's result
+                    nodes.append(second[node])
+                    steps.append(0)
+            else:  # _LOOP, _REPEAT
+                if step == 0:
+                    cond = first[node]
+                    ret = codes[cond.check(False, dt).state]
+                    if not timed[node]:
+                        only_timed = False
+                    elif cond.wake_tick is not None and (
+                        wake is None or cond.wake_tick < wake
+                    ):
+                        wake = cond.wake_tick
+                    if ret == _NOT_MET:
+                        nodes += (node, second[node])
+                        steps += (1, 0)
+                    continue
+                if ret == _MET:
+                    if k == _REPEAT:
+                        self._count[node] += 1
+                        if self._count[node] == self._times[node]:
+                            continue
+                    self._restart(second[node])
+                if ret != _ABORT:
+                    ret = _NOT_MET
+        if only_timed and ret == _NOT_MET:
+            self.wake_tick = wake
+        return _RESULTS[ret]
+
+    def __repr__(self) -> str:
+        return f'CompiledSquadBehaviour({len(self)} nodes)'
+
+
+def compile_behaviour(behaviour: SquadBehaviour) -> CompiledSquadBehaviour:
+    """Flatten a SquadBehaviour tree (|, &, >>, loop_ex, repeat_ex) into a state machine"""
+    return CompiledSquadBehaviour(behaviour)
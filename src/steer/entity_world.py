@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import math
+import weakref
+from typing import Any
+from typing import List
+from typing import Optional
+from typing import TYPE_CHECKING
+
+import numpy as np
+import numpy.typing as npt
+
+from infra.vmath import BoolArray
+from infra.vmath import FloatArray
+from infra.vmath import get_angle_from_batch
+from steer.random_stream import stream_keys
+from steer.random_stream import uniform
+from steer.random_stream import uniform_one
+
+if TYPE_CHECKING:
+    from steer.movable_entity import MovableEntity
+
+IndexArray = npt.NDArray[np.intp]
+
+
+class EntityWorld:
+    """Structure of arrays storage for MovableEntity state.
+
+    Every MovableEntity owns one row in a world, the entity itself is only a view on
+    that row. Row state lives in contiguous numpy arrays so a whole world can be
+    integrated in a single vectorized pass (see update / integrate).
+
+    Every row also has a random stream (uniform / uniform_batch). Entities get their
+    streams from the world seed in creation order, so the numbers an entity draws don't
+    depend on the order the entities are updated in.
+
+    Each array also has a flat memoryview, <name>_view (row r of pos is pos_view[2 * r]
+    and pos_view[2 * r + 1]). Reading an element through it gives a Python float several
+    times faster than ndarray.item, the per entity code (MovableEntity) reads the rows
+    through the views.
+
+    The arrays are reallocated when the world grows, so never keep a reference to one of
+    them, or to a view, across an entity creation.
+    """
+
+    # name -> (shape of a row, dtype, initial value)
+    _fields: dict[str, tuple[tuple[int, ...], Any, Any]] = {
+        'pos': ((2,), np.float64, 0.0),
+        'prev_pos': ((2,), np.float64, 0.0),
+        'velocity': ((2,), np.float64, 0.0),
+        'force': ((2,), np.float64, 0.0),
+        'mass': ((), np.float64, 10.0),
+        'max_force': ((), np.float64, 30.0),
+        'max_speed': ((), np.float64, 80.0),
+        'speed_mul_target': ((), np.float64, 1.0),
+        'force_mul_target': ((), np.float64, 1.0),
+        'speed_mul': ((), np.float64, 1.0),
+        'force_mul': ((), np.float64, 1.0),
+        'speed_mul_steps': ((), np.float64, 0.0),
+        'velocity_decay': ((), np.float64, 0.0),
+        'rotation': ((), np.float64, 0.0),
+        'active': ((), np.bool_, False),
+        'wander_angle': ((), np.float64, 0.0),
+        'rng_key': ((), np.uint64, 0),
+        'rng_counter': ((), np.uint64, 0),  # numbers drawn from the stream
+    }
+
+    _default: Optional[EntityWorld] = None
+
+    def __init__(self, capacity: int = 64, seed: int = 0):
+        self.seed = seed
+        self._streams = 0  # random streams handed out
+        self._capacity = 0
+        self._size = 0  # rows [0, _size) were handed out at some point
+        self._free: List[int] = []
+        self._entities: List[Optional[weakref.ref[MovableEntity]]] = []
+        self.pos: FloatArray
+        self.prev_pos: FloatArray
+        self.velocity: FloatArray
+        self.force: FloatArray
+        self.mass: FloatArray
+        self.max_force: FloatArray
+        self.max_speed: FloatArray
+        self.speed_mul_target: FloatArray
+        self.force_mul_target: FloatArray
+        self.speed_mul: FloatArray
+        self.force_mul: FloatArray
+        self.speed_mul_steps: FloatArray
+        self.velocity_decay: FloatArray
+        self.rotation: FloatArray
+        self.active: BoolArray
+        self.wander_angle: FloatArray
+        self.rng_key: npt.NDArray[np.uint64]
+        self.rng_counter: npt.NDArray[np.uint64]
+        self.pos_view: memoryview
+        self.prev_pos_view: memoryview
+        self.velocity_view: memoryview
+        self.force_view: memoryview
+        self.mass_view: memoryview
+        self.max_force_view: memoryview
+        self.max_speed_view: memoryview
+        self.speed_mul_target_view: memoryview
+        self.force_mul_target_view: memoryview
+        self.speed_mul_view: memoryview
+        self.force_mul_view: memoryview
+        self.speed_mul_steps_view: memoryview
+        self.velocity_decay_view: memoryview
+        self.rotation_view: memoryview
+        self.active_view: memoryview
+        self.wander_angle_view: memoryview
+        self.rng_key_view: memoryview
+        self.rng_counter_view: memoryview
+        for name, (shape, dtype, _) in self._fields.items():
+            self._set_field(name, np.zeros((0,) + shape, dtype=dtype))
+        self._grow(max(1, capacity))
+
+    @staticmethod
+    def default() -> EntityWorld:
+        """The world used by entities created without an explicit one"""
+        if EntityWorld._default is None:
+            EntityWorld._default = EntityWorld()
+        return EntityWorld._default
+
+    def __len__(self) -> int:
+        return self._size - len(self._free)
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def size(self) -> int:
+        """Number of rows in use or freed, every row index is below it"""
+        return self._size
+
+    def _set_field(self, name: str, array: npt.NDArray[Any]) -> None:
+        setattr(self, name, array)
+        setattr(self, f'{name}_view', array.reshape(-1).data)
+
+    def _grow(self, capacity: int) -> None:
+        for name, (shape, dtype, init) in self._fields.items():
+            old = getattr(self, name)
+            new = np.full((capacity,) + shape, init, dtype=dtype)
+            new[: len(old)] = old
+            self._set_field(name, new)
+        self._capacity = capacity
+
+    def allocate(self, entity: MovableEntity) -> int:
+        if self._free:
+            row = self._free.pop()
+        else:
+            if self._size == self._capacity:
+                self._grow(self._capacity * 2)
+            row = self._size
+            self._size += 1
+            self._entities.append(None)
+        for name, (_, _, init) in self._fields.items():
+            getattr(self, name)[row] = init
+        self.rng_key[row] = stream_keys(self.seed, self._streams)[0]
+        self._streams += 1
+        self._entities[row] = weakref.ref(entity)
+        return row
+
+    def release(self, row: int) -> None:
+        self._entities[row] = None
+        self.active[row] = False
+        self._free.append(row)
+
+    def entity(self, row: int) -> MovableEntity | None:
+        ref = self._entities[row]
+        return None if ref is None else ref()
+
+    def seed_random(self, row: int, seed: int) -> None:
+        """Restart the random stream of a row from its own seed"""
+        self.rng_key[row] = stream_keys(seed, 0)[0]
+        self.rng_counter[row] = 0
+
+    def uniform(self, row: int) -> float:
+        """Next number of the random stream of a row, uniform in [0, 1).
+
+        A row only keeps its key and counter, the number is hashed from them when drawn.
+        """
+        n = self.rng_counter_view[row]
+        self.rng_counter_view[row] = n + 1
+        return float(uniform_one(self.rng_key_view[row], n))
+
+    def uniform_batch(self, rows: IndexArray) -> FloatArray:
+        """uniform for each of the (distinct) rows, same numbers as row by row"""
+        n = self.rng_counter[rows]
+        self.rng_counter[rows] = n + np.uint64(1)
+        return uniform(self.rng_key[rows], n)
+
+    def active_rows(self) -> IndexArray:
+        return np.flatnonzero(self.active[: self._size])
+
+    @staticmethod
+    def _rows_index(rows: IndexArray) -> IndexArray | slice:
+        # A contiguous run of rows (the common case - every row is active) is turned into a
+        # slice, numpy then works on views instead of gathering / scattering copies
+        n = len(rows)
+        if n > 0 and rows[-1] - rows[0] == n - 1:
+            return slice(int(rows[0]), int(rows[0]) + n)
+        return rows
+
+    def begin_step(self, rows: IndexArray) -> None:
+        """First part of the MovableEntity.update_steer_behaviour step, before the forces are evaluated"""
+        idx = self._rows_index(rows)
+        force_mul = self.force_mul[idx]
+        self.force_mul[idx] = (
+            force_mul
+            + (self.force_mul_target[idx] - force_mul) * self.speed_mul_steps[idx]
+        )
+        # force_mul_target needs to be reapplied by the force function
+        self.force_mul_target[idx] = 1.0
+
+    def integrate(self, dt: float, rows: IndexArray) -> None:
+        """Second part of the step, integrates self.force into velocity, position and rotation.
+
+        Same formulas as MovableEntity.update_steer_behaviour, applied to all rows at once.
+        """
+        idx = self._rows_index(rows)
+        force = self.force[idx]
+        limit = self.max_force[idx] * self.force_mul[idx]
+        ln = np.sqrt(force[:, 0] * force[:, 0] + force[:, 1] * force[:, 1])
+        over = ln > limit
+        force = force.copy() if isinstance(idx, slice) else force
+        force[over] = force[over] / ln[over, None] * limit[over, None]
+        force /= self.mass[idx, None]
+
+        speed_mul = self.speed_mul[idx]
+        speed_mul += (self.speed_mul_target[idx] - speed_mul) * self.speed_mul_steps[
+            idx
+        ]
+        self.speed_mul[idx] = speed_mul
+
+        velocity = self.velocity[idx] * (1 - self.velocity_decay[idx, None]) + force
+        limit = self.max_speed[idx] * speed_mul
+        ln = np.sqrt(velocity[:, 0] * velocity[:, 0] + velocity[:, 1] * velocity[:, 1])
+        over = ln > limit
+        velocity[over] = velocity[over] / ln[over, None] * limit[over, None]
+        self.velocity[idx] = velocity
+        # speed_mul_target needs to be reapplied by the force function
+        self.speed_mul_target[idx] = 1.0
+
+        pos = self.pos[idx]
+        self.prev_pos[idx] = pos
+        self.pos[idx] = pos + velocity * dt
+        angle, valid = get_angle_from_batch(velocity)
+        self.rotation[rows[valid]] = angle[valid] + math.pi / 2
+
+    def update(self, dt: float, rows: IndexArray | None = None) -> None:
+        """Batched update_steer_behaviour for every active entity with a steer force and a target.
+
+        Unlike calling update_steer_behaviour entity by entity, all the forces are evaluated
+        against the state at the start of the step before anything is integrated.
+        """
+        if rows is None:
+            rows = self.active_rows()
+        entities = []
+        steer_rows = []
+        for row in rows.tolist():
+            e = self.entity(row)
+            if e is not None and e.steer_force is not None and e.target is not None:
+                entities.append(e)
+                steer_rows.append(row)
+        if not steer_rows:
+            return
+        idx = np.array(steer_rows, dtype=np.intp)
+        self.begin_step(idx)
+        force = self.force
+        for row, e in zip(steer_rows, entities):
+            f = e.steer_force.f(e, e.target)
+            force[row, 0] = f.x
+            force[row, 1] = f.y
+        self.integrate(dt, idx)
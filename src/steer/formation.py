@@ -1,29 +1,94 @@
+from __future__ import annotations
+
+import abc
 import math
+from typing import Optional
+
+import numpy as np
+import numpy.typing as npt
 
+from infra.vmath import FloatArray
+from infra.vmath import Rotation2D
 from infra.vmath import Vector
 
 
 class Formation:
+    """Slot offsets of the members of a squad, in formation space (the leader facing down).
+
+    The slots are kept as a count x 2 array with the scale applied (slots), computed on
+    first use after count or scale change, so a lookup is only an array read.
+    """
+
     def __init__(self):
-        self.scale: float = 1.0
-        self.count: int = 0
+        self._scale: float = 1.0
+        self._count: int = 0
+        self._slots: Optional[FloatArray] = None
+        self.version: int = 0  # bumped whenever the slots change
+
+    @property
+    def scale(self) -> float:
+        return self._scale
+
+    @scale.setter
+    def scale(self, scale: float) -> None:
+        self._scale = scale
+        self._invalidate()
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @count.setter
+    def count(self, count: int) -> None:
+        self._count = count
+        self._invalidate()
+
+    def _invalidate(self) -> None:
+        self._slots = None
+        self.version += 1
+
+    def fit(self, count: int) -> None:
+        """Make room for count members. Fixed formations keep their count."""
 
     def _unscaled_entity_position(self, num):
         return Vector.zero()
 
+    def _unscaled_slots(self) -> FloatArray:
+        return np.array(
+            [
+                (v.x, v.y)
+                for v in map(self._unscaled_entity_position, range(self.count))
+            ],
+            dtype=np.float64,
+        ).reshape(self.count, 2)
+
+    def slots(self) -> FloatArray:
+        """The scaled offset of every slot, count x 2, read only"""
+        if self._slots is None:
+            slots = self._unscaled_slots() * self._scale
+            slots.setflags(write=False)
+            self._slots = slots
+        return self._slots
+
     def entity_position(self, num):
         if num >= self.count:
             raise IndexError
-        return self._unscaled_entity_position(num) * self.scale
+        slots = self.slots()
+        return Vector(slots.item(num, 0), slots.item(num, 1))
+
+    def entity_positions(self, indices: npt.ArrayLike) -> FloatArray:
+        """entity_position for an array of slot indices, N x 2"""
+        indices = np.asarray(indices, dtype=np.intp)
+        if len(indices) and (indices.min() < 0 or indices.max() >= self.count):
+            raise IndexError
+        return self.slots()[indices]
 
     @staticmethod
     def rotate(v: Vector, rotation: float) -> Vector:
         """Rotate a vector around 0,0 by degrees rotation"""
         # rotation = math.radians(rotation)
-        return Vector(
-            v.x * math.cos(rotation) - v.y * math.sin(rotation),
-            v.x * math.sin(rotation) + v.y * math.cos(rotation),
-        )
+        # When rotating many offsets by the same angle build a Rotation2D once instead
+        return Rotation2D(rotation).apply(v)
 
 
 class FormationDiamond(Formation):
@@ -70,13 +135,107 @@ class FormationArrowHead(Formation):
         return self._positions[num]
 
 
-class FormationColumn(Formation):
-    def __init__(self):
+class ProceduralFormation(Formation, abc.ABC):
+    """A formation generated for any number of members, spacing apart.
+
+    fit (called by the squad) sets count to the number of active members. When a slot
+    doesn't depend on the count (stable_slots) the slots are only ever extended, so
+    losing a member doesn't move the others.
+    """
+
+    stable_slots: bool = True
+
+    def __init__(self, count: int = 10, spacing: float = 30):
         Formation.__init__(self)
-        self.count: int = 10
-        self._positions = [Vector(0, -30 * i) for i in range(self.count)]
+        self._spacing = spacing
+        # _unscaled_slots of the current count and spacing, for single slot lookups
+        self._unscaled: Optional[FloatArray] = None
+        self.count = count
+
+    @property
+    def spacing(self) -> float:
+        return self._spacing
+
+    @spacing.setter
+    def spacing(self, spacing: float) -> None:
+        self._spacing = spacing
+        self._unscaled = None
+        self._invalidate()
+
+    def fit(self, count: int) -> None:
+        if count > self._count or (count < self._count and not self.stable_slots):
+            self.count = count
 
     def _unscaled_entity_position(self, num):
         if num >= self.count:
             raise IndexError
-        return self._positions[num]
+        slots = self._unscaled
+        if slots is None or len(slots) != self.count:
+            slots = self._unscaled = self._unscaled_slots()
+        return Vector(slots.item(num, 0), slots.item(num, 1))
+
+    @abc.abstractmethod
+    def _unscaled_slots(self) -> FloatArray:
+        """The slots of count members, before scaling, count x 2"""
+
+
+class FormationColumn(ProceduralFormation):
+    """Single file behind the leader"""
+
+    def _unscaled_slots(self) -> FloatArray:
+        i = np.arange(self.count)
+        return np.stack((np.zeros(self.count), -i * self.spacing), axis=1)
+
+
+class FormationGrid(ProceduralFormation):
+    """Rows of columns members (a square by default), centered behind the leader"""
+
+    def __init__(self, count: int = 10, spacing: float = 30, columns: int = 0):
+        self._columns = columns
+        self.stable_slots = columns > 0
+        ProceduralFormation.__init__(self, count, spacing)
+
+    def _unscaled_slots(self) -> FloatArray:
+        columns = self._columns or max(1, math.ceil(math.sqrt(self.count)))
+        i = np.arange(self.count)
+        row = i // columns
+        column = i % columns
+        return np.stack(
+            ((column - (columns - 1) / 2) * self.spacing, -row * self.spacing), axis=1
+        )
+
+
+class FormationWedge(ProceduralFormation):
+    """The leader at the tip, the others alternating left and right behind it"""
+
+    def _unscaled_slots(self) -> FloatArray:
+        i = np.arange(self.count)
+        row = (i + 1) // 2
+        side = np.where(i % 2 == 1, -1, 1)
+        return np.stack((side * row * self.spacing, -row * self.spacing), axis=1)
+
+
+class FormationEchelon(ProceduralFormation):
+    """A diagonal line behind the leader, to its right (or left)"""
+
+    def __init__(self, count: int = 10, spacing: float = 30, left: bool = False):
+        self._left = left
+        ProceduralFormation.__init__(self, count, spacing)
+
+    def _unscaled_slots(self) -> FloatArray:
+        i = np.arange(self.count)
+        side = -1 if self._left else 1
+        return np.stack((side * i * self.spacing, -i * self.spacing), axis=1)
+
+
+class FormationRing(ProceduralFormation):
+    """A circle through the leader with the members spacing apart along it"""
+
+    stable_slots = False
+
+    def _unscaled_slots(self) -> FloatArray:
+        n = self.count
+        # neighbours (a chord apart) spacing apart
+        radius = self.spacing / (2 * math.sin(math.pi / n)) if n > 1 else self.spacing
+        angle = np.arange(n) * (2 * math.pi / max(n, 1))
+        return np.stack((radius * np.sin(angle), radius * (np.cos(angle) - 1)), axis=1)
@@ -25,6 +25,9 @@ path_target_radius: float = 12 * GLOBAL_SCENE_MULTIPLY
 follow_slow_radius: float = 20 * GLOBAL_SCENE_MULTIPLY
 wander_radius: float = 20 * GLOBAL_SCENE_MULTIPLY
 separation_radius: float = 15 * GLOBAL_SCENE_MULTIPLY
+separation_skin: float = 6 * GLOBAL_SCENE_MULTIPLY
+flock_radius: float = 30 * GLOBAL_SCENE_MULTIPLY
+obstacle_margin: float = 10 * GLOBAL_SCENE_MULTIPLY
 line_size: float = 35 * GLOBAL_SCENE_MULTIPLY
 path_leader_seek_radius: float = 80 * GLOBAL_SCENE_MULTIPLY
 
@@ -34,12 +37,16 @@ target_reached_radius: float = 5 * GLOBAL_SCENE_MULTIPLY
 
 def change_global_scene_multiplier(multiplier: float):
     global GLOBAL_SCENE_MULTIPLY, ahead_check_radius, path_target_radius, follow_slow_radius, wander_radius
-    global separation_radius, target_reached_radius, line_size
+    global separation_radius, separation_skin, flock_radius, target_reached_radius
+    global line_size, obstacle_margin
     GLOBAL_SCENE_MULTIPLY = multiplier
     ahead_check_radius = 15 * GLOBAL_SCENE_MULTIPLY
     path_target_radius = 5 * GLOBAL_SCENE_MULTIPLY
     follow_slow_radius = 20 * GLOBAL_SCENE_MULTIPLY
     wander_radius = 20 * GLOBAL_SCENE_MULTIPLY
     separation_radius = 15 * GLOBAL_SCENE_MULTIPLY
+    separation_skin = 6 * GLOBAL_SCENE_MULTIPLY
+    flock_radius = 30 * GLOBAL_SCENE_MULTIPLY
+    obstacle_margin = 10 * GLOBAL_SCENE_MULTIPLY
     target_reached_radius = 5 * GLOBAL_SCENE_MULTIPLY
     line_size = 35 * GLOBAL_SCENE_MULTIPLY
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import math
+from typing import List
+from typing import Sequence
+from typing import Tuple
+
+from infra.vmath import Rect
+from infra.vmath import Vector
+
+
+class LodPolicy:
+    """Distance / viewport based level of detail for steering updates.
+
+    interval() returns how often (in ticks) an entity at a given position gets a full
+    steering evaluation: 1 is every tick, 4 is every 4th tick. Between evaluations the
+    entity keeps moving with MovableEntity.dead_reckon.
+
+    bands is a list of (max distance from focus, interval) sorted by distance, the first
+    band the entity is within wins, entities beyond the last band use its interval.
+    Entities outside of the viewport (when one is given) use at least offscreen_interval.
+    """
+
+    def __init__(
+        self,
+        focus: Vector | None = None,
+        bands: Sequence[Tuple[float, int]] = ((400, 1), (800, 2), (math.inf, 4)),
+        viewport: Rect | None = None,
+        offscreen_interval: int = 8,
+    ):
+        if not bands:
+            raise ValueError('LodPolicy needs at least one band')
+        self.focus: Vector = Vector() if focus is None else focus
+        self.viewport = viewport
+        self.offscreen_interval = offscreen_interval
+        self._bands: List[Tuple[float, int]] = []
+        for distance, interval in sorted(bands):
+            if interval < 1:
+                raise ValueError('LOD interval has to be >= 1')
+            self._bands.append((distance * distance, interval))
+
+    def _in_viewport(self, pos: Vector) -> bool:
+        v = self.viewport
+        assert v is not None
+        return bool(v.x <= pos.x <= v.x + v.width and v.y <= pos.y <= v.y + v.height)
+
+    def interval(self, pos: Vector) -> int:
+        dx = pos.x - self.focus.x
+        dy = pos.y - self.focus.y
+        sqr_distance = dx * dx + dy * dy
+        interval = self._bands[-1][1]
+        for sqr_band, band_interval in self._bands:
+            if sqr_distance <= sqr_band:
+                interval = band_interval
+                break
+        if self.viewport is not None and not self._in_viewport(pos):
+            interval = max(interval, self.offscreen_interval)
+        return interval
+
+
+class LodStats:
+    """Steering evaluation counters of a squad updated with a LodPolicy"""
+
+    def __init__(self) -> None:
+        self.ticks: int = 0
+        self.evaluated: int = 0  # full steering evaluations in the last tick
+        self.saved: int = 0  # evaluations replaced by dead reckoning in the last tick
+        self.total_evaluated: int = 0
+        self.total_saved: int = 0
+
+    def start_tick(self) -> None:
+        self.ticks += 1
+        self.evaluated = 0
+        self.saved = 0
+
+    def count(self, evaluated: bool) -> None:
+        if evaluated:
+            self.evaluated += 1
+            self.total_evaluated += 1
+        else:
+            self.saved += 1
+            self.total_saved += 1
+
+    @property
+    def saved_ratio(self) -> float:
+        total = self.total_evaluated + self.total_saved
+        return 0.0 if total == 0 else self.total_saved / total
+
+    def __repr__(self) -> str:
+        return (
+            f"LodStats(ticks={self.ticks}, evaluated={self.evaluated}, saved={self.saved}, "
+            f"saved_ratio={self.saved_ratio:.2f})"
+        )
+
+
+class ImpostorPolicy:
+    """When a squad is far enough to be simulated as a single body (Squad.aggregate).
+
+    A squad collapses once its leader is farther than far from focus, and expands back to
+    full simulation when the leader comes within near. The gap between the two keeps a
+    squad on the border from switching every tick.
+    """
+
+    def __init__(
+        self, focus: Vector | None = None, near: float = 800, far: float = 1000
+    ):
+        if near > far:
+            raise ValueError('ImpostorPolicy near has to be <= far')
+        self.focus: Vector = Vector() if focus is None else focus
+        self.near = near
+        self.far = far
+
+    def aggregate(self, pos: Vector, aggregate: bool) -> bool:
+        """Whether a squad led from pos, now aggregate or not, should be aggregate"""
+        dx = pos.x - self.focus.x
+        dy = pos.y - self.focus.y
+        sqr_distance = dx * dx + dy * dy
+        if aggregate:
+            return bool(sqr_distance > self.near * self.near)
+        return bool(sqr_distance > self.far * self.far)
+
+
+class ImpostorStats:
+    """Counters of a squad updated with an ImpostorPolicy"""
+
+    def __init__(self) -> None:
+        self.ticks: int = 0
+        self.aggregate_ticks: int = 0
+        self.placed: int = (
+            0  # members placed at their slots instead of steered, last tick
+        )
+        self.total_placed: int = 0
+        self.collapses: int = 0
+        self.expansions: int = 0
+
+    def start_tick(self) -> None:
+        self.ticks += 1
+        self.placed = 0
+
+    def switched(self, aggregate: bool) -> None:
+        if aggregate:
+            self.collapses += 1
+        else:
+            self.expansions += 1
+
+    def count(self, placed: int) -> None:
+        self.aggregate_ticks += 1
+        self.placed = placed
+        self.total_placed += placed
+
+    def __repr__(self) -> str:
+        return (
+            f"ImpostorStats(ticks={self.ticks}, aggregate_ticks={self.aggregate_ticks}, "
+            f"total_placed={self.total_placed}, collapses={self.collapses}, "
+            f"expansions={self.expansions})"
+        )
@@ -4,114 +4,295 @@ import abc
 import math
 from itertools import count
 from typing import Any
+from typing import cast
 
 from infra.vmath import get_angle_from
+from infra.vmath import Rotation2D
 from infra.vmath import Vector
+from steer.entity_world import EntityWorld
 from steer.globals import speed_mul_target_steps
 from steer.globals import velocity_decay_max
 
 # from infra.vmath import sign
 
+_ORIGIN = Vector.zero()  # read only
+
 
 class Targetable(abc.ABC):
+    # pos, velocity and prev_pos are stored by the subclasses, slots in a Waypoint and
+    # the entity world's row in a MovableEntity
+    __slots__ = ('_name',)
     id = count(0)
+    pos: Vector
+    velocity: Vector
+    prev_pos: Vector
 
-    def __init__(self, v: Vector = Vector()):
-        self.name = f'e{next(Targetable.id)}'
-        self.pos: Vector = v
-        self.velocity: Vector = Vector()
-        self.prev_pos: Vector = v
+    def __init__(self) -> None:
+        self._name: str | None = None
+
+    @property
+    def name(self) -> str:
+        # Created on first use, most targets (waypoints) never need one
+        if self._name is None:
+            self._name = f'e{next(Targetable.id)}'
+        return self._name
+
+    @name.setter
+    def name(self, name: str) -> None:
+        self._name = name
 
 
 class Waypoint(Targetable):
+    __slots__ = ('pos', 'velocity', 'prev_pos')
+
+    def __init__(self, v: Vector = Vector()):
+        Targetable.__init__(self)
+        self.pos = v
+        self.velocity = Vector()
+        self.prev_pos = v
+
     @staticmethod
     def NAWaypoint():  # noqa: N802
         return Waypoint(Vector(0, 0))
 
+    def reset(self, pos: Vector, velocity: Vector | None = None) -> Waypoint:
+        """Re-target this waypoint, lets a steering force keep reusing a single instance
+        instead of allocating a throwaway waypoint per call"""
+        self.pos = pos
+        self.prev_pos = pos
+        self.velocity = _ORIGIN if velocity is None else velocity
+        return self
+
+
+def _row_vector(name: str) -> Any:
+    view = f'{name}_view'
+
+    def getter(self: MovableEntity) -> Vector:
+        a = getattr(self._world, view)
+        i = self._row * 2
+        return Vector(a[i], a[i + 1])
+
+    def setter(self: MovableEntity, v: Vector) -> None:
+        a = getattr(self._world, view)
+        i = self._row * 2
+        a[i] = v.x
+        a[i + 1] = v.y
+
+    return property(getter, setter)
+
+
+def _row_scalar(name: str) -> Any:
+    view = f'{name}_view'
+
+    def getter(self: MovableEntity) -> Any:
+        return getattr(self._world, view)[self._row]
+
+    def setter(self: MovableEntity, value: Any) -> None:
+        getattr(self._world, view)[self._row] = value
+
+    return property(getter, setter)
+
 
 class MovableEntity(Targetable):
-    def __init__(self, v: Vector = Vector()):
-        Targetable.__init__(self, v)
+    """A steerable entity. Its kinematic state lives in a row of an EntityWorld.
+
+    The vector attributes (pos, prev_pos, velocity) return a copy of the row, so change
+    them by assignment (entity.pos = ...), mutating the returned Vector has no effect.
+    """
+
+    __slots__ = (
+        '_world',
+        '_row',
+        'steer_force',
+        'target',
+        '_force',
+        '_formation_rotation',
+        '_rosters',
+        '__weakref__',
+    )
+
+    pos = _row_vector('pos')
+    prev_pos = _row_vector('prev_pos')
+    velocity = _row_vector('velocity')
+    rotation = _row_scalar('rotation')
+    max_speed = _row_scalar('max_speed')
+    speed_mul_target = _row_scalar(
+        'speed_mul_target'
+    )  # to be used when following / seek
+    force_mul_target = _row_scalar(
+        'force_mul_target'
+    )  # to be used when following / seek
+    _speed_mul = _row_scalar('speed_mul')
+    _force_mul = _row_scalar('force_mul')
+    _speed_mul_steps = _row_scalar('speed_mul_steps')
+    _velocity_decay = _row_scalar('velocity_decay')
+    wander_angle = _row_scalar('wander_angle')
+
+    def __init__(self, v: Vector = Vector(), world: EntityWorld | None = None):
+        self._world: EntityWorld = EntityWorld.default() if world is None else world
+        self._row: int = self._world.allocate(self)
+        # the squad rosters (steer.roster) this entity is a member of, as weak references
+        self._rosters: tuple[Any, ...] = ()
+        Targetable.__init__(self)
+        self.pos = v
+        self.velocity = Vector()
+        self.prev_pos = v
         # print(self.name)
         self.is_active = True
-        self._max_force: float = 30.0
-        self.max_speed: float = 80.0
-        self.speed_mul_target: float = 1.0  # to be used when following / seek
-        self.force_mul_target: float = 1.0  # to be used when following / seek
-        self.rotation: float = 0.0
-        self._mass: float = 10.0
         self.steer_force: Any = None
         self.target: None | Targetable = None
 
-        self._speed_mul: float = 1.0
-        self._speed_mul_steps: float = speed_mul_target_steps
-        self._force_mul: float = 1.0
+        self._speed_mul_steps = speed_mul_target_steps
+        # scratch vector reused by update_steer_behaviour
+        self._force: Vector = Vector()
+        self._formation_rotation: Rotation2D | None = None
         self._calculate_velocity_decay()
 
+    def __del__(self) -> None:
+        try:
+            world = self._world
+            row = self._row
+        except AttributeError:  # __init__ didn't get to allocate a row
+            return
+        world.release(row)
+
     def __repr__(self) -> str:
         return f"MovableEntity({self.pos})"
 
+    @property
+    def is_active(self) -> bool:
+        return cast(bool, self._world.active_view[self._row])
+
+    @is_active.setter
+    def is_active(self, active: bool) -> None:
+        active_now = self._world.active.item(self._row)
+        self._world.active[self._row] = active
+        active = self._world.active.item(self._row)
+        if active != active_now:
+            for roster in self._rosters:
+                roster = roster()
+                if roster is not None:
+                    roster.activity_changed(self, active)
+
+    @property
+    def world(self) -> EntityWorld:
+        return self._world
+
+    @property
+    def row(self) -> int:
+        return self._row
+
+    def seed_random(self, seed: int) -> None:
+        self._world.seed_random(self._row, seed)
+
+    def random(self) -> float:
+        """Next number of this entity's own random stream, uniform in [0, 1)"""
+        return float(self._world.uniform(self._row))
+
     def _calculate_velocity_decay(self):
         max_velocity_per_update: float = self.max_force / self.mass
         self._velocity_decay = min(
             velocity_decay_max, (max_velocity_per_update / 2) / self.max_speed
         )
 
+    @property
+    def force_mul(self) -> float:
+        """Multiplier of max_force, eased towards force_mul_target on every update"""
+        return cast(float, self._world.force_mul_view[self._row])
+
     @property
     def max_force(self) -> float:
-        return self._max_force
+        return cast(float, self._world.max_force_view[self._row])
 
     @max_force.setter
     def max_force(self, mf: float) -> None:
-        self._max_force = min(mf, self.max_speed * self.mass)
+        self._world.max_force[self._row] = min(mf, self.max_speed * self.mass)
         self._calculate_velocity_decay()
 
     @property
     def mass(self) -> float:
-        return self._mass
+        return cast(float, self._world.mass_view[self._row])
 
     @mass.setter
     def mass(self, m: float) -> None:
-        self._mass = max(m, self.max_force / self.max_speed)
+        self._world.mass[self._row] = max(m, self.max_force / self.max_speed)
         self._calculate_velocity_decay()
 
+    def formation_rotation(self) -> Rotation2D:
+        """Rotation from formation space (facing down) to the current heading.
+
+        Cached, so all the followers of this entity share a single cos/sin per heading change.
+        """
+        rot = self.rotation - math.pi
+        if self._formation_rotation is None or self._formation_rotation.angle != rot:
+            self._formation_rotation = Rotation2D(rot)
+        return self._formation_rotation
+
     def shift(self, shift_by: Vector) -> Waypoint:
         return Waypoint(self.pos + shift_by)
 
     def update_steer_behaviour(self, dt: float) -> MovableEntity:
+        # Per entity version of EntityWorld.begin_step + integrate, keep both in sync
         if self.steer_force is None or self.target is None:
             return self
 
-        self._force_mul += (
-            self.force_mul_target - self._force_mul
-        ) * self._speed_mul_steps
-        self.force_mul_target = (
-            1.0  # force_mul_target needs to be reapplied by the force function
+        w = self._world
+        r = self._row
+        force_mul = w.force_mul_view[r]
+        w.force_mul_view[r] = (
+            force_mul
+            + (w.force_mul_target_view[r] - force_mul) * w.speed_mul_steps_view[r]
         )
+        # force_mul_target needs to be reapplied by the force function
+        w.force_mul_target_view[r] = 1.0
 
-        force = (
-            self.steer_force.f(self, self.target).truncate(
-                self.max_force * self._force_mul
-            )
-            / self.mass
-        )
+        force = self._force
+        steer = self.steer_force.f(self, self.target)
+        force.set(steer.x, steer.y).truncate_(
+            w.max_force_view[r] * w.force_mul_view[r]
+        ).idiv(w.mass_view[r])
 
-        self._speed_mul += (
-            self.speed_mul_target - self._speed_mul
-        ) * self._speed_mul_steps
+        speed_mul = w.speed_mul_view[r]
+        speed_mul += (w.speed_mul_target_view[r] - speed_mul) * w.speed_mul_steps_view[
+            r
+        ]
+        w.speed_mul_view[r] = speed_mul
 
         # print(self.name, self.speed_mul_target, self._speed_mul)
 
-        self.velocity = (self.velocity * (1 - self._velocity_decay) + force).truncate(
-            self.max_speed * self._speed_mul
-        )
-        self.speed_mul_target = (
-            1.0  # speed_mul_target needs to be reapplied by the force function
+        # speed_mul_target needs to be reapplied by the force function
+        w.speed_mul_target_view[r] = 1.0
+        self._integrate(speed_mul, dt)
+        return self
+
+    def dead_reckon(self, dt: float) -> MovableEntity:
+        """Move without evaluating the steer force - the force computed by the last
+        update_steer_behaviour is applied again (used for reduced rate level of detail)"""
+        if self.steer_force is None or self.target is None:
+            return self
+        self._integrate(self._world.speed_mul_view[self._row], dt)
+        return self
+
+    def _integrate(self, speed_mul: float, dt: float) -> None:
+        w = self._world
+        r = self._row
+        i = r * 2
+        velocity_view = w.velocity_view
+        velocity = Vector(velocity_view[i], velocity_view[i + 1])
+        velocity.imul(1 - w.velocity_decay_view[r]).iadd(self._force).truncate_(
+            w.max_speed_view[r] * speed_mul
         )
+        velocity_view[i] = velocity.x
+        velocity_view[i + 1] = velocity.y
 
-        self.prev_pos = self.pos
-        self.pos = self.pos + (self.velocity * dt)
-        angle = get_angle_from(self.velocity, Vector.zero())
+        pos = w.pos_view
+        prev_pos = w.prev_pos_view
+        x = pos[i]
+        y = pos[i + 1]
+        prev_pos[i] = x
+        prev_pos[i + 1] = y
+        pos[i] = x + velocity.x * dt
+        pos[i + 1] = y + velocity.y * dt
+        angle = get_angle_from(velocity, _ORIGIN)
         if angle is not None:
-            self.rotation = angle + math.pi / 2
-        return self
+            w.rotation_view[r] = angle + math.pi / 2
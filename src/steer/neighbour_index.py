@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import math
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from infra.vmath import Vector
+from steer.entity_world import EntityWorld
+from steer.globals import separation_radius
+from steer.movable_entity import MovableEntity
+
+if TYPE_CHECKING:
+    from steer.squad import Squad
+
+
+class NeighbourFilter:
+    all = 'all'
+    same_squad = 'same squad'
+    other_squads = 'other squads'
+
+
+class NeighbourIndex:
+    """World wide spatial index over every active entity of an EntityWorld.
+
+    rebuild() snapshots the positions of all active rows once per tick (one vectorized
+    bucket sort into a uniform grid), every squad and steering force then queries the
+    same snapshot - positions are the ones at the time of the rebuild.
+
+    Squads are registered to get a group id, queries can be restricted to the members of
+    one squad or to everyone else. Query results are written into a list owned by the
+    caller (cleared first), so a force keeps reusing one list instead of allocating one
+    per query.
+    """
+
+    no_group = -1  # entities that are not in a registered squad
+
+    def __init__(
+        self, world: EntityWorld | None = None, cell_size: float = separation_radius
+    ):
+        if cell_size <= 0:
+            raise ValueError('cell_size must be > 0')
+        self.world = EntityWorld.default() if world is None else world
+        self.cell_size = cell_size
+        self.rebuilds: int = 0
+        self._squads: List[Squad] = []
+        self._groups: Dict[Squad, int] = {}
+        # snapshot, in cell order
+        self._x: List[float] = []
+        self._y: List[float] = []
+        self._group: List[int] = []
+        self._entities: List[Optional[MovableEntity]] = []
+        self._cells: Dict[Tuple[int, int], Tuple[int, int]] = {}  # cell -> [start, end)
+        self._bounds: Tuple[int, int, int, int] = (0, 0, -1, -1)
+        self._scratch: List[Tuple[float, int]] = []
+
+    def register(self, squad: Squad) -> int:
+        """Add a squad, returns its group id"""
+        group = self._groups.get(squad)
+        if group is None:
+            group = len(self._squads)
+            self._squads.append(squad)
+            self._groups[squad] = group
+        return group
+
+    def group_of(self, squad: Squad) -> int:
+        return self._groups.get(squad, NeighbourIndex.no_group)
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def rebuild(self) -> None:
+        world = self.world
+        rows = world.active_rows()
+        groups = np.full(world.size, NeighbourIndex.no_group, dtype=np.int64)
+        for squad, group in self._groups.items():
+            members = [e.row for e in squad.active_iter() if e.world is world]
+            groups[members] = group
+
+        pos = world.pos[rows]
+        cells = np.floor(pos / self.cell_size).astype(np.int64)
+        order = np.lexsort((cells[:, 1], cells[:, 0]))
+        rows = rows[order]
+        cells = cells[order]
+        self._x = pos[order, 0].tolist()
+        self._y = pos[order, 1].tolist()
+        self._group = groups[rows].tolist()
+        self._entities = [world.entity(row) for row in rows.tolist()]
+
+        self._cells.clear()
+        if len(rows):
+            change = np.flatnonzero(np.any(cells[1:] != cells[:-1], axis=1)) + 1
+            starts = np.concatenate((np.asarray([0], dtype=np.intp), change)).tolist()
+            ends = starts[1:] + [len(rows)]
+            for (cx, cy), start, end in zip(cells[starts].tolist(), starts, ends):
+                self._cells[(cx, cy)] = (start, end)
+            low = cells.min(axis=0).tolist()
+            high = cells.max(axis=0).tolist()
+            self._bounds = (low[0], low[1], high[0], high[1])
+        else:
+            self._bounds = (0, 0, -1, -1)
+        self.rebuilds += 1
+
+    def _accepts(self, i: int, group: int, neighbour_filter: str) -> bool:
+        if neighbour_filter == NeighbourFilter.all:
+            return True
+        if neighbour_filter == NeighbourFilter.same_squad:
+            return self._group[i] == group
+        return self._group[i] != group
+
+    def within(
+        self,
+        pos: Vector,
+        radius: float,
+        out: List[MovableEntity],
+        group: int = no_group,
+        neighbour_filter: str = NeighbourFilter.all,
+        exclude: MovableEntity | None = None,
+        xs: List[float] | None = None,
+        ys: List[float] | None = None,
+    ) -> List[MovableEntity]:
+        """Fill out with the entities closer than radius to pos.
+
+        The cells around pos are scanned by x, then y - the order the snapshot is sorted
+        in, so the results come in snapshot order. xs and ys, if given, are filled with
+        the coordinates of the results as of the rebuild (floats, no Vector per hit).
+        """
+        out.clear()
+        if xs is not None and ys is not None:
+            xs.clear()
+            ys.clear()
+        else:
+            xs = ys = None
+        sqr_radius = radius * radius
+        px = pos.x
+        py = pos.y
+        cx = math.floor(px / self.cell_size)
+        cy = math.floor(py / self.cell_size)
+        span = math.ceil(radius / self.cell_size)
+        snapshot_x = self._x
+        snapshot_y = self._y
+        entities = self._entities
+        cells = self._cells
+        for x in range(cx - span, cx + span + 1):
+            for y in range(cy - span, cy + span + 1):
+                bucket = cells.get((x, y))
+                if bucket is None:
+                    continue
+                for i in range(bucket[0], bucket[1]):
+                    dx = snapshot_x[i] - px
+                    dy = snapshot_y[i] - py
+                    if dx * dx + dy * dy < sqr_radius:
+                        e = entities[i]
+                        if (
+                            e is not None
+                            and e is not exclude
+                            and self._accepts(i, group, neighbour_filter)
+                        ):
+                            out.append(e)
+                            if xs is not None and ys is not None:
+                                xs.append(snapshot_x[i])
+                                ys.append(snapshot_y[i])
+        return out
+
+    def nearest(
+        self,
+        pos: Vector,
+        k: int,
+        out: List[MovableEntity],
+        group: int = no_group,
+        neighbour_filter: str = NeighbourFilter.all,
+        exclude: MovableEntity | None = None,
+    ) -> List[MovableEntity]:
+        """Fill out with the (up to) k entities nearest to pos, nearest first.
+
+        Searches rings of cells around pos, and stops once the k-th candidate is closer
+        than any entity of the next ring could be.
+        """
+        out.clear()
+        if k <= 0 or not self._entities:
+            return out
+        candidates = self._scratch
+        candidates.clear()
+        px = pos.x
+        py = pos.y
+        cx = math.floor(px / self.cell_size)
+        cy = math.floor(py / self.cell_size)
+        min_x, min_y, max_x, max_y = self._bounds
+        max_ring = max(cx - min_x, max_x - cx, cy - min_y, max_y - cy, 0)
+        xs = self._x
+        ys = self._y
+        entities = self._entities
+        cells = self._cells
+        for ring in range(max_ring + 1):
+            for x in range(cx - ring, cx + ring + 1):
+                # every cell of the first and last column of the ring, only the top and
+                # bottom cells of the columns in between
+                step = 1 if x in (cx - ring, cx + ring) else max(1, 2 * ring)
+                for y in range(cy - ring, cy + ring + 1, step):
+                    bucket = cells.get((x, y))
+                    if bucket is None:
+                        continue
+                    for i in range(bucket[0], bucket[1]):
+                        e = entities[i]
+                        if (
+                            e is None
+                            or e is exclude
+                            or not self._accepts(i, group, neighbour_filter)
+                        ):
+                            continue
+                        dx = xs[i] - px
+                        dy = ys[i] - py
+                        candidates.append((dx * dx + dy * dy, i))
+            if len(candidates) >= k:
+                candidates.sort()
+                # anything outside of this ring is at least ring * cell_size away
+                reach = ring * self.cell_size
+                if candidates[k - 1][0] <= reach * reach:
+                    break
+        candidates.sort()
+        for j in range(min(k, len(candidates))):
+            out.append(entities[candidates[j][1]])  # type: ignore[arg-type]
+        candidates.clear()
+        return out
@@ -0,0 +1,397 @@
+from __future__ import annotations
+
+import abc
+import math
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+
+from infra.vmath import as_points
+from infra.vmath import FloatArray
+from infra.vmath import PointsLike
+from infra.vmath import Rect
+from infra.vmath import Vector
+from steer.entity_world import IndexArray
+
+Bounds = Tuple[float, float, float, float]  # min x, min y, max x, max y
+
+
+def _segment_box(
+    x1: float,
+    y1: float,
+    dx: float,
+    dy: float,
+    bounds: Bounds,
+    margin: float,
+) -> Optional[float]:
+    """Where (0..1) the segment p1 + (dx, dy) * t enters the box grown by margin"""
+    t_enter = 0.0
+    t_exit = 1.0
+    for p, d, lo, hi in (
+        (x1, dx, bounds[0] - margin, bounds[2] + margin),
+        (y1, dy, bounds[1] - margin, bounds[3] + margin),
+    ):
+        if d == 0:
+            if p < lo or p > hi:
+                return None
+            continue
+        t1 = (lo - p) / d
+        t2 = (hi - p) / d
+        if t1 > t2:
+            t1, t2 = t2, t1
+        if t1 > t_enter:
+            t_enter = t1
+        if t2 < t_exit:
+            t_exit = t2
+        if t_enter > t_exit:
+            return None
+    return t_enter
+
+
+def _segment_box_batch(
+    x1: FloatArray,
+    y1: FloatArray,
+    dx: FloatArray,
+    dy: FloatArray,
+    lo_x: float | FloatArray,
+    lo_y: float | FloatArray,
+    hi_x: float | FloatArray,
+    hi_y: float | FloatArray,
+) -> FloatArray:
+    """_segment_box for arrays of segments, inf where there is no hit"""
+    t_enter = np.zeros(len(x1))
+    t_exit = np.ones(len(x1))
+    for p, d, lo, hi in ((x1, dx, lo_x, hi_x), (y1, dy, lo_y, hi_y)):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t1 = (lo - p) / d
+            t2 = (hi - p) / d
+        near = np.minimum(t1, t2)
+        far = np.maximum(t1, t2)
+        parallel = d == 0
+        inside = (p >= lo) & (p <= hi)
+        near = np.where(parallel, np.where(inside, -np.inf, np.inf), near)
+        far = np.where(parallel, np.where(inside, np.inf, -np.inf), far)
+        t_enter = np.maximum(t_enter, near)
+        t_exit = np.minimum(t_exit, far)
+    return np.where(t_enter <= t_exit, t_enter, np.inf)
+
+
+class Obstacle(abc.ABC):
+    """Static obstacle, see ObstacleBVH"""
+
+    __slots__ = ()
+
+    @property
+    @abc.abstractmethod
+    def bounds(self) -> Bounds:
+        ...
+
+    @abc.abstractmethod
+    def intersect_segment(
+        self, x1: float, y1: float, dx: float, dy: float, margin: float
+    ) -> Optional[float]:
+        """Where (0..1) the segment p1 + (dx, dy) * t gets within margin of the obstacle"""
+
+    @abc.abstractmethod
+    def away(self, point: Vector) -> Vector:
+        """Direction (not normalized) pointing from the obstacle to point"""
+
+
+class CircleObstacle(Obstacle):
+    __slots__ = ('center', 'radius')
+
+    def __init__(self, center: Vector, radius: float):
+        self.center = center
+        self.radius = radius
+
+    @property
+    def bounds(self) -> Bounds:
+        c = self.center
+        r = self.radius
+        return (c.x - r, c.y - r, c.x + r, c.y + r)
+
+    def intersect_segment(
+        self, x1: float, y1: float, dx: float, dy: float, margin: float
+    ) -> Optional[float]:
+        fx = x1 - self.center.x
+        fy = y1 - self.center.y
+        radius = self.radius + margin
+        c = fx * fx + fy * fy - radius * radius
+        if c <= 0:
+            return 0.0  # already within margin
+        a = dx * dx + dy * dy
+        if a == 0:
+            return None
+        b = 2 * (fx * dx + fy * dy)
+        discriminant = b * b - 4 * a * c
+        if discriminant < 0:
+            return None
+        t = (-b - math.sqrt(discriminant)) / (2 * a)
+        return t if 0 <= t <= 1 else None
+
+    def away(self, point: Vector) -> Vector:
+        return point - self.center
+
+    def __repr__(self) -> str:
+        return f'CircleObstacle({self.center}, {self.radius})'
+
+
+class RectObstacle(Obstacle):
+    __slots__ = ('rect',)
+
+    def __init__(self, rect: Rect):
+        self.rect = rect
+
+    @property
+    def bounds(self) -> Bounds:
+        r = self.rect
+        return (r.x, r.y, r.x + r.width, r.y + r.height)
+
+    def intersect_segment(
+        self, x1: float, y1: float, dx: float, dy: float, margin: float
+    ) -> Optional[float]:
+        # the rect grown by margin has square corners, a bit conservative at the corners
+        return _segment_box(x1, y1, dx, dy, self.bounds, margin)
+
+    def away(self, point: Vector) -> Vector:
+        min_x, min_y, max_x, max_y = self.bounds
+        nearest = Vector(
+            min(max(point.x, min_x), max_x), min(max(point.y, min_y), max_y)
+        )
+        if nearest == point:  # inside, away from the center
+            nearest = Vector((min_x + max_x) / 2, (min_y + max_y) / 2)
+        return point - nearest
+
+    def __repr__(self) -> str:
+        r = self.rect
+        return f'RectObstacle({r.x}, {r.y}, {r.width}, {r.height})'
+
+
+class ObstacleBVH:
+    """Bounding volume hierarchy over static obstacles, built once (at level load).
+
+    A binary tree of axis aligned boxes, split at the median of the obstacle centers
+    along the longest axis, with up to leaf_size obstacles per leaf. A segment query
+    only descends into the boxes the segment crosses, O(log n) for a short segment.
+    segment_query_batch runs the traversal for a whole array of segments, a level of
+    the tree at a time.
+    """
+
+    def __init__(self, obstacles: Sequence[Obstacle], leaf_size: int = 4):
+        if leaf_size < 1:
+            raise ValueError('leaf_size must be >= 1')
+        self.obstacles: List[Obstacle] = list(obstacles)
+        self.leaf_size = leaf_size
+        # nodes, index 0 is the root. Inner nodes have two children, leaves have items
+        self._bounds: List[Bounds] = []
+        self._children: List[Tuple[int, int]] = []  # (-1, -1) for leaves
+        self._items: List[List[int]] = []
+        self._node_arrays_cache: Optional[
+            Tuple[FloatArray, IndexArray, IndexArray]
+        ] = None
+
+        n = len(self.obstacles)
+        bounds = np.array([o.bounds for o in self.obstacles], dtype=np.float64)
+        self._obstacle_bounds = bounds.reshape(n, 4)
+        # per obstacle parameters of the vectorized tests
+        self._is_circle = np.array(
+            [isinstance(o, CircleObstacle) for o in self.obstacles], dtype=np.bool_
+        )
+        self._center = (self._obstacle_bounds[:, :2] + self._obstacle_bounds[:, 2:]) / 2
+        self._radius = (self._obstacle_bounds[:, 2] - self._obstacle_bounds[:, 0]) / 2
+        if n:
+            self._build(np.arange(n))
+
+    def __len__(self) -> int:
+        return len(self.obstacles)
+
+    @property
+    def depth(self) -> int:
+        def depth(node: int) -> int:
+            left, right = self._children[node]
+            return 1 if left < 0 else 1 + max(depth(left), depth(right))
+
+        return depth(0) if self._bounds else 0
+
+    def _build(self, items: IndexArray) -> int:
+        node = len(self._bounds)
+        b = self._obstacle_bounds[items]
+        self._bounds.append(
+            (
+                float(b[:, 0].min()),
+                float(b[:, 1].min()),
+                float(b[:, 2].max()),
+                float(b[:, 3].max()),
+            )
+        )
+        self._children.append((-1, -1))
+        self._items.append([])
+        if len(items) <= self.leaf_size:
+            self._items[node] = items.tolist()
+            return node
+        centers = self._center[items]
+        axis = int(np.argmax(centers.max(axis=0) - centers.min(axis=0)))
+        half = len(items) // 2
+        order = np.argpartition(centers[:, axis], half)
+        left = self._build(items[order[:half]])
+        right = self._build(items[order[half:]])
+        self._children[node] = (left, right)
+        return node
+
+    def segment_query(
+        self, p1: Vector, p2: Vector, margin: float = 0.0
+    ) -> Optional[Tuple[float, Obstacle]]:
+        """The first obstacle the segment p1 -> p2 gets within margin of, with where (0..1)"""
+        if not self._bounds:
+            return None
+        x1 = p1.x
+        y1 = p1.y
+        dx = p2.x - x1
+        dy = p2.y - y1
+        best_t = math.inf
+        best = -1
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            t = _segment_box(x1, y1, dx, dy, self._bounds[node], margin)
+            if t is None or t > best_t:
+                continue
+            left, right = self._children[node]
+            if left >= 0:
+                stack.append(right)
+                stack.append(left)
+                continue
+            for i in self._items[node]:
+                t = self.obstacles[i].intersect_segment(x1, y1, dx, dy, margin)
+                # ties (inside the margin of a few) go to the first obstacle
+                if t is not None and (t < best_t or (t == best_t and i < best)):
+                    best_t = t
+                    best = i
+        return None if best < 0 else (best_t, self.obstacles[best])
+
+    def segment_query_batch(
+        self, p1: PointsLike, p2: PointsLike, margin: float = 0.0
+    ) -> Tuple[FloatArray, IndexArray]:
+        """segment_query for N segments.
+
+        Returns where each segment hits (inf for no hit) and the index of the obstacle in
+        self.obstacles (-1 for no hit).
+        """
+        start = as_points(p1)
+        end = np.broadcast_to(as_points(p2), start.shape)
+        n = len(start)
+        best_t = np.full(n, np.inf)
+        best = np.full(n, -1, dtype=np.intp)
+        if not self._bounds or n == 0:
+            return best_t, best
+        x1 = start[:, 0]
+        y1 = start[:, 1]
+        dx = end[:, 0] - x1
+        dy = end[:, 1] - y1
+        node_bounds, node_children, node_items = self._node_arrays()
+        # breadth first, one level of the tree at a time for all the (node, segment)
+        # pairs that reached it
+        nodes = np.zeros(n, dtype=np.intp)
+        segments = np.arange(n)
+        leaf_nodes = []
+        leaf_segments = []
+        while len(nodes):
+            b = node_bounds[nodes]
+            t = _segment_box_batch(
+                x1[segments],
+                y1[segments],
+                dx[segments],
+                dy[segments],
+                b[:, 0] - margin,
+                b[:, 1] - margin,
+                b[:, 2] + margin,
+                b[:, 3] + margin,
+            )
+            hit = np.isfinite(t)
+            nodes = nodes[hit]
+            segments = segments[hit]
+            children = node_children[nodes]
+            leaf = children[:, 0] < 0
+            leaf_nodes.append(nodes[leaf])
+            leaf_segments.append(segments[leaf])
+            nodes = children[~leaf].ravel()
+            segments = np.repeat(segments[~leaf], 2)
+        # every (obstacle, segment) pair of the leaves reached
+        items = node_items[np.concatenate(leaf_nodes)]
+        segments = np.repeat(np.concatenate(leaf_segments), items.shape[1])
+        items = items.ravel()
+        valid = items >= 0
+        items = items[valid]
+        segments = segments[valid]
+        t = self._obstacles_batch(
+            items, x1[segments], y1[segments], dx[segments], dy[segments], margin
+        )
+        np.minimum.at(best_t, segments, t)
+        closest = np.isfinite(t) & (t == best_t[segments])
+        # ties go to the first obstacle, as in segment_query
+        best[:] = len(self.obstacles)
+        np.minimum.at(best, segments[closest], items[closest])
+        best[np.isinf(best_t)] = -1
+        return best_t, best
+
+    def _node_arrays(self) -> Tuple[FloatArray, IndexArray, IndexArray]:
+        # the nodes as arrays for segment_query_batch, leaf items padded with -1
+        if self._node_arrays_cache is None:
+            items = np.full((len(self._items), self.leaf_size), -1, dtype=np.intp)
+            for node, node_items in enumerate(self._items):
+                items[node, : len(node_items)] = node_items
+            self._node_arrays_cache = (
+                np.array(self._bounds, dtype=np.float64),
+                np.array(self._children, dtype=np.intp),
+                items,
+            )
+        return self._node_arrays_cache
+
+    def _obstacles_batch(
+        self,
+        indices: IndexArray,
+        x1: FloatArray,
+        y1: FloatArray,
+        dx: FloatArray,
+        dy: FloatArray,
+        margin: float,
+    ) -> FloatArray:
+        # Obstacle.intersect_segment of obstacles[indices[k]] and segment k, inf for no hit
+        bounds = self._obstacle_bounds[indices]
+        box = _segment_box_batch(
+            x1,
+            y1,
+            dx,
+            dy,
+            bounds[:, 0] - margin,
+            bounds[:, 1] - margin,
+            bounds[:, 2] + margin,
+            bounds[:, 3] + margin,
+        )
+        center = self._center[indices]
+        radius = self._radius[indices] + margin
+        fx = x1 - center[:, 0]
+        fy = y1 - center[:, 1]
+        c = fx * fx + fy * fy - radius * radius
+        a = dx * dx + dy * dy
+        b = 2 * (fx * dx + fy * dy)
+        discriminant = b * b - 4 * a * c
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (-b - np.sqrt(discriminant)) / (2 * a)
+        hit = (discriminant >= 0) & (a != 0) & (t >= 0) & (t <= 1)
+        circle = np.where(c <= 0, 0.0, np.where(hit, t, np.inf))
+        return np.where(self._is_circle[indices], circle, box)
+
+    def away_batch(self, indices: IndexArray, points: FloatArray) -> FloatArray:
+        """Obstacle.away for obstacles[indices[k]] and points[k]"""
+        center = self._center[indices]
+        bounds = self._obstacle_bounds[indices]
+        nearest = np.clip(points, bounds[:, :2], bounds[:, 2:])
+        inside = np.all(nearest == points, axis=1)
+        nearest[inside] = center[inside]
+        circle = self._is_circle[indices]
+        nearest[circle] = center[circle]
+        return points - nearest
@@ -5,6 +5,7 @@ from typing import List
 from typing import NewType
 
 from infra.vmath import Rect
+from infra.vmath import Rotation2D
 from infra.vmath import Vector
 
 Path = NewType('Path', List[Vector])
@@ -27,7 +28,8 @@ def shift_path_with_callable(
 
 
 def rotate_path(path: Path, angle: float) -> Path:
-    return Path([point.rotate(angle) for point in path])
+    rotation = Rotation2D(angle)
+    return Path([rotation.apply(point) for point in path])
 
 
 def circle_path(
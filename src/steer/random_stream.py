@@ -0,0 +1,64 @@
+"""Counter based random streams.
+
+The n-th number of a stream is a hash of (stream key, n), it doesn't depend on what
+was drawn from any other stream or in which order the streams were drawn from. Each
+entity of an EntityWorld has its own stream (see EntityWorld.uniform).
+
+Nothing is generated ahead: a stream is a key and a counter, and the batched draws
+hash the next number of many streams in one numpy pass (uniform). A per stream block
+of pregenerated numbers would give the same numbers, but cost 8 bytes a number in
+every entity row and a refill whenever a stream runs out.
+"""
+from __future__ import annotations
+
+import numpy as np
+import numpy.typing as npt
+
+from infra.vmath import FloatArray
+
+UIntArray = npt.NDArray[np.uint64]
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+_S30 = np.uint64(30)
+_S27 = np.uint64(27)
+_S31 = np.uint64(31)
+_S11 = np.uint64(11)
+# the same constants as Python ints, for uniform_one
+_MASK64 = (1 << 64) - 1
+_GOLDEN_INT = int(_GOLDEN)
+_MIX1_INT = int(_MIX1)
+_MIX2_INT = int(_MIX2)
+
+
+def _mix(z: UIntArray) -> UIntArray:
+    # splitmix64 finalizer, uint64 arithmetic wraps around
+    z = (z ^ (z >> _S30)) * _MIX1
+    z = (z ^ (z >> _S27)) * _MIX2
+    return z ^ (z >> _S31)
+
+
+def stream_keys(seed: int, streams: npt.ArrayLike) -> UIntArray:
+    """Keys of the streams numbered streams (any ints) of a seed"""
+    seed_key = _mix(np.array([seed & 0xFFFFFFFFFFFFFFFF], dtype=np.uint64))
+    return _mix(seed_key ^ (np.asarray(streams, dtype=np.uint64) * _GOLDEN))
+
+
+def uniform(keys: npt.ArrayLike, counters: npt.ArrayLike) -> FloatArray:
+    """Number counters[k] of stream keys[k], uniform in [0, 1). Broadcasts."""
+    z = (
+        np.asarray(keys, dtype=np.uint64)
+        + np.asarray(counters, dtype=np.uint64) * _GOLDEN
+    )
+    return (_mix(z) >> _S11) * (1.0 / (1 << 53))
+
+
+def uniform_one(key: int, counter: int) -> float:
+    """uniform for a single number, same bits, in Python ints - without the overhead of
+    numpy calls on one element"""
+    z = (key + counter * _GOLDEN_INT) & _MASK64
+    z = ((z ^ (z >> 30)) * _MIX1_INT) & _MASK64
+    z = ((z ^ (z >> 27)) * _MIX2_INT) & _MASK64
+    z ^= z >> 31
+    return (z >> 11) * (1.0 / (1 << 53))
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import bisect
+import weakref
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from steer.movable_entity import MovableEntity
+
+
+class ActiveRoster:
+    """The active members of a squad, in member order, with O(1) lookups.
+
+    members is a list (RosterMembers) that reports its changes, and every member tells
+    the rosters it belongs to when its is_active flips (MovableEntity.is_active). Appending
+    a member or flipping is_active updates the roster in place, any other change to
+    members rebuilds it on the next lookup. A member listed twice counts once, at its
+    first position.
+
+    version is bumped on every change of the active members or their order.
+    """
+
+    def __init__(self, members: Iterable[MovableEntity] = ()):
+        self.version = 0
+        self.rebuilds = 0
+        self._active: List[MovableEntity] = []
+        self._active_member_pos: List[int] = []  # position in members of _active[i]
+        self._index: Dict[MovableEntity, int] = {}  # position in _active
+        self._member_pos: Dict[MovableEntity, int] = {}
+        self._dirty = True
+        self._ref = weakref.ref(self)
+        self.members: RosterMembers = RosterMembers(self, members)
+
+    def set_members(self, members: Iterable[MovableEntity]) -> None:
+        self.members = RosterMembers(self, members)
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        self._dirty = True
+        self.version += 1
+
+    def _rebuild(self) -> None:
+        self.rebuilds += 1
+        self._dirty = False
+        self._active.clear()
+        self._active_member_pos.clear()
+        self._index.clear()
+        self._member_pos.clear()
+        for pos, e in enumerate(self.members):
+            if e in self._member_pos:  # listed twice, the first one counts
+                continue
+            self._member_pos[e] = pos
+            self._attach(e)
+            if e.is_active is True:
+                self._index[e] = len(self._active)
+                self._active.append(e)
+                self._active_member_pos.append(pos)
+
+    def _attach(self, e: MovableEntity) -> None:
+        rosters = e._rosters
+        if not any(r is self._ref for r in rosters):
+            e._rosters = tuple(r for r in rosters if r() is not None) + (self._ref,)
+
+    def _appended(self, e: MovableEntity) -> None:
+        if self._dirty or e in self._member_pos:
+            self.invalidate()
+            return
+        pos = len(self.members) - 1
+        self._member_pos[e] = pos
+        self._attach(e)
+        if e.is_active is True:
+            self._index[e] = len(self._active)
+            self._active.append(e)
+            self._active_member_pos.append(pos)
+        self.version += 1
+
+    def activity_changed(self, e: MovableEntity, active: bool) -> None:
+        """Called by MovableEntity when is_active flips"""
+        if self._dirty:
+            return
+        pos = self._member_pos.get(e)
+        if pos is None:  # no longer a member
+            return
+        if active == (e in self._index):  # out of sync, active changed in the world
+            self.invalidate()
+            return
+        self.version += 1
+        if active:
+            i = bisect.bisect_left(self._active_member_pos, pos)
+            self._active.insert(i, e)
+            self._active_member_pos.insert(i, pos)
+        else:
+            i = self._index.pop(e)
+            del self._active[i]
+            del self._active_member_pos[i]
+        index = self._index
+        active_members = self._active
+        for j in range(i, len(active_members)):
+            index[active_members[j]] = j
+
+    @property
+    def active(self) -> List[MovableEntity]:
+        """The active members, don't modify"""
+        if self._dirty:
+            self._rebuild()
+        return self._active
+
+    def __len__(self) -> int:
+        return len(self.active)
+
+    def __iter__(self) -> Iterator[MovableEntity]:
+        # a snapshot, members may be deactivated while iterating
+        return (e for e in self.active.copy() if e.is_active is True)
+
+    def leader(self) -> Optional[MovableEntity]:
+        active = self.active
+        return active[0] if active else None
+
+    def index_of(self, e: MovableEntity) -> Optional[int]:
+        if self._dirty:
+            self._rebuild()
+        return self._index.get(e)
+
+    def at(self, index: int) -> Optional[MovableEntity]:
+        active = self.active
+        return active[index] if 0 <= index < len(active) else None
+
+
+def _invalidating(name: str) -> Any:
+    # list method name, that then marks the roster for a rebuild
+    method = getattr(list, name)
+
+    def invalidating(self: RosterMembers, *args: Any, **kwargs: Any) -> Any:
+        res = method(self, *args, **kwargs)
+        self._roster.invalidate()
+        return res
+
+    invalidating.__name__ = name
+    return invalidating
+
+
+class RosterMembers(List['MovableEntity']):
+    """List of the members of an ActiveRoster, keeps the roster up to date"""
+
+    def __init__(self, roster: ActiveRoster, members: Iterable[MovableEntity] = ()):
+        super().__init__(members)
+        self._roster = roster
+
+    def append(self, e: MovableEntity) -> None:
+        super().append(e)
+        self._roster._appended(e)
+
+    extend = _invalidating('extend')
+    insert = _invalidating('insert')
+    remove = _invalidating('remove')
+    pop = _invalidating('pop')
+    clear = _invalidating('clear')
+    sort = _invalidating('sort')
+    reverse = _invalidating('reverse')
+    __setitem__ = _invalidating('__setitem__')
+    __delitem__ = _invalidating('__delitem__')
+    __iadd__ = _invalidating('__iadd__')
+    __imul__ = _invalidating('__imul__')
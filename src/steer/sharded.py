@@ -0,0 +1,315 @@
+"""Squads sharded across worker processes, their entities in shared memory.
+
+The entity state of all the shards is one SharedEntityWorld, a single
+multiprocessing.shared_memory block every process maps, each shard owning a disjoint
+range of its rows. A worker builds its squads itself (with the scenario factory) and
+steps them with a World, so nothing is pickled per tick, and the parent reads the
+positions straight from the shared arrays. A barrier ends every tick, no shard starts
+tick t + 1 before all of them finished tick t.
+
+The shards don't see each other: a squad's neighbour queries (separation,
+NeighbourIndex) only cover the squads of its own shard.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import queue
+import threading
+import traceback
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import TYPE_CHECKING
+
+import numpy as np
+import numpy.typing as npt
+
+from infra.vmath import FloatArray
+from steer.entity_world import EntityWorld
+from steer.entity_world import IndexArray
+from steer.neighbour_index import NeighbourIndex
+from steer.world import World
+
+if TYPE_CHECKING:
+    from steer.movable_entity import MovableEntity
+    from steer.squad import Squad
+
+_ALIGN = 64  # every field starts on a cache line
+
+# squad number, the world of its shard -> the squad, built inside the worker. Must be
+# picklable (a module level function) unless the processes are forked.
+ScenarioFactory = Callable[[int, EntityWorld], 'Squad']
+
+
+class SharedEntityWorld(EntityWorld):
+    """An EntityWorld whose arrays live in a shared memory block.
+
+    The creator (name None) allocates and initializes the block, the other processes
+    attach to it by name. The capacity is fixed, and entities are only allocated from
+    rows, the row range of this process (none by default). The random streams are
+    numbered by row so they differ across the shards.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        rows: range = range(0),
+        name: Optional[str] = None,
+        seed: int = 0,
+    ):
+        if rows.start < 0 or rows.stop > capacity:
+            raise ValueError(f'rows {rows} outside of capacity {capacity}')
+        self.rows = rows
+        self._owner = name is None
+        # set by EntityWorld.__init__ (through _grow), which mypy sees as Any
+        self._capacity: int
+        self._size: int
+        size = max(1, self.nbytes(capacity))
+        self._shm: Optional[SharedMemory] = SharedMemory(
+            name, create=name is None, size=size
+        )
+        super().__init__(capacity, seed)
+        self._size = rows.start
+        self._streams = rows.start
+        self._entities = [None] * rows.start
+
+    @property
+    def name(self) -> str:
+        assert self._shm is not None, 'closed'
+        return self._shm.name
+
+    @classmethod
+    def _layout(cls, capacity: int) -> tuple[Dict[str, int], int]:
+        # name -> byte offset of the field in the block, and the size of the block
+        offsets = {}
+        size = 0
+        for name, (shape, dtype, _) in cls._fields.items():
+            offsets[name] = size
+            row = int(np.prod(shape, dtype=np.intp)) * np.dtype(dtype).itemsize
+            size += -(-capacity * row // _ALIGN) * _ALIGN
+        return offsets, size
+
+    @classmethod
+    def nbytes(cls, capacity: int) -> int:
+        """Size of the shared block of a world of capacity rows"""
+        return cls._layout(capacity)[1]
+
+    def _grow(self, capacity: int) -> None:
+        if self._capacity or self._shm is None:
+            raise ValueError('a SharedEntityWorld can\'t grow')
+        buffer = self._shm.buf
+        for name, offset in self._layout(capacity)[0].items():
+            shape, dtype, init = self._fields[name]
+            array: npt.NDArray[Any] = np.ndarray(
+                (capacity,) + shape, dtype, buffer, offset
+            )
+            if self._owner:
+                array[...] = init
+            self._set_field(name, array)
+        self._capacity = capacity
+
+    def allocate(self, entity: MovableEntity) -> int:
+        if not self._free and self._size == self.rows.stop:
+            raise ValueError(f'rows {self.rows} are all in use')
+        return int(super().allocate(entity))
+
+    def release(self, row: int) -> None:
+        if self._shm is not None:  # entities may outlive a closed world
+            super().release(row)
+
+    def active_rows(self) -> IndexArray:
+        start = self.rows.start
+        size = self._size
+        return np.flatnonzero(self.active[start:size]) + start
+
+    def close(self) -> None:
+        """Unmap the block (and free it, in the creator). Don't use the world after."""
+        if self._shm is None:
+            return
+        for name, (shape, dtype, _) in self._fields.items():
+            # drops the views too, the block can't be closed while they're exported
+            self._set_field(name, np.zeros((0,) + shape, dtype=dtype))
+        self._capacity = 0
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
+
+
+# layout of ShardedRunner._control
+_TICKS = 0
+_DT = 1
+_STOP = 2
+
+
+def _run_shard(
+    shard: int,
+    name: str,
+    capacity: int,
+    rows: range,
+    seed: int,
+    factory: ScenarioFactory,
+    numbers: Sequence[int],
+    neighbours: bool,
+    barrier: Any,
+    control: Any,
+    messages: Any,
+) -> None:
+    world = SharedEntityWorld(capacity, rows, name, seed)
+    try:
+        sim = World(neighbour_index=NeighbourIndex(world) if neighbours else None)
+        squad_rows = {}
+        for number in numbers:
+            squad = sim.add(factory(number, world))
+            squad_rows[number] = [e.row for e in squad.entities]
+        messages.put(('rows', shard, squad_rows))
+        barrier.wait()  # built
+        while True:
+            barrier.wait()  # go
+            if control[_STOP]:
+                break
+            dt = control[_DT]
+            for _ in range(int(control[_TICKS])):
+                sim.step(dt)
+                barrier.wait()  # tick done
+    except threading.BrokenBarrierError:  # another shard failed, or the parent
+        pass
+    except Exception:
+        # reported by the parent, which gets a BrokenBarrierError
+        messages.put(('error', shard, traceback.format_exc()))
+        barrier.abort()
+
+
+class ShardedRunner:
+    """Runs squads numbered 0 .. squads - 1 in workers processes.
+
+    Worker k builds and steps the squads numbered k, k + workers, ... , each squad may
+    have up to rows_per_squad entities (allocated in the worker's share of world).
+    neighbours gives each shard its own NeighbourIndex.
+
+    The result of a squad only depends on its shard when the squads share no state, e.g.
+    the factory reseeds the random module per squad and the behaviours draw from it only
+    when they are built (path, patrol_ext).
+    """
+
+    def __init__(
+        self,
+        factory: ScenarioFactory,
+        squads: int,
+        workers: int = 1,
+        rows_per_squad: int = 16,
+        seed: int = 0,
+        neighbours: bool = False,
+        timeout: Optional[float] = None,
+    ):
+        if workers < 1:
+            raise ValueError('workers must be >= 1')
+        self.workers = workers
+        self.ticks = 0
+        self.timeout = timeout
+        self.shards: List[List[int]] = [
+            list(range(k, squads, workers)) for k in range(workers)
+        ]
+        self.world = SharedEntityWorld(squads * rows_per_squad, seed=seed)
+        # squad number -> rows of its entities, in member order
+        self.squad_rows: Dict[int, IndexArray] = {}
+        ctx = multiprocessing.get_context()
+        self._barrier = ctx.Barrier(workers + 1)
+        self._control = ctx.RawArray('d', 3)
+        self._messages = ctx.Queue()
+        self._processes = []
+        start = 0
+        for k, numbers in enumerate(self.shards):
+            rows = range(start, start + len(numbers) * rows_per_squad)
+            start = rows.stop
+            self._processes.append(
+                ctx.Process(
+                    target=_run_shard,
+                    args=(
+                        k,
+                        self.world.name,
+                        self.world.capacity,
+                        rows,
+                        seed,
+                        factory,
+                        numbers,
+                        neighbours,
+                        self._barrier,
+                        self._control,
+                        self._messages,
+                    ),
+                    name=f'shard-{k}',
+                    daemon=True,
+                )
+            )
+        self._started = False
+
+    def start(self) -> None:
+        """Start the workers and wait until they built their squads"""
+        if self._started:
+            return
+        self._started = True
+        for p in self._processes:
+            p.start()
+        self._wait()
+        for _ in range(self.workers):
+            _, _, squad_rows = self._messages.get()
+            for number, rows in squad_rows.items():
+                self.squad_rows[number] = np.array(rows, dtype=np.intp)
+
+    def _wait(self) -> None:
+        try:
+            self._barrier.wait(self.timeout)
+        except threading.BrokenBarrierError as e:
+            self._barrier.abort()
+            for p in self._processes:
+                p.join(self.timeout)
+            errors = []
+            try:
+                while True:
+                    kind, shard, text = self._messages.get_nowait()
+                    if kind == 'error':
+                        errors.append(f'shard {shard}:\n{text}')
+            except queue.Empty:
+                pass
+            raise RuntimeError('\n'.join(errors) or 'a shard stopped') from e
+
+    def run(self, ticks: int, dt: float) -> None:
+        """Step every squad ticks times, returns when all the shards are done"""
+        self.start()
+        self._control[_TICKS] = ticks
+        self._control[_DT] = dt
+        self._wait()  # go
+        for _ in range(ticks):
+            self._wait()
+            self.ticks += 1
+
+    def positions(self, number: int) -> FloatArray:
+        """Positions of the entities of a squad, in member order"""
+        return self.world.pos[self.squad_rows[number]]
+
+    def close(self) -> None:
+        """Stop the workers and free the shared memory"""
+        if self._started:
+            self._control[_STOP] = 1
+            try:
+                self._barrier.wait(self.timeout)
+            except threading.BrokenBarrierError:  # the workers are gone
+                pass
+            for p in self._processes:
+                p.join(self.timeout)
+                if p.is_alive():
+                    p.terminate()
+            self._started = False
+        self._messages.close()
+        self.world.close()
+
+    def __enter__(self) -> ShardedRunner:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
@@ -0,0 +1,199 @@
+"""Formation slot assignment that minimizes the total travel distance.
+
+Without it the member at roster index i flies to slot i, so when a member is lost
+everybody behind it moves up a slot, often across the formation. SlotAssignment instead
+matches the members to the slots by distance, exactly (hungarian) for small squads and
+approximately (greedy_assignment) for large ones.
+"""
+from __future__ import annotations
+
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from infra.vmath import FloatArray
+from steer.entity_world import IndexArray
+
+if TYPE_CHECKING:
+    from steer.formation import Formation
+    from steer.movable_entity import MovableEntity
+    from steer.squad import Squad
+
+
+def hungarian(cost: FloatArray) -> IndexArray:
+    """Minimum cost perfect matching of a square cost matrix, column of every row.
+
+    Shortest augmenting path version of the Hungarian algorithm, O(n^3), the scan over
+    the columns is vectorized.
+    """
+    n = len(cost)
+    # 1 based, column 0 / row 0 is the virtual start of the augmenting paths
+    u = np.zeros(n + 1)
+    v = np.zeros(n + 1)
+    row_of = np.zeros(n + 1, dtype=np.intp)  # row matched to the column, 0 for none
+    way = np.zeros(n + 1, dtype=np.intp)
+    for i in range(1, n + 1):
+        row_of[0] = i
+        j0 = 0
+        min_v = np.full(n + 1, np.inf)
+        used = np.zeros(n + 1, dtype=np.bool_)
+        while True:
+            used[j0] = True
+            i0 = row_of[j0]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            free = ~used[1:]
+            better = free & (reduced < min_v[1:])
+            min_v[1:][better] = reduced[better]
+            way[1:][better] = j0
+            candidates = np.where(free, min_v[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+            u[row_of[used]] += delta
+            v[used] -= delta
+            min_v[1:][free] -= delta
+            j0 = j1
+            if row_of[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            row_of[j0] = row_of[j1]
+            j0 = j1
+    column_of = np.empty(n, dtype=np.intp)
+    column_of[row_of[1:] - 1] = np.arange(n)
+    return column_of
+
+
+def greedy_assignment(cost: FloatArray, swap_rounds: int = 8) -> IndexArray:
+    """Approximate minimum cost matching of a square cost matrix, column of every row.
+
+    In rounds, like an auction: every unmatched row bids for its cheapest free column
+    and each column goes to its cheapest bidder. Every round matches at least one row,
+    in practice a few rounds match them all. Then up to swap_rounds of improving
+    pairwise swaps (see improve_by_swaps).
+    """
+    n = len(cost)
+    column_of = np.full(n, -1, dtype=np.intp)
+    taken = np.zeros(n, dtype=np.bool_)
+    rows = np.arange(n)
+    while len(rows):
+        free = np.flatnonzero(~taken)
+        sub = cost[rows[:, None], free]
+        choice = np.argmin(sub, axis=1)
+        bid = sub[np.arange(len(rows)), choice]
+        columns = free[choice]
+        order = np.lexsort((bid, columns))
+        first = np.ones(len(order), dtype=np.bool_)
+        first[1:] = columns[order[1:]] != columns[order[:-1]]
+        won = order[first]
+        column_of[rows[won]] = columns[won]
+        taken[columns[won]] = True
+        rows = rows[column_of[rows] < 0]
+    return improve_by_swaps(cost, column_of, swap_rounds)
+
+
+def improve_by_swaps(
+    cost: FloatArray, column_of: IndexArray, rounds: int
+) -> IndexArray:
+    """Swap the columns of pairs of rows while that lowers the total cost.
+
+    Each round every row finds the partner it gains most by swapping with, and the best
+    disjoint pairs swap.
+    """
+    n = len(column_of)
+    if n < 2:
+        return column_of
+    column_of = column_of.copy()
+    rows = np.arange(n)
+    for _ in range(rounds):
+        current = cost[rows, column_of]
+        swapped = cost[:, column_of]  # [i, j]: row i taking the column of row j
+        gain = current[:, None] + current[None, :] - swapped - swapped.T
+        partner = np.argmax(gain, axis=1)
+        best = gain[rows, partner]
+        candidates = np.flatnonzero(best > 1e-9)
+        if len(candidates) == 0:
+            break
+        used = np.zeros(n, dtype=np.bool_)
+        for i in candidates[np.argsort(-best[candidates])].tolist():
+            j = int(partner[i])
+            if used[i] or used[j]:
+                continue
+            used[i] = used[j] = True
+            column_of[i], column_of[j] = column_of[j], column_of[i]
+    return column_of
+
+
+class SlotAssignment:
+    """Which formation slot each active member of a squad flies to.
+
+    Set as Squad.slot_assignment. The leader keeps slot 0, the other members get the
+    next slots so that the total distance from the members to their slots is minimal.
+    Recomputed only when the roster, the leader or the formation change.
+    """
+
+    def __init__(self, exact_limit: int = 64):
+        self.exact_limit = exact_limit  # members up to which the matching is exact
+        # (roster version, formation, formation version) of the last recompute
+        self.key: Optional[Tuple[int, Optional[Formation], Optional[int]]] = None
+        self.version = 0  # bumped on every recompute
+        self.runs = 0
+        self.total_cost = 0.0  # total distance to the slots of the last recompute
+        self._slots: Dict[MovableEntity, int] = {}
+
+    def slot_of(self, squad: Squad, entity: MovableEntity) -> Optional[int]:
+        formation = squad.formation
+        if formation is not None:
+            formation.fit(squad.count())
+        key: Tuple[int, Optional[Formation], Optional[int]] = (
+            squad.roster.version,
+            formation,
+            None if formation is None else formation.version,
+        )
+        if key != self.key:
+            self._assign(squad)
+            self.key = key
+        return self._slots.get(entity)
+
+    def _assign(self, squad: Squad) -> None:
+        self.runs += 1
+        self.version += 1
+        self._slots.clear()
+        active = squad.roster.active
+        if not active:
+            return
+        leader = active[0]
+        self._slots[leader] = 0
+        followers = active[1:]
+        if not followers or squad.formation is None:
+            for i, e in enumerate(followers, 1):
+                self._slots[e] = i
+            return
+        formation = squad.formation
+        offsets = formation.entity_positions(np.arange(len(active)))
+        rotation = leader.formation_rotation()
+        relative = offsets[1:] - offsets[0]
+        slots = np.empty_like(relative)
+        slots[:, 0] = relative[:, 0] * rotation.cos - relative[:, 1] * rotation.sin
+        slots[:, 1] = relative[:, 0] * rotation.sin + relative[:, 1] * rotation.cos
+        leader_pos = leader.pos
+        slots[:, 0] += leader_pos.x
+        slots[:, 1] += leader_pos.y
+        pos = np.array([(p.x, p.y) for p in (e.pos for e in followers)])
+        delta = pos[:, None, :] - slots[None, :, :]
+        cost = np.sqrt(delta[..., 0] * delta[..., 0] + delta[..., 1] * delta[..., 1])
+        if len(followers) <= self.exact_limit:
+            column_of = hungarian(cost)
+        else:
+            column_of = greedy_assignment(cost)
+        self.total_cost = float(cost[np.arange(len(followers)), column_of].sum())
+        for e, column in zip(followers, column_of.tolist()):
+            self._slots[e] = column + 1
+
+    def __repr__(self) -> str:
+        return (
+            f'SlotAssignment(runs={self.runs}, total_cost={self.total_cost:.1f}, '
+            f'exact_limit={self.exact_limit})'
+        )
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import math
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+from infra.vmath import Vector
+from steer.movable_entity import MovableEntity
+
+CellKey = Tuple[int, int]
+
+
+class SpatialHash:
+    """Uniform grid of entities, bucketed by the cell of their position.
+
+    With a cell size of r, every entity within distance r of a point is in the 3x3 cells
+    around the point's cell, so a neighbour query touches a handful of entities instead
+    of all of them. Entities are moved between cells incrementally (move) as they
+    change position, sync brings the whole grid up to date with a list of entities.
+
+    Every entity has an order (its index in the list given to sync), candidates are
+    returned sorted by it so sums over them are done in the same order as a scan of the
+    list - the result of a force doesn't depend on the layout of the grid.
+    """
+
+    def __init__(self, cell_size: float):
+        if cell_size <= 0:
+            raise ValueError('cell_size must be > 0')
+        self.cell_size = cell_size
+        self._cells: Dict[CellKey, List[MovableEntity]] = {}
+        self._keys: Dict[MovableEntity, CellKey] = {}
+        self._order: Dict[MovableEntity, int] = {}
+        self.version: int = 0  # bumped whenever the members or their order change
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, entity: MovableEntity) -> bool:
+        return entity in self._keys
+
+    def __iter__(self) -> Iterator[MovableEntity]:
+        return iter(self._keys)
+
+    def cell_of(self, pos: Vector) -> CellKey:
+        return (
+            math.floor(pos.x / self.cell_size),
+            math.floor(pos.y / self.cell_size),
+        )
+
+    def insert(self, entity: MovableEntity, order: int = 0) -> None:
+        if entity in self._keys:
+            self.remove(entity)
+        key = self.cell_of(entity.pos)
+        self._keys[entity] = key
+        self._order[entity] = order
+        self._cells.setdefault(key, []).append(entity)
+        self.version += 1
+
+    def remove(self, entity: MovableEntity) -> None:
+        key = self._keys.pop(entity, None)
+        if key is None:
+            return
+        del self._order[entity]
+        self.version += 1
+        cell = self._cells[key]
+        cell.remove(entity)
+        if not cell:
+            del self._cells[key]
+
+    def move(self, entity: MovableEntity, pos: Vector | None = None) -> None:
+        """Re-bucket an entity after its position changed, a no op if it isn't in the grid.
+
+        pos is the entity position, when the caller already has it.
+        """
+        old = self._keys.get(entity)
+        if old is None:
+            return
+        key = self.cell_of(entity.pos if pos is None else pos)
+        if key == old:
+            return
+        cell = self._cells[old]
+        cell.remove(entity)
+        if not cell:
+            del self._cells[old]
+        self._keys[entity] = key
+        self._cells.setdefault(key, []).append(entity)
+
+    def sync(self, entities: Iterable[MovableEntity]) -> None:
+        """Make the grid hold exactly the active entities, ordered as given"""
+        seen = set()
+        for order, e in enumerate(entities):
+            if not e.is_active:
+                continue
+            seen.add(e)
+            if e in self._keys:
+                if self._order[e] != order:
+                    self._order[e] = order
+                    self.version += 1
+                self.move(e)
+            else:
+                self.insert(e, order)
+        if len(seen) != len(self._keys):
+            for e in [e for e in self._keys if e not in seen]:
+                self.remove(e)
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._keys.clear()
+        self._order.clear()
+        self.version += 1
+
+    def query(
+        self, pos: Vector, radius: float, out: List[MovableEntity]
+    ) -> List[MovableEntity]:
+        """Fill out with the entities in the cells that may be within radius of pos.
+
+        Candidates only - the caller does the exact distance test. out is cleared first
+        and returned, pass the same list on every call to avoid allocating one per query.
+        """
+        out.clear()
+        cx, cy = self.cell_of(pos)
+        span = max(1, math.ceil(radius / self.cell_size))
+        cells = self._cells
+        for x in range(cx - span, cx + span + 1):
+            for y in range(cy - span, cy + span + 1):
+                cell = cells.get((x, y))
+                if cell is not None:
+                    out.extend(cell)
+        if len(out) > 1:
+            out.sort(key=self._order.__getitem__)
+        return out
@@ -1,52 +1,163 @@
 from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
 from typing import List
 from typing import Optional
+from typing import Tuple
 
+import numpy as np
+
+from infra.vmath import FloatArray
 from infra.vmath import Vector
 from steer.formation import Formation
+from steer.globals import follow_velocity_multiplier
+from steer.globals import separation_radius
+from steer.globals import separation_skin
+from steer.lod import ImpostorPolicy
+from steer.lod import ImpostorStats
+from steer.lod import LodPolicy
+from steer.lod import LodStats
 from steer.movable_entity import MovableEntity
+from steer.neighbour_index import NeighbourIndex
+from steer.roster import ActiveRoster
+from steer.roster import RosterMembers
+from steer.slot_assignment import SlotAssignment
+from steer.spatial_hash import SpatialHash
 from steer.squad_behaviour_condition import CondRes
+from steer.verlet_lists import VerletLists
 
 # from steer_behaviour import
 
 SquadForceFunc = Callable[[bool, float], CondRes]
 
+# (roster version, leader, follow_front_entity, formation, formation version,
+#  neighbour index, slot assignment) a follower assignment was made for
+FollowKey = Tuple[
+    int,
+    MovableEntity,
+    bool,
+    Optional[Formation],
+    Optional[int],
+    Optional[NeighbourIndex],
+    Optional[SlotAssignment],
+]
+# (the member a follower follows, the follower's slot, the followed member's slot)
+FollowerSlots = Tuple[Optional[MovableEntity], Optional[int], Optional[int]]
+
+
+class FollowAssignment:
+    """Follower steering last handed out by squad_behaviour.set_entities_follow_target.
+
+    The assignment only changes when the roster, the leader, the follow mode or the
+    formation (slots) do. Only the members whose own assignment changed (their slot, the
+    member they follow or its slot) get a new steering force, the counters show how
+    often that happens.
+    """
+
+    def __init__(self) -> None:
+        self.key: Optional[FollowKey] = None  # of the last assignment
+        # follower -> what its steering force was built from
+        self.assigned: Dict[MovableEntity, FollowerSlots] = {}
+        self.calls: int = 0
+        self.skipped: int = 0  # calls with nothing to reassign
+        self.reassigned: int = 0  # followers given a new steering force
+        self.elapsed: float = 0.0  # squad update time, for the rates
+
+    @property
+    def reassigned_per_second(self) -> float:
+        return 0.0 if self.elapsed == 0 else self.reassigned / self.elapsed
+
+    @property
+    def calls_per_second(self) -> float:
+        return 0.0 if self.elapsed == 0 else self.calls / self.elapsed
+
+    def __repr__(self) -> str:
+        return (
+            f"FollowAssignment(calls={self.calls}, skipped={self.skipped}, "
+            f"reassigned={self.reassigned}, "
+            f"reassigned_per_second={self.reassigned_per_second:.1f})"
+        )
+
 
 class Squad:
     def __init__(self):
-        self.entities: List[MovableEntity] = []
+        # the active members in order, indexed, kept up to date as members change
+        self.roster: ActiveRoster = ActiveRoster()
         self.formation: Formation = None
         self.squad_behaviour: Optional[SquadForceFunc] = None
+        # optional level of detail - far entities get their steering evaluated less often
+        self.lod: Optional[LodPolicy] = None
+        self.lod_stats: LodStats = LodStats()
+        # optional, far squads only simulate their leader and carry the others along
+        self.impostor: Optional[ImpostorPolicy] = None
+        self.impostor_stats: ImpostorStats = ImpostorStats()
+        self.aggregate: bool = False
+        # active members bucketed by position, for neighbour queries (separation)
+        self.spatial_hash: SpatialHash = SpatialHash(separation_radius)
+        self.neighbour_lists: VerletLists = VerletLists(
+            self.spatial_hash, separation_radius, separation_skin
+        )
+        self._updating: bool = False
+        # optional world wide index, followers then also keep away from other squads
+        self.neighbour_index: Optional[NeighbourIndex] = None
+        self.follow_assignment: FollowAssignment = FollowAssignment()
+        # optional, members fly to the slots closest to them instead of slot = index
+        self.slot_assignment: Optional[SlotAssignment] = None
 
-    def active_iter(self):
-        return (e for e in self.entities if e.is_active is True)
+    @property
+    def entities(self) -> RosterMembers:
+        return self.roster.members
 
-    def get_leader(self):
-        return next(self.active_iter(), None)
+    @entities.setter
+    def entities(self, entities: Iterable[MovableEntity]) -> None:
+        self.roster.set_members(entities)
 
-    def count(self):
-        return len(list(self.active_iter()))
+    def active_iter(self) -> Iterator[MovableEntity]:
+        return iter(self.roster)
 
-    def get_index_of_entity(self, entity):
-        # returns the index of entity in the squad based on the active entities. Basically counting the
-        # number of active entities till reaching the requested one and returning the count
-        return next(
-            (i for i, e1 in enumerate(self.active_iter()) if e1 == entity), None
-        )
+    def get_leader(self) -> Optional[MovableEntity]:
+        return self.roster.leader()
+
+    def count(self) -> int:
+        return len(self.roster)
+
+    def get_index_of_entity(self, entity: MovableEntity) -> Optional[int]:
+        # the index of entity among the active entities
+        index: Optional[int] = self.roster.index_of(entity)
+        return index
 
-    def get_entity_by_index(self, index):
-        if index < 0:
-            return None
-        return next((e1 for i, e1 in enumerate(self.active_iter()) if i == index), None)
+    def get_entity_by_index(self, index: int) -> Optional[MovableEntity]:
+        return self.roster.at(index)
+
+    def slot_index(self, entity: MovableEntity) -> Optional[int]:
+        """The formation slot of entity, its active index unless there is a slot_assignment"""
+        if self.slot_assignment is not None:
+            slot: Optional[int] = self.slot_assignment.slot_of(self, entity)
+            return slot
+        return self.get_index_of_entity(entity)
 
     def _get_position_delta(self, entity):
         if self.formation is None:
             return Vector.zero()
-        index = self.get_index_of_entity(entity)
+        index = self.slot_index(entity)
         if index is not None:
+            self.formation.fit(self.count())
             return self.formation.entity_position(index)
         return Vector.zero()
 
+    def slot_offsets(self) -> FloatArray:
+        """The formation offset of every active member (in active_iter order), N x 2"""
+        count = self.count()
+        if self.formation is None:
+            return np.zeros((count, 2))
+        self.formation.fit(count)
+        if self.slot_assignment is None:
+            return self.formation.entity_positions(np.arange(count))
+        return self.formation.entity_positions(
+            [self.slot_index(e) for e in self.roster.active]
+        )
+
     def get_position_delta(self, entity, from_entity=None):
         return self._get_position_delta(entity) - (
             Vector.zero()
@@ -56,17 +167,141 @@ class Squad:
 
     def get_member_in_front_of(self, entity):
         # return the entity in front of the given entity, which means the entity in index-1 of the given entity index
-        # not a very efficient implementation since we traverse the list twice inside of just once
         index = self.get_index_of_entity(entity)
         return None if index is None else self.get_entity_by_index(index - 1)
 
+    def max_step(self, dt: float) -> float:
+        """Farthest a member can move in a tick of dt - velocities are capped at max_speed
+        times the speed multiplier, which goes up to follow_velocity_multiplier"""
+        top = max((e.max_speed for e in self.roster.active), default=0.0)
+        return float(top * max(1.0, follow_velocity_multiplier) * dt)
+
+    def synced_spatial_hash(self) -> SpatialHash:
+        """spatial_hash, up to date with the current positions of the active members.
+
+        During update_squad_behaviour the grid is kept up to date incrementally as members
+        move, outside of it the grid is synced on every call.
+        """
+        if not self._updating:
+            self.spatial_hash.sync(self.entities)
+        return self.spatial_hash
+
+    def separation_neighbours(self, entity: MovableEntity) -> List[MovableEntity]:
+        """Members that may be within separation_radius of entity (its Verlet list)"""
+        if not self._updating:
+            self.spatial_hash.sync(self.entities)
+            self.neighbour_lists.check()
+        neighbours: List[MovableEntity] = self.neighbour_lists.neighbours(entity)
+        return neighbours
+
     def update_squad_behaviour(self, dt: float):
         if self.squad_behaviour is None:
             return
+        res = self.run_behaviour(dt)
+        self.update_members(dt)
+        self.end_behaviour(res)
 
-        res = self.squad_behaviour(False, dt)
-        for e in self.active_iter():
-            e.update_steer_behaviour(dt)
+    # The phases of update_squad_behaviour, steer.world.World runs each phase for all of
+    # its squads before the next one
+
+    def run_behaviour(self, dt: float) -> CondRes:
+        """The squad behaviour decides the members steering, met without a squad_behaviour"""
+        behaviour = self.squad_behaviour
+        if behaviour is None:
+            return CondRes(CondRes.met)
+        self.follow_assignment.elapsed += dt
+        return behaviour(False, dt)
 
+    def update_members(self, dt: float) -> None:
+        """Every active member evaluates its steering force and moves.
+
+        Reads and writes the state of this squad's members only (other squads are seen
+        through the neighbour_index snapshot), so squads can be updated in parallel.
+        """
+        if self.impostor is not None and self._update_impostor(dt):
+            return
+        grid = self.spatial_hash
+        grid.sync(self.entities)
+        self.neighbour_lists.check(self.max_step(dt))
+        self._updating = True
+        try:
+            if self.lod is None:
+                for e in self.active_iter():
+                    e.update_steer_behaviour(dt)
+                    pos = e.pos
+                    grid.move(e, pos)
+                    self.neighbour_lists.moved(e, pos)
+            else:
+                self._update_with_lod(self.lod, dt)
+        finally:
+            self._updating = False
+
+    def end_behaviour(self, res: CondRes) -> None:
+        """Drop the squad behaviour once it is done"""
         if res != CondRes(CondRes.not_met):
             self.squad_behaviour = None
+
+    def _update_impostor(self, dt: float) -> bool:
+        # Switches between full simulation and aggregate mode, True when the squad was
+        # updated as an aggregate
+        leader = self.get_leader()
+        impostor = self.impostor
+        if leader is None or impostor is None:
+            return False
+        stats = self.impostor_stats
+        stats.start_tick()
+        aggregate = impostor.aggregate(leader.pos, self.aggregate)
+        if aggregate != self.aggregate:
+            self.aggregate = aggregate
+            stats.switched(aggregate)
+        if not aggregate:
+            return False
+        leader.update_steer_behaviour(dt)
+        stats.count(self.place_members())
+        return True
+
+    def place_members(self) -> int:
+        """Put the followers at their formation slots around the leader (aggregate mode).
+
+        They take the leader's velocity and heading, so when the squad expands back they
+        carry on from there. The followers have to be in the leader's world. Returns the
+        number of followers placed.
+        """
+        active = self.roster.active
+        if len(active) < 2:
+            return 0
+        leader = active[0]
+        world = leader.world
+        offsets = self.slot_offsets()
+        relative = offsets[1:] - offsets[0]
+        rotation = leader.formation_rotation()
+        leader_pos = leader.pos
+        rows = np.array([e.row for e in active[1:]], dtype=np.intp)
+        world.prev_pos[rows] = world.pos[rows]
+        pos = world.pos
+        pos[rows, 0] = (
+            relative[:, 0] * rotation.cos - relative[:, 1] * rotation.sin + leader_pos.x
+        )
+        pos[rows, 1] = (
+            relative[:, 0] * rotation.sin + relative[:, 1] * rotation.cos + leader_pos.y
+        )
+        world.velocity[rows] = world.velocity[leader.row]
+        world.rotation[rows] = world.rotation.item(leader.row)
+        return len(rows)
+
+    def _update_with_lod(self, lod: LodPolicy, dt: float):
+        stats = self.lod_stats
+        stats.start_tick()
+        tick = stats.ticks
+        for e in self.active_iter():
+            interval = lod.interval(e.pos)
+            # the row spreads the evaluations of a band over the ticks
+            if interval == 1 or (tick + e.row) % interval == 0:
+                e.update_steer_behaviour(dt)
+                stats.count(True)
+            else:
+                e.dead_reckon(dt)
+                stats.count(False)
+            pos = e.pos
+            self.spatial_hash.move(e, pos)
+            self.neighbour_lists.moved(e, pos)
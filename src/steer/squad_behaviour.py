@@ -2,8 +2,10 @@ from __future__ import annotations
 
 import math
 import random
+from typing import Any
 from typing import Callable
 
+from infra.tick_timers import TickTimers
 from infra.vmath import Rect
 from infra.vmath import Vector
 from steer.globals import path_leader_seek_radius
@@ -18,6 +20,8 @@ from steer.path import patrol_path
 from steer.path import shift_path
 from steer.path import spiral_path
 from steer.path import v_path
+from steer.squad import FollowerSlots
+from steer.squad import FollowKey
 from steer.squad import Squad
 from steer.squad import SquadForceFunc
 from steer.squad_behaviour_condition import CondRes
@@ -29,19 +33,37 @@ from steer.steer_behaviour import path as steer_path
 from steer.steer_behaviour import PathBehaviourWhenDone
 from steer.steer_behaviour import seek
 from steer.steer_behaviour import separation
+from steer.steer_behaviour import separation_from_others
 from steer.steer_behaviour import SteeringForce
 from steer.steer_behaviour import wander as steer_wander
+from steer.steer_compiler import compile_force
 
 # from typing import Optional
 # from typing import Tuple
 
 
 class SquadBehaviour:
+    # The combinators record how a behaviour was built (op, operands), so that
+    # steer.behaviour_compiler can flatten the tree
+    op_leaf = 'leaf'
+    op_or = 'or'  # operands: (left behaviour, right behaviour)
+    op_and = 'and'  # operands: (left behaviour, right behaviour)
+    op_then = 'then'  # operands: (left behaviour, right behaviour) - see __rshift__
+    op_check = 'check'  # operands: (condition,) - see zero_behaviour
+    op_loop = 'loop'  # operands: (condition, behaviour) - see loop_ex
+    op_repeat = 'repeat'  # operands: (condition, behaviour, times) - see repeat_ex
+
     def __init__(
-        self, _f: SquadForceFunc | None = None, _debug_path: Path | None = None
+        self,
+        _f: SquadForceFunc | None = None,
+        _debug_path: Path | None = None,
+        op: str = op_leaf,
+        operands: tuple[Any, ...] = (),
     ):
         self.f = _f
         self._debug_path = _debug_path
+        self.op = op
+        self.operands = operands
 
     def __call__(self, restart: bool, dt: float):
         if self.f is not None:
@@ -83,7 +105,9 @@ class SquadBehaviour:
 
             return CondRes(CondRes.not_met)
 
-        return SquadBehaviour(squad_force)
+        return SquadBehaviour(
+            squad_force, op=SquadBehaviour.op_or, operands=(self, other)
+        )
 
     def __rshift__(self, other: SquadBehaviour) -> SquadBehaviour:
         self_cond_met: CondRes = CondRes(CondRes.not_met)
@@ -105,7 +129,9 @@ class SquadBehaviour:
             self_cond_met = self(restart, dt)
             return CondRes(CondRes.not_met)
 
-        return SquadBehaviour(squad_force)
+        return SquadBehaviour(
+            squad_force, op=SquadBehaviour.op_then, operands=(self, other)
+        )
 
     def __add__(self, other: SquadBehaviour) -> SquadBehaviour:
         return self >> other
@@ -151,7 +177,9 @@ class SquadBehaviour:
 
             return CondRes(CondRes.not_met)
 
-        return SquadBehaviour(squad_force)
+        return SquadBehaviour(
+            squad_force, op=SquadBehaviour.op_and, operands=(self, other)
+        )
 
 
 def is_new_leader(
@@ -200,8 +228,52 @@ def set_leader_steer(
 def set_entities_follow_target(
     squad: Squad, leader: MovableEntity, follow_front_entity: bool
 ):
-    for entity in squad.active_iter():
+    # Roster versioned: does nothing when the assignment is still current, else only
+    # reassigns the members whose slot, front member (or its slot) changed - the others
+    # keep their steering force
+    state = squad.follow_assignment
+    state.calls += 1
+    formation = squad.formation
+    if formation is not None:
+        formation.fit(squad.count())
+    key: FollowKey = (
+        squad.roster.version,
+        leader,
+        follow_front_entity,
+        formation,
+        None if formation is None else formation.version,
+        squad.neighbour_index,
+        squad.slot_assignment,
+    )
+    if key == state.key:
+        state.skipped += 1
+        return
+    active = squad.roster.active.copy()
+    slots = (
+        list(range(len(active)))
+        if squad.slot_assignment is None
+        else [squad.slot_index(e) for e in active]
+    )
+    same = state.key is not None and key[1:] == state.key[1:]
+    previous = state.assigned if same else {}
+    state.key = key
+    state.assigned = {}
+    leader_slot = squad.slot_index(leader)
+
+    for index, entity in enumerate(active):
         if entity is not leader:
+            if follow_front_entity is True:
+                front = active[index - 1] if index > 0 else None
+                assignment: FollowerSlots = (
+                    front,
+                    slots[index],
+                    None if front is None else slots[index - 1],
+                )
+            else:
+                assignment = (leader, slots[index], leader_slot)
+            state.assigned[entity] = assignment
+            if previous.get(entity) == assignment:
+                continue
             formation_vector = Vector.zero()
             if follow_front_entity is True:
                 entity_in_front = squad.get_member_in_front_of(entity)
@@ -212,7 +284,13 @@ def set_entities_follow_target(
                 formation_vector = squad.get_position_delta(entity, leader)
                 entity.target = leader
 
-            entity.steer_force = follow(formation_vector) + (separation(squad) * 0.5)
+            force = follow(formation_vector) + (separation(squad) * 0.5)
+            if squad.neighbour_index is not None:
+                force = force + (
+                    separation_from_others(squad.neighbour_index, squad) * 0.5
+                )
+            entity.steer_force = compile_force(force)
+            state.reassigned += 1
 
 
 restart_definition = Callable[[], None]
@@ -238,7 +316,7 @@ def zero_behaviour(cond: SquadBehaviourCondition) -> SquadBehaviour:
 
         return check_condition(restart, dt=dt, cond=cond, res_def=res_def)
 
-    return SquadBehaviour(squad_force)
+    return SquadBehaviour(squad_force, op=SquadBehaviour.op_check, operands=(cond,))
 
 
 def loop_ex(
@@ -259,11 +337,13 @@ def loop_ex(
             loop_behaviour(True, 0)
         return CondRes(CondRes.not_met)
 
-    return SquadBehaviour(squad_force)
+    return SquadBehaviour(
+        squad_force, op=SquadBehaviour.op_loop, operands=(cond, loop_behaviour)
+    )
 
 
 def loop(loop_behaviour: SquadBehaviour) -> SquadBehaviour:
-    return loop_ex(infinite_behaviour_condition, loop_behaviour)
+    return loop_ex(infinite_behaviour_condition(), loop_behaviour)
 
 
 def repeat_ex(
@@ -291,17 +371,25 @@ def repeat_ex(
             repeat_behaviour(True, 0)
         return CondRes(CondRes.not_met)
 
-    return SquadBehaviour(squad_force)
+    return SquadBehaviour(
+        squad_force,
+        op=SquadBehaviour.op_repeat,
+        operands=(cond, repeat_behaviour, times),
+    )
 
 
 def repeat(repeat_behaviour: SquadBehaviour, times: int) -> SquadBehaviour:
-    return repeat_ex(infinite_behaviour_condition, repeat_behaviour, times)
+    return repeat_ex(infinite_behaviour_condition(), repeat_behaviour, times)
 
 
 def do_while(
-    left: SquadBehaviour, delay: float, right: SquadBehaviour
+    left: SquadBehaviour,
+    delay: float,
+    right: SquadBehaviour,
+    timers: TickTimers | None = None,
 ) -> SquadBehaviour:
-    return left or loop(zero_behaviour(time_elapsed(delay)) >> right)
+    """left, and every delay seconds right, until left is done"""
+    return left | loop(zero_behaviour(time_elapsed(delay, timers)) >> right)
 
 
 def wander(squad, xymin, width, height):
@@ -348,6 +436,7 @@ def path(
 ) -> SquadBehaviour:
     leader: MovableEntity | None = None
     weak_squad = squad
+    na_waypoint = Waypoint.NAWaypoint()
 
     def squad_force(restart: bool, dt: float) -> CondRes:
         nonlocal leader, weak_squad
@@ -360,6 +449,7 @@ def path(
         if res != CondRes(CondRes.not_met):
             return res
 
+        # the path force is only used when there's no leader yet, don't build one every tick
         (leader, cond_res) = set_leader_steer(
             leader,
             weak_squad,
@@ -367,8 +457,10 @@ def path(
                 path,
                 PathBehaviourWhenDone(PathBehaviourWhenDone.return_to_beginning),
                 path_leader_seek_radius,
-            ),
-            Waypoint.NAWaypoint(),
+            )
+            if leader is None
+            else leader.steer_force,
+            na_waypoint,
             follow_front,
         )
         return cond_res
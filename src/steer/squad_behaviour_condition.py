@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 from typing import Callable
+from typing import Optional
 
+from infra.tick_timers import TickTimers
 from infra.vmath import did_reach_target
 from infra.vmath import Vector
 from steer.globals import path_target_radius
@@ -84,7 +86,32 @@ class SquadBehaviourCondition:
         return SquadBehaviourCondition(check=squad_cond)
 
 
-def time_elapsed(time: float) -> SquadBehaviourCondition:
+class TimedCondition(SquadBehaviourCondition):
+    """A condition that is met from a tick of the TickTimers on, instead of polling dt.
+
+    wake_tick is the tick it is met at, None until the first check after a restart (or
+    never, infinite_behaviour_condition has no timers). A behaviour that is only waiting
+    on timed conditions can sleep until then (see CompiledSquadBehaviour.wake_tick and
+    World).
+    """
+
+    def __init__(self, check: check_func, timers: Optional[TickTimers]) -> None:
+        super().__init__(check)
+        self.timers = timers
+        self.wake_tick: Optional[int] = None
+
+
+def time_elapsed(
+    time: float, timers: Optional[TickTimers] = None
+) -> SquadBehaviourCondition:
+    """Met once time has passed since the first check (after a restart).
+
+    With timers, the tick it is met at is worked out on the first check (assuming the
+    following steps have the same dt) and the later checks only compare ticks. Either
+    way it is met on the same step, as long as it's checked on every step until then.
+    """
+    if timers is not None:
+        return _timed_elapsed(time, timers)
     elapsed: float = 0.0
 
     def squad_cond(restart: bool, dt: float) -> CondRes:
@@ -100,11 +127,28 @@ def time_elapsed(time: float) -> SquadBehaviourCondition:
     return SquadBehaviourCondition(check=squad_cond)
 
 
+def _timed_elapsed(time: float, timers: TickTimers) -> TimedCondition:
+    def squad_cond(restart: bool, dt: float) -> CondRes:
+        if restart is True:
+            cond.wake_tick = None
+            return CondRes(CondRes.not_met)
+        if cond.wake_tick is None:
+            # this check counts as the first step
+            cond.wake_tick = timers.now + timers.ticks_for(time, dt) - 1
+        if timers.now >= cond.wake_tick:
+            return CondRes(CondRes.met)
+        return CondRes(CondRes.not_met)
+
+    cond = TimedCondition(squad_cond, timers)
+    return cond
+
+
 def infinite_behaviour_condition() -> SquadBehaviourCondition:
     def squad_cond(_: bool, __: float) -> CondRes:
         return CondRes(CondRes.not_met)
 
-    return SquadBehaviourCondition(check=squad_cond)
+    # never met, so it doesn't keep a behaviour waiting on time awake
+    return TimedCondition(squad_cond, None)
 
 
 def zero_behaviour_condition() -> SquadBehaviourCondition:
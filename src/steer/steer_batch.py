@@ -0,0 +1,303 @@
+"""Array versions of the primitive steering behaviours.
+
+Each kernel takes the state of N entities (and their targets) as arrays and returns the
+steering forces (Nx2) and the speed_mul_target each entity would get (N), computed in a
+single numpy pass. The formulas are the ones of steer.steer_behaviour, so a kernel row
+matches calling the scalar force for that entity.
+
+Targets may be shared (a single Vector / shape (2,) point) or per entity (Nx2), the
+scalar parameters (max_force, force_mul, slow_radius) may also be given per entity.
+"""
+from __future__ import annotations
+
+import math
+from typing import Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from infra.vmath import as_points
+from infra.vmath import FloatArray
+from infra.vmath import PointsLike
+from steer.entity_world import EntityWorld
+from steer.entity_world import IndexArray
+from steer.globals import ahead_search_time
+from steer.globals import flock_radius
+from steer.globals import obstacle_margin
+from steer.globals import seek_near_velocity_multiplier
+from steer.globals import seek_near_velocity_power
+from steer.globals import separation_added_force_magnitude
+from steer.globals import separation_radius
+from steer.globals import wander_divider
+from steer.globals import wander_radius
+from steer.obstacles import ObstacleBVH
+
+SteeringBatch = Tuple[FloatArray, FloatArray]  # (forces Nx2, speed_mul_target N)
+
+
+def _angle_between(v1: FloatArray, v2: FloatArray) -> FloatArray:
+    # vmath.angle_between row by row, 0 when one of the vectors is zero
+    len_mul = np.sqrt(v1[:, 0] * v1[:, 0] + v1[:, 1] * v1[:, 1]) * np.sqrt(
+        v2[:, 0] * v2[:, 0] + v2[:, 1] * v2[:, 1]
+    )
+    dot = v1[:, 0] * v2[:, 0] + v1[:, 1] * v2[:, 1]
+    safe = np.where(len_mul == 0, 1.0, len_mul)
+    angle = np.arccos(np.clip(dot / safe, -1, 1))
+    return np.where(len_mul == 0, 0.0, angle)
+
+
+def seek_batch(
+    pos: PointsLike,
+    velocity: PointsLike,
+    target_pos: PointsLike,
+    max_force: float | npt.ArrayLike,
+    force_mul: float | npt.ArrayLike = 1.0,
+    slow_radius: float | npt.ArrayLike = 0.0,
+) -> SteeringBatch:
+    """steer_behaviour.seek(slow_radius) for N entities"""
+    p = as_points(pos)
+    v = np.broadcast_to(as_points(velocity), p.shape)
+    desired = np.broadcast_to(as_points(target_pos), p.shape) - p
+    distance = np.sqrt(desired[:, 0] * desired[:, 0] + desired[:, 1] * desired[:, 1])
+    target_force = np.asarray(max_force, dtype=np.float64) * np.asarray(
+        force_mul, dtype=np.float64
+    )
+
+    abp = ((math.pi - _angle_between(v, desired)) / math.pi) ** seek_near_velocity_power
+    speed_mul_target = abp * seek_near_velocity_multiplier + (
+        1 - seek_near_velocity_multiplier
+    )
+    speed_mul_target = np.where(
+        distance < slow_radius,
+        speed_mul_target * seek_near_velocity_multiplier,
+        speed_mul_target,
+    )
+    with np.errstate(divide='ignore'):
+        n = np.where(distance > 0, 1 / distance, 0.0)
+    force = desired * n[:, None]
+    force *= np.broadcast_to(target_force, distance.shape)[:, None]
+    return force, speed_mul_target
+
+
+def flee_batch(
+    pos: PointsLike,
+    velocity: PointsLike,
+    target_pos: PointsLike,
+    max_force: float | npt.ArrayLike,
+    force_mul: float | npt.ArrayLike = 1.0,
+) -> SteeringBatch:
+    """steer_behaviour.flee() for N entities"""
+    force, speed_mul_target = seek_batch(
+        pos, velocity, target_pos, max_force, force_mul
+    )
+    force *= -1
+    return force, speed_mul_target
+
+
+def future_pos_batch(
+    pos: PointsLike,
+    target_pos: PointsLike,
+    target_velocity: PointsLike,
+    max_force: float | npt.ArrayLike,
+) -> FloatArray:
+    """Where the pursuit / evade target is predicted to be (target_in_future)"""
+    p = as_points(pos)
+    t = np.broadcast_to(as_points(target_pos), p.shape)
+    delta = t - p
+    time = np.sqrt(delta[:, 0] * delta[:, 0] + delta[:, 1] * delta[:, 1]) / max_force
+    return t + np.broadcast_to(as_points(target_velocity), p.shape) * time[:, None]
+
+
+def pursuit_batch(
+    pos: PointsLike,
+    velocity: PointsLike,
+    target_pos: PointsLike,
+    target_velocity: PointsLike,
+    max_force: float | npt.ArrayLike,
+    force_mul: float | npt.ArrayLike = 1.0,
+) -> SteeringBatch:
+    """steer_behaviour.pursuit() for N entities"""
+    future = future_pos_batch(pos, target_pos, target_velocity, max_force)
+    return seek_batch(pos, velocity, future, max_force, force_mul)
+
+
+def evade_batch(
+    pos: PointsLike,
+    velocity: PointsLike,
+    target_pos: PointsLike,
+    target_velocity: PointsLike,
+    max_force: float | npt.ArrayLike,
+    force_mul: float | npt.ArrayLike = 1.0,
+) -> SteeringBatch:
+    """steer_behaviour.evade() for N entities"""
+    future = future_pos_batch(pos, target_pos, target_velocity, max_force)
+    return flee_batch(pos, velocity, future, max_force, force_mul)
+
+
+def neighbour_pairs(
+    pos: PointsLike, radius: float
+) -> tuple[IndexArray, IndexArray, FloatArray, FloatArray]:
+    """Every ordered pair (i, j), i != j, of points closer than radius.
+
+    Returns i, j, the deltas pos[j] - pos[i] (Nx2) and the distances. The points are
+    bucketed in a grid of radius cells (one sort), each point is paired with the points
+    of the 3x3 cells around it.
+    """
+    p = as_points(pos)
+    n = len(p)
+    if n == 0:
+        empty = np.zeros(0, dtype=np.intp)
+        return empty, empty, np.zeros((0, 2)), np.zeros(0)
+    cells = np.floor(p / radius).astype(np.int64)
+    cells -= cells.min(axis=0) - 1  # a free column / row around, for the offsets below
+    width = int(cells[:, 1].max()) + 2
+    keys = cells[:, 0] * width + cells[:, 1]
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    points = np.arange(n)
+    all_i = []
+    all_j = []
+    for ox in (-1, 0, 1):
+        for oy in (-1, 0, 1):
+            neighbour_keys = keys + (ox * width + oy)
+            start = np.searchsorted(sorted_keys, neighbour_keys, 'left')
+            count = np.searchsorted(sorted_keys, neighbour_keys, 'right') - start
+            total = int(count.sum())
+            if total == 0:
+                continue
+            i = np.repeat(points, count)
+            # position of each pair within the run of its point
+            run_start = np.repeat(np.cumsum(count) - count, count)
+            all_i.append(i)
+            all_j.append(order[np.repeat(start, count) + np.arange(total) - run_start])
+    i = np.concatenate(all_i)
+    j = np.concatenate(all_j)
+    delta = p[j] - p[i]
+    distance = np.sqrt(delta[:, 0] * delta[:, 0] + delta[:, 1] * delta[:, 1])
+    keep = (i != j) & (distance < radius)
+    return i[keep], j[keep], delta[keep], distance[keep]
+
+
+def _normalized(v: FloatArray) -> FloatArray:
+    ln = np.sqrt(v[:, 0] * v[:, 0] + v[:, 1] * v[:, 1])
+    with np.errstate(divide='ignore'):
+        n = np.where(ln > 0, 1 / ln, 0.0)
+    return v * n[:, None]
+
+
+def flocking_batch(
+    pos: PointsLike,
+    velocity: PointsLike,
+    max_force: float | npt.ArrayLike,
+    force_mul: float | npt.ArrayLike = 1.0,
+    separation_weight: float = 1.0,
+    alignment_weight: float = 1.0,
+    cohesion_weight: float = 1.0,
+    radius: float = flock_radius,
+) -> FloatArray:
+    """steer_behaviour.flocking for N entities (every one of them is a flock member)"""
+    p = as_points(pos)
+    v = np.broadcast_to(as_points(velocity), p.shape)
+    n = len(p)
+    i, j, delta, distance = neighbour_pairs(p, radius)
+    near = distance > 0.01
+    i = i[near]
+    j = j[near]
+    delta = delta[near]
+    distance = distance[near]
+
+    count = np.bincount(i, minlength=n).astype(np.float64)
+    has = count > 0
+    safe_count = np.where(has, count, 1.0)[:, None]
+
+    def gather(values: FloatArray, rows: IndexArray) -> FloatArray:
+        return np.column_stack(
+            (
+                np.bincount(rows, weights=values[:, 0], minlength=n),
+                np.bincount(rows, weights=values[:, 1], minlength=n),
+            )
+        )
+
+    close = distance < separation_radius
+    count_separation = np.bincount(i[close], minlength=n).astype(np.float64)
+    separation = (
+        gather(delta[close], i[close]) / -np.maximum(count_separation, 1)[:, None]
+    )
+    force = _normalized(separation) * (
+        separation_added_force_magnitude * separation_weight
+    )
+
+    target_force = np.broadcast_to(
+        np.asarray(max_force, dtype=np.float64)
+        * np.asarray(force_mul, dtype=np.float64),
+        (n,),
+    )[:, None]
+    alignment = gather(v[j], i) / safe_count - v
+    force += _normalized(alignment) * (target_force * alignment_weight)
+    cohesion = gather(p[j], i) / safe_count - p
+    force += _normalized(cohesion) * (target_force * cohesion_weight)
+    force[~has] = 0.0
+    return force
+
+
+def obstacle_avoidance_batch(
+    obstacles: ObstacleBVH,
+    pos: PointsLike,
+    velocity: PointsLike,
+    max_force: float | npt.ArrayLike,
+    force_mul: float | npt.ArrayLike = 1.0,
+    margin: float = obstacle_margin,
+) -> FloatArray:
+    """steer_behaviour.obstacle_avoidance for N entities, one batched BVH query"""
+    p = as_points(pos)
+    ahead = np.broadcast_to(as_points(velocity), p.shape) * ahead_search_time
+    t, hit = obstacles.segment_query_batch(p, p + ahead, margin)
+    force = np.zeros_like(p)
+    rows = np.flatnonzero(hit >= 0)
+    if len(rows):
+        points = p[rows] + ahead[rows] * t[rows, None]
+        away = _normalized(obstacles.away_batch(hit[rows], points))
+        target_force = np.broadcast_to(
+            np.asarray(max_force, dtype=np.float64)
+            * np.asarray(force_mul, dtype=np.float64),
+            (len(p),),
+        )
+        force[rows] = away * target_force[rows, None]
+    return force
+
+
+def wander_batch(world: EntityWorld, rows: IndexArray) -> FloatArray:
+    """steer_behaviour.wander for the (distinct) rows, advances their wander_angle.
+
+    Draws from the same per entity random streams, so it gives the same forces and
+    angles as calling the scalar force entity by entity, in any order.
+    """
+    wander_angle_change = math.pi / wander_divider
+    circle_center = _normalized(world.velocity[rows]) * (wander_radius * 2)
+    angle = world.wander_angle[rows]
+    displacement = np.stack((np.cos(angle), np.sin(angle)), axis=1) * wander_radius
+    world.wander_angle[rows] = angle + (
+        world.uniform_batch(rows) * wander_angle_change - wander_angle_change * 0.5
+    )
+    return circle_center + displacement
+
+
+def world_state(world: EntityWorld, rows: IndexArray) -> tuple[FloatArray, ...]:
+    """(pos, velocity, max_force, force_mul) of the rows, the common kernel arguments"""
+    return (
+        world.pos[rows],
+        world.velocity[rows],
+        world.max_force[rows],
+        world.force_mul[rows],
+    )
+
+
+def apply_steering(world: EntityWorld, rows: IndexArray, batch: SteeringBatch) -> None:
+    """Store a kernel result as the rows force and speed_mul_target.
+
+    Call between EntityWorld.begin_step and EntityWorld.integrate, like the force
+    function is called inside MovableEntity.update_steer_behaviour.
+    """
+    force, speed_mul_target = batch
+    world.force[rows] = force
+    world.speed_mul_target[rows] = speed_mul_target
@@ -1,17 +1,19 @@
 from __future__ import annotations
 
 import math
-import random
+from typing import Any
 from typing import Callable
 
 from infra.vmath import angle_between
 from infra.vmath import did_reach_target
+from infra.vmath import distance as vdistance
 from infra.vmath import Vector
-from steer.formation import Formation
 from steer.globals import ahead_check_radius
 from steer.globals import ahead_search_time
+from steer.globals import flock_radius
 from steer.globals import follow_slow_radius
 from steer.globals import follow_velocity_multiplier
+from steer.globals import obstacle_margin
 from steer.globals import path_target_radius
 from steer.globals import seek_near_velocity_multiplier
 from steer.globals import seek_near_velocity_power
@@ -22,6 +24,9 @@ from steer.globals import wander_radius
 from steer.movable_entity import MovableEntity
 from steer.movable_entity import Targetable
 from steer.movable_entity import Waypoint
+from steer.neighbour_index import NeighbourFilter
+from steer.neighbour_index import NeighbourIndex
+from steer.obstacles import ObstacleBVH
 from steer.path import Path
 from steer.squad import Squad
 
@@ -29,8 +34,21 @@ SteeringForceFunc = Callable[[MovableEntity, Targetable], Vector]
 
 
 class SteeringForce:
-    def __init__(self, f: SteeringForceFunc | None = None):
+    # How a force was built, kept so steer_compiler can flatten composed forces
+    op_leaf = 'leaf'
+    op_add = 'add'  # operands: (left force, right force)
+    op_mul = 'mul'  # operands: (force, scalar)
+    op_chain = 'chain'  # operands: (left force, right force) - see __ge__
+
+    def __init__(
+        self,
+        f: SteeringForceFunc | None = None,
+        op: str = op_leaf,
+        operands: tuple[Any, ...] = (),
+    ):
         self.f = f
+        self.op = op
+        self.operands = operands
 
     def __call__(self, entity: MovableEntity, target: Waypoint) -> Vector:
         if self.f is not None:
@@ -41,25 +59,26 @@ class SteeringForce:
         def steering_force(entity: MovableEntity, waypoint: Waypoint) -> Vector:
             return self(entity, waypoint) + other(entity, waypoint)
 
-        return SteeringForce(steering_force)
+        return SteeringForce(steering_force, SteeringForce.op_add, (self, other))
 
     def __mul__(self, scalar: float) -> SteeringForce:
         def steering_force(entity: MovableEntity, waypoint: Waypoint) -> Vector:
             return self(entity, waypoint) * scalar
 
-        return SteeringForce(steering_force)
+        return SteeringForce(steering_force, SteeringForce.op_mul, (self, scalar))
 
+    # left >= right: right computes a position, left is evaluated against a waypoint
+    # at that position (moving with the original target velocity)
     def __ge__(
         left: SteeringForce, right: SteeringForce  # noqa: N805
     ) -> SteeringForce:
+        w = Waypoint()  # reused by every call
+
         def steering_force(entity, target) -> Vector:
             right_pos = right(entity, target)
-            w = Waypoint()
-            w.pos = right_pos
-            w.velocity = target.velocity
-            return left(entity, w)
+            return left(entity, w.reset(right_pos, target.velocity))
 
-        return SteeringForce(steering_force)
+        return SteeringForce(steering_force, SteeringForce.op_chain, (left, right))
 
 
 def target_in_future(target_position: Vector, velocity: Vector, t: float) -> Vector:
@@ -74,7 +93,7 @@ def seek(slow_radius: float) -> SteeringForce:
     def steering_force(entity: MovableEntity, waypoint: Waypoint) -> Vector:
         desired_vector = waypoint.pos - entity.pos
         distance = desired_vector.length()
-        target_force = entity.max_force * entity._force_mul
+        target_force = entity.max_force * entity.force_mul
 
         abp = (
             (math.pi - angle_between(entity.velocity, desired_vector)) / math.pi
@@ -85,23 +104,23 @@ def seek(slow_radius: float) -> SteeringForce:
         if distance < slow_radius:
             entity.speed_mul_target *= seek_near_velocity_multiplier
         #     # target_force = max(target_force * (distance / slow_radius), target_force * .5)
-        return desired_vector.normalize() * target_force
+        return desired_vector.normalize_().imul(target_force)
 
     return SteeringForce(steering_force)
 
 
 def wander() -> SteeringForce:
+    """Random walk, the angle lives in the entity (wander_angle) and moves by a draw from
+    the entity's own random stream, so a run replays the same for the same seeds"""
     wander_angle_change = math.pi / wander_divider
-    wander_angle = 0.0
 
     def steering_force(entity: MovableEntity, waypoint: Waypoint) -> Vector:
-        nonlocal wander_angle
-        nonlocal wander_angle_change
         circle_center = entity.velocity.normalize() * (wander_radius * 2)
         displacement = Vector(0, -1) * wander_radius
+        wander_angle = entity.wander_angle
         displacement = displacement.set_angle(wander_angle)
-        wander_angle += (
-            random.uniform(0, wander_angle_change) - wander_angle_change * 0.5
+        entity.wander_angle = wander_angle + (
+            entity.random() * wander_angle_change - wander_angle_change * 0.5
         )
         return circle_center + displacement
 
@@ -136,15 +155,19 @@ def evade() -> SteeringForce:
 
 # TODO: Need to write test
 def follow(distance) -> SteeringForce:
+    slot = Waypoint()  # reused by every call
+    evade_force = evade()
+    seek_force = seek(follow_slow_radius)
+
     def steering_force(entity: MovableEntity, target: MovableEntity):
-        rot = target.rotation - math.pi
-        shaped_distance = target.shift(Formation.rotate(distance, rot)).pos
-        ahead = shaped_distance + target.velocity * ahead_search_time
+        shaped_distance = target.formation_rotation().apply(distance).iadd(target.pos)
+        ahead = (target.velocity * ahead_search_time).iadd(shaped_distance)
+        pos = entity.pos
         distance_from_leader = min(
-            (entity.pos - ahead).length(), (entity.pos - shaped_distance).length()
+            vdistance(pos, ahead), vdistance(pos, shaped_distance)
         )
         if distance_from_leader < ahead_check_radius:
-            return evade()(entity, target)
+            return evade_force(entity, target)
         elif distance_from_leader < (ahead_check_radius * 1.5):
             entity.speed_mul_target = 0.7
             entity.force_mul_target = 0.7
@@ -155,25 +178,170 @@ def follow(distance) -> SteeringForce:
             entity.speed_mul_target = follow_velocity_multiplier
             entity.force_mul_target = follow_velocity_multiplier * 4
 
-        return seek(follow_slow_radius)(entity, Waypoint(shaped_distance))
+        return seek_force(entity, slot.reset(shaped_distance))
 
     return SteeringForce(steering_force)
 
 
+def _separation_force(entity: MovableEntity, neighbours: list[MovableEntity]) -> Vector:
+    added_forces = Vector.zero()
+    delta_pos = Vector.zero()
+    count_neighbors = 0
+    pos = entity.pos
+    for e1 in neighbours:
+        if e1 == entity:
+            continue
+        other = e1.pos
+        delta = vdistance(other, pos)
+        if delta < separation_radius and delta > 0.01:
+            added_forces.iadd(delta_pos.set(other.x, other.y).isub(pos))
+            count_neighbors += 1
+    if count_neighbors > 0:
+        added_forces.idiv(count_neighbors).imul(-1)
+        added_forces.normalize_().imul(separation_added_force_magnitude)
+    return added_forces
+
+
+def _separation_from_points(
+    entity: MovableEntity, xs: list[float], ys: list[float]
+) -> Vector:
+    # _separation_force for neighbour coordinates rather than neighbours
+    pos = entity.pos
+    x = pos.x
+    y = pos.y
+    sx = 0.0
+    sy = 0.0
+    count_neighbors = 0
+    for px, py in zip(xs, ys):
+        dx = px - x
+        dy = py - y
+        delta = math.sqrt(dx * dx + dy * dy)
+        if delta < separation_radius and delta > 0.01:
+            sx += dx
+            sy += dy
+            count_neighbors += 1
+    added_forces = Vector(sx, sy)
+    if count_neighbors > 0:
+        added_forces.idiv(count_neighbors).imul(-1)
+        added_forces.normalize_().imul(separation_added_force_magnitude)
+    return added_forces
+
+
 def separation(squad: Squad):
     def steering_force(entity, leader):
-        added_forces = Vector.zero()
-        count_neighbors = 0
-        for e1 in (e1 for e1 in squad.active_iter() if e1 != entity):
-            delta = (e1.pos - entity.pos).length()
-            if delta < separation_radius and delta > 0.01:
-                added_forces += e1.pos - entity.pos
-                count_neighbors += 1
-        if count_neighbors > 0:
-            added_forces = added_forces / count_neighbors
-            added_forces *= -1
-            added_forces = added_forces.normalize() * separation_added_force_magnitude
-        return added_forces
+        return _separation_force(entity, squad.separation_neighbours(entity))
+
+    return SteeringForce(steering_force)
+
+
+def separation_from_others(index: NeighbourIndex, squad: Squad) -> SteeringForce:
+    """separation from the entities of every other squad, as of the last index rebuild.
+
+    Only reads the index snapshot, never the other squads' live state, so the squads can
+    be updated in any order or at the same time (see steer.world).
+    """
+    group = index.register(squad)
+    # reused by every call
+    neighbours: list[MovableEntity] = []
+    xs: list[float] = []
+    ys: list[float] = []
+
+    def steering_force(entity, leader):
+        index.within(
+            entity.pos,
+            separation_radius,
+            neighbours,
+            group,
+            NeighbourFilter.other_squads,
+            exclude=entity,
+            xs=xs,
+            ys=ys,
+        )
+        return _separation_from_points(entity, xs, ys)
+
+    return SteeringForce(steering_force)
+
+
+def flocking(
+    squad: Squad,
+    separation_weight: float = 1.0,
+    alignment_weight: float = 1.0,
+    cohesion_weight: float = 1.0,
+    radius: float = flock_radius,
+) -> SteeringForce:
+    """separation, alignment and cohesion from a single neighbourhood gather.
+
+    Members closer than separation_radius push the entity away (same force as
+    separation), members within radius pull it toward their average velocity
+    (alignment) and their center (cohesion), both at the entity max force.
+    """
+    candidates: list[MovableEntity] = []  # reused by every call
+
+    def steering_force(entity, target):
+        pos = entity.pos
+        separation_x = separation_y = 0.0
+        velocity_x = velocity_y = 0.0
+        center_x = center_y = 0.0
+        count_separation = 0
+        count = 0
+        grid = squad.synced_spatial_hash()
+        for e1 in grid.query(pos, radius, candidates):
+            if e1 == entity:
+                continue
+            pos1 = e1.pos
+            dx = pos1.x - pos.x
+            dy = pos1.y - pos.y
+            delta = math.sqrt(dx * dx + dy * dy)
+            if delta >= radius or delta <= 0.01:
+                continue
+            count += 1
+            center_x += pos1.x
+            center_y += pos1.y
+            velocity1 = e1.velocity
+            velocity_x += velocity1.x
+            velocity_y += velocity1.y
+            if delta < separation_radius:
+                separation_x += dx
+                separation_y += dy
+                count_separation += 1
+
+        force = Vector.zero()
+        if count == 0:
+            return force
+        if count_separation > 0:
+            force.iadd(
+                Vector(separation_x, separation_y)
+                .idiv(-count_separation)
+                .normalize_()
+                .imul(separation_added_force_magnitude * separation_weight)
+            )
+        target_force = entity.max_force * entity.force_mul
+        alignment = Vector(velocity_x, velocity_y).idiv(count).isub(entity.velocity)
+        force.iadd(alignment.normalize_().imul(target_force * alignment_weight))
+        cohesion = Vector(center_x, center_y).idiv(count).isub(pos)
+        force.iadd(cohesion.normalize_().imul(target_force * cohesion_weight))
+        return force
+
+    return SteeringForce(steering_force)
+
+
+def obstacle_avoidance(
+    obstacles: ObstacleBVH, margin: float = obstacle_margin
+) -> SteeringForce:
+    """Steer away from the first obstacle on the feeler pos -> pos + velocity * ahead_search_time.
+
+    margin is the clearance kept from the obstacles. No force when the feeler is clear.
+    """
+
+    def steering_force(entity, target):
+        pos = entity.pos
+        ahead = entity.velocity * ahead_search_time
+        hit = obstacles.segment_query(pos, pos + ahead, margin)
+        if hit is None:
+            return Vector.zero()
+        t, obstacle = hit
+        away = obstacle.away(pos + ahead * t)
+        return away.normalize_().imul(entity.max_force * entity.force_mul)
 
     return SteeringForce(steering_force)
 
@@ -190,6 +358,8 @@ class PathBehaviourWhenDone:
 def path(path: Path, when_done: PathBehaviourWhenDone, radius: float) -> SteeringForce:
     cur_path_index: int = 0
     path_dir: int = 1
+    waypoint = Waypoint()  # the entity target, re-targeted as the path advances
+    seek_force = seek(radius)
 
     def steering_force(entity, leader):
         nonlocal cur_path_index, path_dir
@@ -215,8 +385,8 @@ def path(path: Path, when_done: PathBehaviourWhenDone, radius: float) -> Steerin
 
                 target_pos = path[cur_path_index]
 
-            entity.target = Waypoint(target_pos)
-            return seek(radius)(entity, entity.target)
+            entity.target = waypoint.reset(target_pos)
+            return seek_force(entity, waypoint)
         return Vector.zero()
 
     return SteeringForce(steering_force)
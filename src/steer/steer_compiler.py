@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import math
+from typing import Any
+from typing import List
+from typing import Tuple
+
+from infra.vmath import Vector
+from steer.movable_entity import MovableEntity
+from steer.movable_entity import Waypoint
+from steer.steer_behaviour import SteeringForce
+
+# plan opcodes
+_EVAL = 0  # arg: leaf function, pushes its result
+_EVAL_MUL = 1  # arg: (leaf function, scalar), pushes its scaled result
+_ADD = 2  # pops two results, pushes their sum
+_MUL = 3  # arg: scalar, scales the top result
+_PUSH_TARGET = 4  # arg: Waypoint, pops a position and makes it the current target
+_POP_TARGET = 5  # restores the previous target
+
+Op = Tuple[int, Any]
+
+
+def _is_power_of_two(k: float) -> bool:
+    # multiplying by +-2^n only changes the exponent, so scaling by it commutes
+    # exactly with any other scaling (no rounding in between)
+    return k != 0 and math.isfinite(k) and abs(math.frexp(k)[0]) == 0.5
+
+
+def _emit_mul(plan: List[Op], scalar: float) -> None:
+    if scalar == 1:
+        return  # x * 1 == x exactly
+    if plan:
+        code, arg = plan[-1]
+        if code == _MUL and (_is_power_of_two(arg) or _is_power_of_two(scalar)):
+            plan[-1] = (_MUL, arg * scalar)
+            return
+        if code == _EVAL:
+            plan[-1] = (_EVAL_MUL, (arg, scalar))
+            return
+        if code == _EVAL_MUL and (_is_power_of_two(arg[1]) or _is_power_of_two(scalar)):
+            plan[-1] = (_EVAL_MUL, (arg[0], arg[1] * scalar))
+            return
+    plan.append((_MUL, scalar))
+
+
+def _emit(force: SteeringForce, plan: List[Op]) -> None:
+    op = force.op
+    if op == SteeringForce.op_add:
+        left, right = force.operands
+        _emit(left, plan)
+        _emit(right, plan)
+        plan.append((_ADD, None))
+    elif op == SteeringForce.op_mul:
+        inner, scalar = force.operands
+        _emit(inner, plan)
+        _emit_mul(plan, scalar)
+    elif op == SteeringForce.op_chain:
+        left, right = force.operands
+        _emit(right, plan)
+        plan.append((_PUSH_TARGET, Waypoint()))
+        _emit(left, plan)
+        plan.append((_POP_TARGET, None))
+    elif op == SteeringForce.op_leaf:
+        if force.f is None:
+            raise ValueError('Can not compile a SteeringForce without a function')
+        plan.append((_EVAL, force.f))
+    else:
+        raise ValueError(f'Unknown SteeringForce op {op}')
+
+
+class CompiledSteeringForce(SteeringForce):
+    """A composed SteeringForce flattened into a list of primitive ops.
+
+    Evaluating the plan walks the ops in one loop over a stack of (x, y) floats instead
+    of going through a closure (and an intermediate Vector) per +, * and >= node. The
+    ops do the same float operations in the same order as the closures, so the result
+    is identical. The structure of the source force is kept, so a compiled force can
+    still be composed with others (and compiled again).
+    """
+
+    def __init__(self, source: SteeringForce):
+        super().__init__(None, source.op, source.operands)
+        self.plan: List[Op] = []
+        _emit(source, self.plan)
+        # f is what MovableEntity.update_steer_behaviour and EntityWorld.update call
+        self.f = self._evaluate
+
+    def __call__(self, entity: MovableEntity, target: Waypoint) -> Vector:
+        return self._evaluate(entity, target)
+
+    def _evaluate(self, entity: MovableEntity, target: Waypoint) -> Vector:
+        plan = self.plan
+        if len(plan) == 1:
+            code, arg = plan[0]
+            if code == _EVAL:
+                return arg(entity, target)
+        xs: List[float] = []
+        ys: List[float] = []
+        targets: List[Waypoint] = []
+        for code, arg in plan:
+            if code == _EVAL:
+                v = arg(entity, target)
+                xs.append(v.x)
+                ys.append(v.y)
+            elif code == _EVAL_MUL:
+                v = arg[0](entity, target)
+                xs.append(v.x * arg[1])
+                ys.append(v.y * arg[1])
+            elif code == _ADD:
+                x = xs.pop()
+                y = ys.pop()
+                xs[-1] += x
+                ys[-1] += y
+            elif code == _MUL:
+                xs[-1] *= arg
+                ys[-1] *= arg
+            elif code == _PUSH_TARGET:
+                targets.append(target)
+                target = arg.reset(Vector(xs.pop(), ys.pop()), target.velocity)
+            else:  # _POP_TARGET
+                target = targets.pop()
+        return Vector(xs[0], ys[0])
+
+    def __repr__(self) -> str:
+        return f'CompiledSteeringForce({len(self.plan)} ops)'
+
+
+def compile_force(force: SteeringForce) -> CompiledSteeringForce:
+    """Flatten a composed SteeringForce (+, * and >= trees) into a single plan"""
+    return CompiledSteeringForce(force)
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+
+from infra.vmath import FloatArray
+from infra.vmath import Vector
+from steer.entity_world import EntityWorld
+from steer.entity_world import IndexArray
+from steer.movable_entity import MovableEntity
+from steer.spatial_hash import SpatialHash
+
+
+class VerletLists:
+    """Cached per entity neighbour lists on top of a SpatialHash.
+
+    Each list holds the entities that were within radius + skin of the entity when the
+    lists were built. The distance of a pair changes by at most the difference of their
+    displacements since then, so while every displacement is within skin / 2 of a
+    common shift, every pair that is within radius now is still in the lists and they
+    are reused tick after tick. The shift is the mean displacement - a formation flying
+    across the screen keeps its lists, only the moves relative to each other count. The
+    caller still does the exact distance test on the list entries, with the current
+    positions.
+
+    During a tick some entities already moved and the others didn't, so the spread of
+    the displacements grows by up to a tick's move even for a formation. check() is told
+    how far an entity can move in the tick (max_move), the lists are built with that
+    much more reach on each side, and check() only keeps them when every displacement
+    leaves room for the move - fast ships don't dirty the lists every tick.
+
+    Call check() once per tick (it picks the shift for the tick) and moved() after an
+    entity moved, the lists are rebuilt on the next neighbours() call when needed.
+    rebuilds / checks tells how often that happens - a bigger skin rebuilds less often
+    but makes longer lists. The lists are rebuilt at most once per check, when a skin
+    is too small for the moves of a single tick the rest of the tick queries the grid
+    directly (counted in fallbacks).
+    """
+
+    def __init__(self, grid: SpatialHash, radius: float, skin: float):
+        if skin < 0:
+            raise ValueError('skin must be >= 0')
+        self.grid = grid
+        self.radius = radius
+        self.skin = skin
+        self.rebuilds: int = 0
+        self.checks: int = 0
+        self.fallbacks: int = 0
+        self._rebuilt: bool = False  # rebuilt since the last check
+        self._lists: Dict[MovableEntity, List[MovableEntity]] = {}
+        self._built_at: Dict[MovableEntity, Tuple[float, float]] = {}
+        # the same, as arrays, when every entity is in one world (vectorized check)
+        self._world: Optional[EntityWorld] = None
+        self._rows: IndexArray = np.zeros(0, dtype=np.intp)
+        self._built_pos: FloatArray = np.zeros((0, 2))
+        self._version: int = -1  # grid version the lists were built for
+        self._dirty: bool = True
+        self._shift: Tuple[float, float] = (0.0, 0.0)  # common displacement of the tick
+        self._max_move: float = 0.0  # of the tick, given to check
+        self._reserve: float = 0.0  # the max_move the lists were built for
+        self._sqr_max_move = (skin / 2) * (skin / 2)
+        self._query: List[MovableEntity] = []
+
+    def invalidate(self) -> None:
+        self._dirty = True
+
+    def moved(self, entity: MovableEntity, pos: Vector | None = None) -> None:
+        """pos is the entity position, when the caller already has it"""
+        if self._dirty:
+            return
+        built_at = self._built_at.get(entity)
+        if built_at is None:
+            return
+        if pos is None:
+            pos = entity.pos
+        dx = pos.x - built_at[0] - self._shift[0]
+        dy = pos.y - built_at[1] - self._shift[1]
+        if dx * dx + dy * dy > self._sqr_max_move:
+            self._dirty = True
+
+    def check(self, max_move: float = 0.0) -> bool:
+        """Check every entity of the grid, returns True when the lists need a rebuild.
+
+        max_move is how far an entity can move during the tick (e.g. max speed * dt).
+        """
+        self.checks += 1
+        self._rebuilt = False
+        self._max_move = max_move
+        if self.grid.version != self._version:
+            self._dirty = True
+        if self._dirty or not self._built_at:
+            return self._dirty
+        # the room left for the moves of this tick
+        limit = self.skin / 2 + self._reserve - max_move
+        if limit < 0:
+            self._dirty = True
+            return True
+        sqr_limit = limit * limit
+        if self._world is not None:
+            displacement = self._world.pos[self._rows] - self._built_pos
+            shift = displacement.mean(axis=0)
+            displacement -= shift
+            sqr_move = np.einsum('ij,ij->i', displacement, displacement)
+            self._shift = (float(shift[0]), float(shift[1]))
+            self._dirty = bool(sqr_move.max() > sqr_limit)
+            return self._dirty
+        displacements = []
+        for e, built_at in self._built_at.items():
+            pos = e.pos
+            displacements.append((pos.x - built_at[0], pos.y - built_at[1]))
+        n = len(displacements)
+        sx = sum(d[0] for d in displacements) / n
+        sy = sum(d[1] for d in displacements) / n
+        self._shift = (sx, sy)
+        for dx, dy in displacements:
+            dx -= sx
+            dy -= sy
+            if dx * dx + dy * dy > sqr_limit:
+                self._dirty = True
+                break
+        return self._dirty
+
+    def rebuild(self) -> None:
+        grid = self.grid
+        self._reserve = self._max_move
+        half_skin = self.skin / 2 + self._reserve
+        self._sqr_max_move = half_skin * half_skin
+        reach = self.radius + 2 * half_skin
+        sqr_reach = reach * reach
+        query = self._query
+        self._lists.clear()
+        self._built_at.clear()
+        members = list(grid)
+        positions = {}
+        for e in members:
+            pos = e.pos
+            positions[e] = (pos.x, pos.y)
+        for e in members:
+            x, y = positions[e]
+            neighbours = []
+            for e1 in grid.query(Vector(x, y), reach, query):
+                if e1 is e:
+                    continue
+                x1, y1 = positions[e1]
+                dx = x1 - x
+                dy = y1 - y
+                if dx * dx + dy * dy < sqr_reach:
+                    neighbours.append(e1)
+            self._lists[e] = neighbours
+        self._built_at.update(positions)
+        worlds = {e.world for e in self._built_at}
+        if len(worlds) == 1:
+            self._world = worlds.pop()
+            self._rows = np.array([e.row for e in self._built_at], dtype=np.intp)
+            self._built_pos = np.array(list(self._built_at.values()), dtype=np.float64)
+        else:
+            self._world = None
+        self._version = grid.version
+        self._shift = (0.0, 0.0)
+        self._dirty = False
+        self._rebuilt = True
+        self.rebuilds += 1
+
+    def neighbours(self, entity: MovableEntity) -> List[MovableEntity]:
+        """The (cached) neighbour candidates of an entity of the grid, in grid order.
+
+        The list is owned by VerletLists, don't modify it.
+        """
+        if self._dirty or self.grid.version != self._version:
+            if self._rebuilt:
+                self.fallbacks += 1
+                return self._query_grid(entity)
+            self.rebuild()
+        found = self._lists.get(entity)
+        if found is None:
+            # not in the grid (e.g. inactive) - no cached list, ask the grid directly
+            return self._query_grid(entity)
+        return found
+
+    def _query_grid(self, entity: MovableEntity) -> List[MovableEntity]:
+        found: List[MovableEntity] = self.grid.query(
+            entity.pos, self.radius, self._query
+        )
+        return found
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from concurrent.futures import Executor
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from infra.tick_timers import Timer
+from infra.tick_timers import TickTimers
+from steer.neighbour_index import NeighbourIndex
+from steer.squad import Squad
+from steer.squad_behaviour_condition import CondRes
+
+
+_NOT_MET = CondRes(CondRes.not_met)
+
+
+class World:
+    """The squads of a level, stepped together.
+
+    A step runs in phases, each for all the squads before the next one:
+      1. the neighbour index (if any) snapshots every position
+      2. the squad behaviours run, in squad order
+      3. the members of every squad evaluate their steering and move (update_members)
+      4. finished squad behaviours are dropped
+
+    Phase 3 only touches each squad's own members and sees the other squads through
+    the neighbour index snapshot, so it can run the squads in parallel on an executor
+    (max_workers > 1) with the same result as in order. That pays off on free threaded
+    CPython, or when the steering is mostly numpy code that releases the GIL. The
+    behaviours (phase 2) always run in order, they may share state (the random module).
+
+    With timers, every step first advances the timers. A squad whose behaviour is
+    only waiting on timed conditions (a compiled behaviour with a wake_tick, see
+    steer.behaviour_compiler) sleeps on the timers: its behaviour isn't run until the
+    wake-up tick, its members keep moving.
+    """
+
+    def __init__(
+        self,
+        squads: Iterable[Squad] = (),
+        neighbour_index: Optional[NeighbourIndex] = None,
+        max_workers: int = 1,
+        executor: Optional[Executor] = None,
+        timers: Optional[TickTimers] = None,
+    ):
+        if max_workers < 1:
+            raise ValueError('max_workers must be >= 1')
+        self.squads: List[Squad] = []
+        self.neighbour_index = neighbour_index
+        self.ticks: int = 0
+        self.timers = timers
+        self.skipped: int = 0  # behaviour runs skipped while waiting on timers
+        # squad -> (its sleeping behaviour, wake-up timer)
+        self._sleeping: Dict[Squad, Tuple[object, Timer]] = {}
+        self._owns_executor = executor is None and max_workers > 1
+        self._executor: Optional[Executor] = (
+            ThreadPoolExecutor(max_workers, thread_name_prefix='squads')
+            if self._owns_executor
+            else executor
+        )
+        for squad in squads:
+            self.add(squad)
+
+    def add(self, squad: Squad) -> Squad:
+        self.squads.append(squad)
+        if self.neighbour_index is not None:
+            squad.neighbour_index = self.neighbour_index
+            self.neighbour_index.register(squad)
+        return squad
+
+    def remove(self, squad: Squad) -> None:
+        self.squads.remove(squad)
+        self._wake(squad)
+
+    def _sleep(self, squad: Squad, wake_tick: int) -> None:
+        assert self.timers is not None
+        timer = self.timers.schedule(
+            wake_tick - self.timers.now, lambda: self._sleeping.pop(squad, None)
+        )
+        self._sleeping[squad] = (squad.squad_behaviour, timer)
+
+    def _wake(self, squad: Squad) -> None:
+        sleeping = self._sleeping.pop(squad, None)
+        if sleeping is not None and self.timers is not None:
+            self.timers.cancel(sleeping[1])
+
+    def sleeping(self, squad: Squad) -> bool:
+        """Whether the squad behaviour waits for a timer"""
+        sleeping = self._sleeping.get(squad)
+        if sleeping is not None and sleeping[0] is not squad.squad_behaviour:
+            self._wake(squad)  # replaced
+            return False
+        return sleeping is not None
+
+    def step(self, dt: float) -> None:
+        if self.neighbour_index is not None:
+            self.neighbour_index.rebuild()
+        timers = self.timers
+        if timers is not None:
+            timers.advance()
+        running: List[Squad] = []
+        results: List[CondRes] = []
+        for squad in self.squads:
+            if squad.squad_behaviour is not None:
+                running.append(squad)
+                if self._sleeping and self.sleeping(squad):
+                    self.skipped += 1
+                    squad.follow_assignment.elapsed += dt
+                    results.append(_NOT_MET)
+                    continue
+                res = squad.run_behaviour(dt)
+                results.append(res)
+                if timers is not None:
+                    wake_tick = getattr(squad.squad_behaviour, 'wake_tick', None)
+                    if wake_tick is not None and wake_tick > timers.now:
+                        self._sleep(squad, wake_tick)
+        if self._executor is None or len(running) < 2:
+            for squad in running:
+                squad.update_members(dt)
+        else:
+            # list() waits for every squad and re-raises the first failure
+            list(self._executor.map(lambda squad: squad.update_members(dt), running))
+        for squad, res in zip(running, results):
+            squad.end_behaviour(res)
+        self.ticks += 1
+
+    def close(self) -> None:
+        """Shut down the executor, if the world created it"""
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> World:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
@@ -0,0 +1,133 @@
+import random
+import unittest
+
+from infra.vmath import Rect
+from infra.vmath import Vector
+from steer.behaviour_compiler import compile_behaviour
+from steer.formation import FormationDiamond
+from steer.movable_entity import MovableEntity
+from steer.squad import Squad
+from steer.squad_behaviour import dive_to
+from steer.squad_behaviour import loop_ex
+from steer.squad_behaviour import patrol_ext
+from steer.squad_behaviour import repeat_ex
+from steer.squad_behaviour import SquadBehaviour
+from steer.squad_behaviour import zero_behaviour
+from steer.squad_behaviour_condition import CondRes
+from steer.squad_behaviour_condition import SquadBehaviourCondition
+from steer.squad_behaviour_condition import time_elapsed
+
+RESULTS = [CondRes.not_met] * 4 + [CondRes.met, CondRes.met, CondRes.abort, None]
+
+
+def scripted_leaf(name, results, log):
+    # replays results, from the start again after a restart
+    i = 0
+
+    def squad_force(restart, dt):
+        nonlocal i
+        if restart is True:
+            log.append((name, 'restart'))
+            i = 0
+            return CondRes(CondRes.met)
+        res = results[i % len(results)]
+        i += 1
+        log.append((name, res))
+        return None if res is None else CondRes(res)
+
+    return squad_force
+
+
+def scripted_condition(name, results, log):
+    leaf = scripted_leaf(name, [r or CondRes.not_met for r in results], log)
+    return SquadBehaviourCondition(check=leaf)
+
+
+def random_tree(rng, log, depth=4):
+    name = f'n{len(log)}-{rng.random():.6f}'
+    log.append((name, 'built'))
+    results = [rng.choice(RESULTS) for _ in range(rng.randint(1, 6))]
+    if depth == 0 or rng.random() < 0.25:
+        return SquadBehaviour(scripted_leaf(name, results, log))
+    op = rng.choice(['|', '&', '>>', 'check', 'loop', 'repeat'])
+    if op == 'check':
+        if rng.random() < 0.5:
+            return zero_behaviour(time_elapsed(rng.choice([0.05, 0.2])))
+        return zero_behaviour(scripted_condition(name, results, log))
+    if op in ('loop', 'repeat'):
+        cond = scripted_condition(name, results, log)
+        body = random_tree(rng, log, depth - 1)
+        if op == 'loop':
+            return loop_ex(cond, body)
+        return repeat_ex(cond, body, rng.randint(1, 3))
+    left = random_tree(rng, log, depth - 1)
+    right = random_tree(rng, log, depth - 1)
+    if op == '|':
+        return left | right
+    if op == '&':
+        return left & right
+    return left >> right
+
+
+def run(behaviour, ticks=120):
+    results = []
+    for t in range(ticks):
+        res = behaviour(t % 41 == 40, 1 / 60)  # a restart now and then
+        results.append(None if res is None else res.state)
+    return results
+
+
+class TestBehaviourCompiler(unittest.TestCase):
+    def test_random_trees_side_by_side(self):
+        for seed in range(300):
+            log = []
+            tree = random_tree(random.Random(seed), log)
+            compiled_log = []
+            compiled = compile_behaviour(random_tree(random.Random(seed), compiled_log))
+            with self.subTest(seed=seed):
+                self.assertEqual(run(compiled), run(tree))
+                self.assertEqual(compiled_log, log)
+
+    def test_shared_behaviour_is_one_node(self):
+        log = []
+        a = SquadBehaviour(scripted_leaf('a', [CondRes.not_met, CondRes.met], log))
+        tree = (a | a) >> a
+        self.assertEqual(len(compile_behaviour(tree)), 3)
+        compiled_log = []
+        b = SquadBehaviour(
+            scripted_leaf('a', [CondRes.not_met, CondRes.met], compiled_log)
+        )
+        self.assertEqual(run(compile_behaviour((b | b) >> b)), run(tree))
+        self.assertEqual(compiled_log, log)
+
+    def test_unknown_op(self):
+        with self.assertRaises(ValueError):
+            compile_behaviour(SquadBehaviour(op='xor'))
+
+    def test_squad_side_by_side(self):
+        def make_squad():
+            random.seed(3)
+            s = Squad()
+            s.entities = [MovableEntity(Vector(200 + i * 5, 200)) for i in range(6)]
+            s.formation = FormationDiamond()
+            area = Rect(50, 50, 500, 400)
+            s.squad_behaviour = (
+                dive_to(time_elapsed(0.5), s, 400, 100)
+                >> repeat_ex(
+                    time_elapsed(4), patrol_ext(time_elapsed(1), s, 3, True, area), 2
+                )
+            ) | zero_behaviour(time_elapsed(3))
+            return s
+
+        s1 = make_squad()
+        s2 = make_squad()
+        s2.squad_behaviour = compile_behaviour(s2.squad_behaviour)
+        for _ in range(240):
+            s1.update_squad_behaviour(1 / 60)
+            s2.update_squad_behaviour(1 / 60)
+        self.assertIsNone(s2.squad_behaviour)
+        self.assertEqual([e.pos for e in s1.entities], [e.pos for e in s2.entities])
+
+
+if __name__ == '__main__':
+    unittest.main()
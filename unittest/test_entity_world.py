@@ -0,0 +1,143 @@
+import math
+import unittest
+
+import numpy as np
+
+from infra.vmath import Vector
+from steer.entity_world import EntityWorld
+from steer.movable_entity import MovableEntity
+from steer.movable_entity import Waypoint
+from steer.random_stream import uniform
+from steer.steer_behaviour import seek
+
+
+class TestEntityWorld(unittest.TestCase):
+    def test_entity_is_a_view(self):
+        w = EntityWorld(capacity=2)
+        e = MovableEntity(Vector(3, 4), world=w)
+        self.assertIs(e.world, w)
+        self.assertEqual(len(w), 1)
+        self.assertEqual(w.pos[e.row].tolist(), [3, 4])
+        e.velocity = Vector(1, 2)
+        self.assertEqual(w.velocity[e.row].tolist(), [1, 2])
+        w.pos[e.row] = (7, 8)
+        self.assertEqual(e.pos, Vector(7, 8))
+        # the returned vector is a copy
+        e.pos.x = 100
+        self.assertEqual(e.pos, Vector(7, 8))
+        e.is_active = False
+        self.assertIs(e.is_active, False)
+        self.assertEqual(len(w.active_rows()), 0)
+
+    def test_grow_and_reuse_rows(self):
+        w = EntityWorld(capacity=1)
+        entities = [MovableEntity(Vector(i, -i), world=w) for i in range(10)]
+        self.assertGreaterEqual(w.capacity, 10)
+        self.assertEqual([e.pos for e in entities], [Vector(i, -i) for i in range(10)])
+        row = entities[3].row
+        del entities[3]
+        self.assertEqual(len(w), 9)
+        e = MovableEntity(Vector(1, 1), world=w)
+        self.assertEqual(e.row, row)
+        self.assertEqual(e.velocity, Vector.zero())
+        self.assertEqual(e.max_speed, 80)
+
+    def test_views_follow_the_arrays(self):
+        w = EntityWorld(capacity=1)
+        first = MovableEntity(Vector(1, 2), world=w)
+        keep = [MovableEntity(world=w) for _ in range(5)]  # grows the arrays
+        w.pos[first.row] = (5, 6)
+        w.rotation[keep[-1].row] = 0.5
+        self.assertEqual(first.pos, Vector(5, 6))
+        self.assertEqual(keep[-1].rotation, 0.5)
+        first.max_speed = 120
+        self.assertEqual(w.max_speed[first.row], 120)
+        self.assertEqual(w.pos_view[2 * first.row + 1], 6)
+
+    def test_batched_update_matches_per_entity_update(self):
+        rng = np.random.default_rng(11)
+        starts = rng.uniform(0, 500, (300, 2)).tolist()
+        targets = rng.uniform(0, 500, (300, 2)).tolist()
+        w1 = EntityWorld()
+        w2 = EntityWorld()
+        per_entity = [MovableEntity(Vector(*p), world=w1) for p in starts]
+        batched = [MovableEntity(Vector(*p), world=w2) for p in starts]
+        for entities in (per_entity, batched):
+            for e, t in zip(entities, targets):
+                e.max_speed = 200
+                e.max_force = 60
+                e.steer_force = seek(30)
+                e.target = Waypoint(Vector(*t))
+        batched[5].is_active = False
+        per_entity[5].steer_force = None
+        for _ in range(120):
+            for e in per_entity:
+                e.update_steer_behaviour(1 / 60)
+            w2.update(1 / 60)
+
+        for e1, e2 in zip(per_entity, batched):
+            self.assertEqual(e1.pos, e2.pos)
+            self.assertEqual(e1.velocity, e2.velocity)
+            self.assertEqual(e1.prev_pos, e2.prev_pos)
+            self.assertAlmostEqual(e1.rotation, e2.rotation, places=12)
+            self.assertEqual(e1._speed_mul, e2._speed_mul)
+        self.assertEqual(batched[5].pos, Vector(*starts[5]))
+
+    def test_integrate_rotation(self):
+        w = EntityWorld()
+        e = MovableEntity(world=w)
+        e.rotation = 1.0
+        rows = w.active_rows()
+        w.force[rows] = (0, 30)  # axis aligned - rotation is left unchanged
+        w.integrate(1, rows)
+        self.assertEqual(e.velocity, Vector(0, 3))
+        self.assertEqual(e.rotation, 1.0)
+        w.force[rows] = (-30, 0)
+        w.integrate(1, rows)
+        v = e.velocity
+        self.assertAlmostEqual(
+            e.rotation, math.atan2(v.y, v.x) % (2 * math.pi) + math.pi / 2
+        )
+
+    def test_random_streams(self):
+        def draws(order):
+            w = EntityWorld(seed=42)
+            entities = [MovableEntity(world=w) for _ in range(3)]
+            out = {i: [] for i in range(3)}
+            for _ in range(35):
+                for i in order:
+                    out[i].append(entities[i].random())
+            return out, entities
+
+        out, entities = draws([0, 1, 2])
+        # the update order doesn't matter, only the seed and creation order do
+        self.assertEqual(draws([2, 0, 1])[0], out)
+        self.assertNotEqual(out[0], out[1])
+        w = entities[0].world
+        self.assertEqual(
+            out[1], uniform(w.rng_key[entities[1].row], range(len(out[1]))).tolist()
+        )
+        other_seed = EntityWorld(seed=43)
+        self.assertNotEqual(MovableEntity(world=other_seed).random(), out[0][0])
+
+        entities[2].seed_random(7)
+        first = [entities[2].random() for _ in range(5)]
+        entities[2].seed_random(7)
+        self.assertEqual([entities[2].random() for _ in range(5)], first)
+
+    def test_uniform_batch(self):
+        w1 = EntityWorld(seed=1)
+        w2 = EntityWorld(seed=1)
+        e1 = [MovableEntity(world=w1) for _ in range(10)]
+        e2 = [MovableEntity(world=w2) for _ in range(10)]
+        e2[3].random()  # out of step with the others
+        e1[3].random()
+        rows = w2.active_rows()
+        for _ in range(21):
+            expected = [e.random() for e in e1]
+            self.assertEqual(w2.uniform_batch(rows).tolist(), expected)
+        self.assertEqual(e2[0].random(), e1[0].random())
+
+
+if __name__ == '__main__':
+    unittest.main()
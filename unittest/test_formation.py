@@ -1,10 +1,20 @@
 import math
 import unittest
 
+import numpy as np
+
+from infra.vmath import distance
 from infra.vmath import Vector
 from steer.formation import Formation
 from steer.formation import FormationColumn
 from steer.formation import FormationDiamond
+from steer.formation import FormationEchelon
+from steer.formation import FormationGrid
+from steer.formation import FormationRing
+from steer.formation import FormationWedge
+from steer.formation import ProceduralFormation
+from steer.movable_entity import MovableEntity
+from steer.squad import Squad
 
 
 class TestFormation(unittest.TestCase):
@@ -31,6 +41,97 @@ class TestFormation(unittest.TestCase):
         f1 = FormationColumn()
         self.assertEqual(f1.entity_position(5), Vector(0, -150))
 
+    def test_slots_cached(self):
+        f = FormationDiamond()
+        slots = f.slots()
+        self.assertEqual(slots.shape, (10, 2))
+        self.assertIs(f.slots(), slots)
+        self.assertFalse(slots.flags.writeable)
+        version = f.version
+        f.scale = 0.5
+        self.assertIsNot(f.slots(), slots)
+        self.assertEqual(f.version, version + 1)
+        self.assertEqual(f.slots()[5].tolist(), [25, -25])
+        self.assertEqual(f.entity_positions([5, 0]).tolist(), [[25, -25], [0, 0]])
+        with self.assertRaises(IndexError):
+            f.entity_positions([10])
+
+    def test_procedural(self):
+        for formation in (
+            FormationColumn(500),
+            FormationGrid(500),
+            FormationGrid(500, columns=7),
+            FormationWedge(500),
+            FormationEchelon(500, left=True),
+            FormationRing(500),
+        ):
+            slots = formation.slots()
+            self.assertEqual(slots.shape, (500, 2))
+            self.assertEqual(len({tuple(p) for p in slots.tolist()}), 500)
+            # members are at least spacing apart
+            d = np.hypot(*(slots[:, None, :] - slots[None, :, :]).transpose(2, 0, 1))
+            np.fill_diagonal(d, np.inf)
+            self.assertGreaterEqual(d.min(), 30 - 1e-9, type(formation).__name__)
+            self.assertEqual(
+                formation.entity_position(499), Vector(*slots[499].tolist())
+            )
+        self.assertEqual(FormationWedge().entity_position(3), Vector(-60, -60))
+        self.assertEqual(FormationEchelon().entity_position(2), Vector(60, -60))
+        self.assertEqual(FormationGrid(9).entity_position(4), Vector(0, -30))
+        ring = FormationRing(4)
+        self.assertAlmostEqual(
+            distance(ring.entity_position(2), Vector(0, 0)), 30 / math.sin(math.pi / 4)
+        )
+
+    def test_unscaled_slots_cached(self):
+        with self.assertRaises(TypeError):
+            ProceduralFormation()  # _unscaled_slots is abstract
+        column = FormationColumn(50)
+        calls = []
+        unscaled_slots = column._unscaled_slots
+
+        def counting():
+            calls.append(column.count)
+            return unscaled_slots()
+
+        column._unscaled_slots = counting
+        positions = [column._unscaled_entity_position(i) for i in range(50)]
+        self.assertEqual(positions[49], Vector(0, -49 * 30))
+        self.assertEqual(calls, [50])
+        column.count = 60
+        column._unscaled_entity_position(55)
+        column.spacing = 10
+        self.assertEqual(column._unscaled_entity_position(55), Vector(0, -550))
+        self.assertEqual(calls, [50, 60, 60])
+
+    def test_fit(self):
+        column = FormationColumn(4)
+        column.fit(20)
+        self.assertEqual(column.count, 20)
+        version = column.version
+        column.fit(5)  # column slots don't depend on the count, kept
+        self.assertEqual((column.count, column.version), (20, version))
+        ring = FormationRing(4)
+        ring.fit(20)
+        ring.fit(5)
+        self.assertEqual(ring.count, 5)
+        diamond = FormationDiamond()
+        diamond.fit(20)
+        self.assertEqual(diamond.count, 10)
+
+    def test_squad_slot_offsets(self):
+        s = Squad()
+        s.entities = [MovableEntity() for _ in range(300)]
+        self.assertEqual(s.slot_offsets().tolist(), [[0, 0]] * 300)
+        s.formation = FormationGrid(columns=10)
+        s.entities[0].is_active = False
+        offsets = s.slot_offsets()
+        self.assertEqual(offsets.shape, (299, 2))
+        self.assertEqual(offsets[13].tolist(), [-45, -30])
+        self.assertEqual(
+            s.get_position_delta(s.entities[14]), Vector(*offsets[13].tolist())
+        )
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+
+from infra.vmath import Rect
+from infra.vmath import Vector
+from steer.formation import FormationDiamond
+from steer.lod import ImpostorPolicy
+from steer.lod import LodPolicy
+from steer.movable_entity import MovableEntity
+from steer.squad import Squad
+from steer.squad_behaviour import dive_to
+from steer.squad_behaviour_condition import infinite_behaviour_condition
+
+
+def make_squad(x, y):
+    s = Squad()
+    s.entities = [MovableEntity(Vector(x + i * 5, y)) for i in range(5)]
+    s.formation = FormationDiamond()
+    s.squad_behaviour = dive_to(infinite_behaviour_condition(), s, x + 300, y + 300)
+    return s
+
+
+class TestLod(unittest.TestCase):
+    def test_interval(self):
+        lod = LodPolicy(Vector(0, 0), bands=((100, 1), (200, 3), (300, 5)))
+        self.assertEqual(lod.interval(Vector(60, 80)), 1)
+        self.assertEqual(lod.interval(Vector(150, 0)), 3)
+        self.assertEqual(lod.interval(Vector(0, -250)), 5)
+        self.assertEqual(lod.interval(Vector(1000, 0)), 5)
+        lod.focus = Vector(1000, 0)
+        self.assertEqual(lod.interval(Vector(1000, 0)), 1)
+        lod.viewport = Rect(900, -100, 200, 200)
+        self.assertEqual(lod.interval(Vector(1000, 0)), 1)
+        self.assertEqual(lod.interval(Vector(1000, 150)), 8)
+        with self.assertRaises(ValueError):
+            LodPolicy(bands=((100, 0),))
+
+    def test_near_squad_is_unchanged(self):
+        s1 = make_squad(0, 0)
+        s2 = make_squad(0, 0)
+        s2.lod = LodPolicy(Vector(0, 0), bands=((10000, 1),))
+        for _ in range(60):
+            s1.update_squad_behaviour(1 / 60)
+            s2.update_squad_behaviour(1 / 60)
+        self.assertEqual([e.pos for e in s1.entities], [e.pos for e in s2.entities])
+        self.assertEqual(s2.lod_stats.total_saved, 0)
+        self.assertEqual(s2.lod_stats.evaluated, 5)
+
+    def test_far_squad_saves_evaluations(self):
+        s1 = make_squad(5000, 5000)
+        s2 = make_squad(5000, 5000)
+        s2.lod = LodPolicy(Vector(0, 0), bands=((400, 1), (1000, 2), (2000, 4)))
+        for _ in range(240):
+            s1.update_squad_behaviour(1 / 60)
+            s2.update_squad_behaviour(1 / 60)
+        stats = s2.lod_stats
+        self.assertEqual(stats.ticks, 240)
+        self.assertEqual(stats.evaluated + stats.saved, 5)
+        self.assertAlmostEqual(stats.saved_ratio, 0.75, places=2)
+        # still moving the same way, only with a coarser steering response
+        self.assertLess((s1.entities[0].pos - s2.entities[0].pos).length(), 5)
+        for e in s2.entities:
+            self.assertGreater((e.pos - Vector(5000, 5000)).length(), 10)
+
+
+class TestImpostor(unittest.TestCase):
+    def test_hysteresis(self):
+        policy = ImpostorPolicy(Vector(0, 0), near=100, far=200)
+        self.assertFalse(policy.aggregate(Vector(150, 0), False))
+        self.assertTrue(policy.aggregate(Vector(250, 0), False))
+        self.assertTrue(policy.aggregate(Vector(150, 0), True))
+        self.assertFalse(policy.aggregate(Vector(50, 0), True))
+        with self.assertRaises(ValueError):
+            ImpostorPolicy(near=300, far=200)
+
+    def test_far_squad_is_carried_by_its_leader(self):
+        s = make_squad(5000, 5000)
+        s.impostor = ImpostorPolicy(Vector(0, 0))
+        for _ in range(30):
+            s.update_squad_behaviour(1 / 60)
+        self.assertTrue(s.aggregate)
+        stats = s.impostor_stats
+        self.assertEqual((stats.collapses, stats.aggregate_ticks), (1, 30))
+        self.assertEqual(stats.total_placed, 4 * 30)
+        leader = s.get_leader()
+        self.assertGreater((leader.pos - Vector(5000, 5000)).length(), 10)
+        rotation = leader.formation_rotation()
+        for e in s.entities[1:]:
+            slot = rotation.apply(s.get_position_delta(e, leader)).iadd(leader.pos)
+            self.assertAlmostEqual(e.pos.x, slot.x)
+            self.assertAlmostEqual(e.pos.y, slot.y)
+            self.assertEqual(e.velocity, leader.velocity)
+
+    def test_expands_where_it_was(self):
+        s = make_squad(5000, 5000)
+        s.impostor = ImpostorPolicy(Vector(0, 0))
+        for _ in range(30):
+            s.update_squad_behaviour(1 / 60)
+        before = [e.pos for e in s.entities]
+        s.impostor.focus = Vector(5000, 5000)
+        s.update_squad_behaviour(1 / 60)
+        self.assertFalse(s.aggregate)
+        self.assertEqual(s.impostor_stats.expansions, 1)
+        # one ordinary step (speed_mul goes up to follow_velocity_multiplier), no jump
+        for e, pos in zip(s.entities, before):
+            self.assertLessEqual((e.pos - pos).length(), 2 * e.max_speed / 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,9 @@
+import math
 import unittest
 
 from infra.vmath import Vector
 from steer.movable_entity import MovableEntity
+from steer.movable_entity import Waypoint
 
 
 class TestMovableEntity(unittest.TestCase):
@@ -11,6 +13,38 @@ class TestMovableEntity(unittest.TestCase):
         w1 = e.shift(Vector(1, 1))
         self.assertEqual(w1.pos, Vector(1, 1))
 
+    def test_formation_rotation_cached(self):
+        e = MovableEntity()
+        e.rotation = 1.0
+        r = e.formation_rotation()
+        self.assertIs(e.formation_rotation(), r)
+        self.assertAlmostEqual(r.angle, 1.0 - math.pi)
+        e.rotation = 2.0
+        self.assertIsNot(e.formation_rotation(), r)
+        self.assertAlmostEqual(e.formation_rotation().angle, 2.0 - math.pi)
+
+    def test_slots(self):
+        self.assertFalse(hasattr(MovableEntity(), '__dict__'))
+        self.assertFalse(hasattr(Waypoint(), '__dict__'))
+
+    def test_lazy_name(self):
+        e1 = MovableEntity()
+        e2 = MovableEntity()
+        self.assertIsNone(e1._name)
+        self.assertNotEqual(e2.name, e1.name)
+        self.assertEqual(e2.name, e2.name)
+        e1.name = 'leader'
+        self.assertEqual(e1.name, 'leader')
+
+    def test_waypoint_reset(self):
+        w = Waypoint(Vector(1, 1))
+        velocity = Vector(3, 0)
+        self.assertIs(w.reset(Vector(5, 6), velocity), w)
+        self.assertEqual(w.pos, Vector(5, 6))
+        self.assertIs(w.velocity, velocity)
+        w.reset(Vector(0, 1))
+        self.assertEqual(w.velocity, Vector.zero())
+
 
 if __name__ == '__main__':
     unittest.main()
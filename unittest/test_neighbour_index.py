@@ -0,0 +1,120 @@
+import random
+import unittest
+
+from infra.vmath import distance
+from infra.vmath import Vector
+from steer.entity_world import EntityWorld
+from steer.movable_entity import MovableEntity
+from steer.neighbour_index import NeighbourFilter
+from steer.neighbour_index import NeighbourIndex
+from steer.squad import Squad
+from steer.steer_behaviour import separation_from_others
+
+
+class TestNeighbourIndex(unittest.TestCase):
+    def setUp(self):
+        random.seed(11)
+        self.world = EntityWorld()
+        self.squads = []
+        for _ in range(3):
+            s = Squad()
+            s.entities = [
+                MovableEntity(
+                    Vector(random.uniform(0, 200), random.uniform(0, 200)),
+                    world=self.world,
+                )
+                for _ in range(40)
+            ]
+            self.squads.append(s)
+        self.loner = MovableEntity(Vector(100, 100), world=self.world)
+        self.index = NeighbourIndex(self.world, cell_size=15)
+        self.groups = [self.index.register(s) for s in self.squads]
+        self.index.rebuild()
+        self.everyone = [e for s in self.squads for e in s.entities] + [self.loner]
+
+    def test_register(self):
+        self.assertEqual(self.groups, [0, 1, 2])
+        self.assertEqual(self.index.register(self.squads[1]), 1)
+        self.assertEqual(self.index.group_of(Squad()), NeighbourIndex.no_group)
+        self.assertEqual(len(self.index), len(self.everyone))
+
+    def test_within(self):
+        out = []
+        for radius in (10, 15, 37):
+            pos = Vector(random.uniform(0, 200), random.uniform(0, 200))
+            expected = {e for e in self.everyone if distance(e.pos, pos) < radius}
+            self.assertIs(self.index.within(pos, radius, out), out)
+            self.assertEqual(set(out), expected)
+            self.assertEqual(len(out), len(expected))
+            xs = []
+            ys = []
+            self.index.within(pos, radius, out, xs=xs, ys=ys)
+            self.assertEqual(list(zip(xs, ys)), [(e.pos.x, e.pos.y) for e in out])
+
+    def test_within_filters(self):
+        out = []
+        entity = self.squads[1].entities[0]
+        self.index.within(
+            entity.pos, 40, out, 1, NeighbourFilter.same_squad, exclude=entity
+        )
+        self.assertTrue(out)
+        self.assertNotIn(entity, out)
+        self.assertTrue(all(e in self.squads[1].entities for e in out))
+        self.index.within(entity.pos, 40, out, 1, NeighbourFilter.other_squads)
+        self.assertTrue(out)
+        self.assertTrue(all(e not in self.squads[1].entities for e in out))
+
+    def test_inactive_and_rebuild(self):
+        out = []
+        self.loner.is_active = False
+        self.index.within(Vector(100, 100), 1, out)
+        self.assertIn(self.loner, out)  # the snapshot is only refreshed by rebuild
+        self.index.rebuild()
+        self.index.within(Vector(100, 100), 1, out)
+        self.assertNotIn(self.loner, out)
+        self.assertEqual(self.index.rebuilds, 2)
+
+    def test_nearest(self):
+        out = []
+        for k in (1, 5, 20):
+            pos = Vector(random.uniform(-50, 250), random.uniform(-50, 250))
+            expected = sorted(self.everyone, key=lambda e: distance(e.pos, pos))[:k]
+            self.index.nearest(pos, k, out)
+            self.assertEqual(
+                [distance(e.pos, pos) for e in out],
+                [distance(e.pos, pos) for e in expected],
+            )
+        # far away from everything, and more than there is
+        self.index.nearest(Vector(5000, 5000), 1, out)
+        self.assertEqual(len(out), 1)
+        self.index.nearest(Vector(0, 0), 1000, out)
+        self.assertEqual(len(out), len(self.everyone))
+
+    def test_nearest_filter(self):
+        out = []
+        entity = self.squads[0].entities[3]
+        self.index.nearest(entity.pos, 3, out, 0, NeighbourFilter.other_squads)
+        self.assertEqual(len(out), 3)
+        self.assertTrue(all(e not in self.squads[0].entities for e in out))
+
+    def test_separation_from_others(self):
+        world = EntityWorld()
+        a = Squad()
+        a.entities = [MovableEntity(Vector(0, 0), world=world)]
+        b = Squad()
+        b.entities = [MovableEntity(Vector(5, 0), world=world)]
+        index = NeighbourIndex(world)
+        force = separation_from_others(index, a)
+        index.register(b)
+        index.rebuild()
+        f = force(a.entities[0], None)
+        self.assertLess(f.x, 0)
+        self.assertAlmostEqual(f.y, 0)
+        # members of the same squad are left to separation()
+        a.entities.append(MovableEntity(Vector(0, 5), world=world))
+        index.rebuild()
+        self.assertAlmostEqual(force(a.entities[0], None).y, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import math
+import random
+import unittest
+
+import numpy as np
+
+from infra.vmath import Rect
+from infra.vmath import Vector
+from steer.movable_entity import MovableEntity
+from steer.obstacles import CircleObstacle
+from steer.obstacles import ObstacleBVH
+from steer.obstacles import RectObstacle
+from steer.steer_batch import obstacle_avoidance_batch
+from steer.steer_behaviour import obstacle_avoidance
+
+
+def random_obstacles(count, seed=1):
+    rng = random.Random(seed)
+    obstacles = []
+    for _ in range(count):
+        x = rng.uniform(0, 1000)
+        y = rng.uniform(0, 1000)
+        if rng.random() < 0.5:
+            obstacles.append(CircleObstacle(Vector(x, y), rng.uniform(3, 15)))
+        else:
+            obstacles.append(
+                RectObstacle(Rect(x, y, rng.uniform(3, 30), rng.uniform(3, 30)))
+            )
+    return obstacles
+
+
+def brute_force(obstacles, p1, p2, margin):
+    best = None
+    for o in obstacles:
+        t = o.intersect_segment(p1.x, p1.y, p2.x - p1.x, p2.y - p1.y, margin)
+        if t is not None and (best is None or t < best[0]):
+            best = (t, o)
+    return best
+
+
+class TestObstacles(unittest.TestCase):
+    def test_circle(self):
+        c = CircleObstacle(Vector(10, 0), 2)
+        self.assertAlmostEqual(c.intersect_segment(0, 0, 20, 0, 0), 0.4)
+        self.assertAlmostEqual(c.intersect_segment(0, 0, 20, 0, 1), 0.35)
+        self.assertIsNone(c.intersect_segment(0, 5, 20, 0, 1))
+        self.assertIsNone(c.intersect_segment(0, 0, 5, 0, 1))
+        self.assertEqual(c.intersect_segment(9, 0, 1, 0, 0), 0.0)  # inside
+
+    def test_rect(self):
+        r = RectObstacle(Rect(10, -5, 10, 10))
+        self.assertAlmostEqual(r.intersect_segment(0, 0, 20, 0, 0), 0.5)
+        self.assertAlmostEqual(r.intersect_segment(0, 0, 20, 0, 2), 0.4)
+        self.assertIsNone(r.intersect_segment(0, 8, 20, 0, 2))
+        self.assertEqual(r.away(Vector(25, 0)), Vector(5, 0))
+        self.assertEqual(r.away(Vector(12, 0)), Vector(-3, 0))  # inside
+
+    def test_bvh_matches_brute_force(self):
+        obstacles = random_obstacles(500)
+        bvh = ObstacleBVH(obstacles)
+        self.assertEqual(len(bvh), 500)
+        self.assertLessEqual(bvh.depth, 2 + math.ceil(math.log2(500 / 4)))
+        rng = random.Random(2)
+        starts = []
+        ends = []
+        for _ in range(300):
+            p1 = Vector(rng.uniform(0, 1000), rng.uniform(0, 1000))
+            p2 = p1 + Vector(rng.uniform(-60, 60), rng.uniform(-60, 60))
+            starts.append((p1.x, p1.y))
+            ends.append((p2.x, p2.y))
+            expected = brute_force(obstacles, p1, p2, 5)
+            hit = bvh.segment_query(p1, p2, 5)
+            if expected is None:
+                self.assertIsNone(hit)
+            else:
+                self.assertAlmostEqual(hit[0], expected[0])
+        t, index = bvh.segment_query_batch(starts, ends, 5)
+        for k, (p1, p2) in enumerate(zip(starts, ends)):
+            expected = brute_force(obstacles, Vector(*p1), Vector(*p2), 5)
+            if expected is None:
+                self.assertEqual(index[k], -1)
+                self.assertEqual(t[k], math.inf)
+            else:
+                self.assertAlmostEqual(t[k], expected[0])
+                self.assertAlmostEqual(
+                    obstacles[index[k]].intersect_segment(
+                        p1[0], p1[1], p2[0] - p1[0], p2[1] - p1[1], 5
+                    ),
+                    expected[0],
+                )
+
+    def test_empty(self):
+        bvh = ObstacleBVH([])
+        self.assertIsNone(bvh.segment_query(Vector(0, 0), Vector(10, 10)))
+        t, index = bvh.segment_query_batch([[0.0, 0.0]], [[10.0, 10.0]])
+        self.assertEqual(index.tolist(), [-1])
+
+    def test_obstacle_avoidance(self):
+        bvh = ObstacleBVH([CircleObstacle(Vector(30, 2), 5)])
+        e = MovableEntity(Vector(0, 0))
+        e.velocity = Vector(80, 0)  # feeler to (40, 0)
+        f = obstacle_avoidance(bvh)(e, None)
+        self.assertAlmostEqual(f.length(), e.max_force)
+        self.assertLess(f.y, 0)  # away from the obstacle, which is a bit above
+        e.velocity = Vector(0, 80)
+        self.assertEqual(obstacle_avoidance(bvh)(e, None), Vector(0, 0))
+
+    def test_obstacle_avoidance_batch(self):
+        obstacles = random_obstacles(200, seed=3)
+        bvh = ObstacleBVH(obstacles)
+        rng = np.random.default_rng(4)
+        entities = []
+        for x, y, vx, vy in rng.uniform(0, 1000, (100, 4)):
+            e = MovableEntity(Vector(x, y))
+            e.velocity = Vector(vx / 10 - 50, vy / 10 - 50)
+            entities.append(e)
+        pos = [(e.pos.x, e.pos.y) for e in entities]
+        velocity = [(e.velocity.x, e.velocity.y) for e in entities]
+        batch = obstacle_avoidance_batch(bvh, pos, velocity, 30)
+        force = obstacle_avoidance(bvh)
+        expected = [force(e, None) for e in entities]
+        self.assertTrue(np.any(batch != 0))
+        np.testing.assert_allclose(batch, [(f.x, f.y) for f in expected], atol=1e-9)
+
+
+if __name__ == '__main__':
+    unittest.main()
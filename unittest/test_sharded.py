@@ -0,0 +1,98 @@
+import random
+import unittest
+
+import numpy as np
+
+from infra.vmath import Rect
+from infra.vmath import Vector
+from steer.entity_world import EntityWorld
+from steer.formation import FormationGrid
+from steer.movable_entity import MovableEntity
+from steer.sharded import SharedEntityWorld
+from steer.sharded import ShardedRunner
+from steer.squad import Squad
+from steer.squad_behaviour import patrol_ext
+from steer.squad_behaviour_condition import infinite_behaviour_condition
+from steer.world import World
+
+MEMBERS = 5
+
+
+def make_squad(number, world):
+    random.seed(number)
+    s = Squad()
+    x = 100 + number * 40
+    s.entities = [
+        MovableEntity(Vector(x + 5 * j, 100), world=world) for j in range(MEMBERS)
+    ]
+    s.formation = FormationGrid(columns=3, spacing=20)
+    s.squad_behaviour = patrol_ext(
+        infinite_behaviour_condition(), s, 4, number % 2 == 0, Rect(50, 50, 600, 400)
+    )
+    return s
+
+
+def failing_squad(number, world):
+    if number == 1:
+        raise KeyError('no squad 1')
+    return make_squad(number, world)
+
+
+def run_in_process(squads, ticks):
+    entities = EntityWorld()
+    world = World(make_squad(n, entities) for n in range(squads))
+    for _ in range(ticks):
+        world.step(1 / 60)
+    return [np.array([(e.pos.x, e.pos.y) for e in s.entities]) for s in world.squads]
+
+
+class TestSharedEntityWorld(unittest.TestCase):
+    def test_attached_world_shares_the_arrays(self):
+        owner = SharedEntityWorld(8)
+        try:
+            shard = SharedEntityWorld(8, range(4, 8), owner.name)
+            e = MovableEntity(Vector(1, 2), world=shard)
+            self.assertEqual(e.row, 4)
+            e.pos = Vector(3, 4)
+            self.assertEqual(owner.pos[4].tolist(), [3, 4])
+            self.assertEqual(owner.max_speed[0], 80.0)  # initialized by the owner
+            self.assertEqual(shard.active_rows().tolist(), [4])
+            del e
+            shard.close()
+        finally:
+            owner.close()
+
+    def test_rows_are_limited(self):
+        world = SharedEntityWorld(4, range(2, 4))
+        try:
+            keep = [MovableEntity(world=world) for _ in range(2)]
+            self.assertEqual([e.row for e in keep], [2, 3])
+            self.assertNotEqual(world.rng_key[2], world.rng_key[3])
+            with self.assertRaises(ValueError):
+                MovableEntity(world=world)
+        finally:
+            world.close()
+
+
+class TestShardedRunner(unittest.TestCase):
+    def test_shards_match_one_process(self):
+        squads = 5
+        expected = run_in_process(squads, 90)
+        for workers in (1, 2):
+            with ShardedRunner(
+                make_squad, squads, workers, MEMBERS, timeout=60
+            ) as runner:
+                runner.run(30, 1 / 60)
+                runner.run(60, 1 / 60)
+                self.assertEqual(runner.ticks, 90)
+                for n in range(squads):
+                    np.testing.assert_array_equal(runner.positions(n), expected[n])
+
+    def test_worker_errors_are_raised(self):
+        runner = ShardedRunner(failing_squad, 4, 2, MEMBERS, timeout=60)
+        with runner, self.assertRaisesRegex(RuntimeError, 'no squad 1'):
+            runner.run(1, 1 / 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import random
+import unittest
+
+from infra.sim_clock import SimClock
+from infra.vmath import lerp
+from infra.vmath import Vector
+from steer.formation import FormationDiamond
+from steer.movable_entity import MovableEntity
+from steer.squad import Squad
+from steer.squad_behaviour import wander
+
+
+class TestSimClock(unittest.TestCase):
+    def test_fixed_steps(self):
+        clock = SimClock.from_rate(30)
+        steps = []
+        clock.run(1 / 144, steps.append)
+        self.assertEqual(steps, [])
+        self.assertAlmostEqual(clock.alpha, 30 / 144)
+        for _ in range(4):
+            clock.run(1 / 144, steps.append)
+        self.assertEqual(steps, [clock.step])
+        self.assertAlmostEqual(clock.alpha, 5 * 30 / 144 - 1)
+        # rendering slower than the simulation runs several steps per frame
+        self.assertEqual(clock.advance(0.1), 3)
+        self.assertEqual(clock.ticks, 4)
+        self.assertAlmostEqual(clock.time, 4 / 30)
+
+    def test_max_substeps(self):
+        clock = SimClock(step=0.25, max_substeps=4)
+        self.assertEqual(clock.advance(2.125), 4)
+        self.assertEqual(clock.dropped_time, 1.0)
+        self.assertEqual(clock.alpha, 0.5)
+        self.assertEqual(clock.advance(0.125), 1)
+
+    def test_deterministic(self):
+        frames = [0.016, 0.017, 0.1, 0.002, 0.033, 0.25, 0.016] * 10
+
+        def simulate():
+            random.seed(5)
+            clock = SimClock.from_rate(60)
+            s = Squad()
+            s.entities = [MovableEntity(Vector(i * 3, 0)) for i in range(4)]
+            s.formation = FormationDiamond()
+            s.squad_behaviour = wander(s, 30, 800, 800)
+            for frame_dt in frames:
+                clock.run(frame_dt, s.update_squad_behaviour)
+            return [(e.pos.x, e.pos.y) for e in s.entities], clock.ticks
+
+        self.assertEqual(simulate(), simulate())
+
+    def test_interpolate(self):
+        self.assertEqual(lerp(Vector(0, 0), Vector(10, -4), 0.25), Vector(2.5, -1))
+
+
+if __name__ == '__main__':
+    unittest.main()
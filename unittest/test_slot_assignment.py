@@ -0,0 +1,100 @@
+import itertools
+import math
+import unittest
+
+import numpy as np
+
+from infra.vmath import Vector
+from steer.formation import FormationGrid
+from steer.movable_entity import MovableEntity
+from steer.slot_assignment import greedy_assignment
+from steer.slot_assignment import hungarian
+from steer.slot_assignment import SlotAssignment
+from steer.squad import Squad
+from steer.squad_behaviour import set_entities_follow_target
+
+
+def total(cost, column_of):
+    return cost[np.arange(len(cost)), column_of].sum()
+
+
+class TestSlotAssignment(unittest.TestCase):
+    def test_hungarian_is_optimal(self):
+        rng = np.random.default_rng(1)
+        for n in range(1, 7):
+            for _ in range(5):
+                cost = rng.uniform(0, 10, (n, n))
+                column_of = hungarian(cost)
+                self.assertEqual(sorted(column_of.tolist()), list(range(n)))
+                best = min(
+                    sum(cost[i, p[i]] for i in range(n))
+                    for p in itertools.permutations(range(n))
+                )
+                self.assertAlmostEqual(total(cost, column_of), best)
+
+    def test_greedy(self):
+        rng = np.random.default_rng(2)
+        points = rng.uniform(0, 100, (60, 2))
+        slots = rng.uniform(0, 100, (60, 2))
+        cost = np.hypot(*(points[:, None] - slots[None]).transpose(2, 0, 1))
+        column_of = greedy_assignment(cost)
+        self.assertEqual(sorted(column_of.tolist()), list(range(60)))
+        self.assertLess(total(cost, column_of), 1.1 * total(cost, hungarian(cost)))
+        self.assertEqual(greedy_assignment(np.zeros((0, 0))).tolist(), [])
+
+    def make_squad(self):
+        # members sitting on the slots of a grid, in a shuffled roster order
+        s = Squad()
+        s.formation = FormationGrid(columns=4)
+        s.formation.fit(12)
+        offsets = s.formation.slots()
+        order = [0] + np.random.default_rng(3).permutation(np.arange(1, 12)).tolist()
+        s.entities = [MovableEntity(Vector(*offsets[i].tolist())) for i in order]
+        for e in s.entities:
+            e.rotation = math.pi  # heading down, formation space is world space
+        s.slot_assignment = SlotAssignment()
+        return s, order
+
+    def test_members_keep_their_slots(self):
+        s, order = self.make_squad()
+        self.assertEqual([s.slot_index(e) for e in s.entities], order)
+        self.assertAlmostEqual(s.slot_assignment.total_cost, 0)
+        self.assertEqual(
+            s.slot_offsets().tolist(), s.formation.entity_positions(order).tolist()
+        )
+        self.assertEqual(s.slot_assignment.runs, 1)
+        # lose the member in slot 11, the last one - nobody else moves
+        lost = s.entities[order.index(11)]
+        lost.is_active = False
+        self.assertEqual(
+            [s.slot_index(e) for e in s.entities if e is not lost],
+            [i for i in order if i != 11],
+        )
+        self.assertEqual(s.slot_assignment.runs, 2)
+        self.assertIsNone(s.slot_index(lost))
+
+    def test_follow_target_uses_slots(self):
+        s, order = self.make_squad()
+        leader = s.get_leader()
+        set_entities_follow_target(s, leader, False)
+        self.assertEqual(s.follow_assignment.reassigned, 11)
+        set_entities_follow_target(s, leader, False)
+        self.assertEqual(s.follow_assignment.reassigned, 11)
+        # the member in slot 5 is lost, only whoever gets a different slot is reassigned
+        before = {e: s.slot_index(e) for e in s.roster.active}
+        s.entities[order.index(5)].is_active = False
+        set_entities_follow_target(s, leader, False)
+        slots = [s.slot_index(e) for e in s.roster.active]
+        self.assertEqual(sorted(slots), list(range(11)))
+        self.assertEqual(s.slot_index(leader), before[leader])
+        moved = [
+            e
+            for e in s.roster.active
+            if e is not leader and s.slot_index(e) != before[e]
+        ]
+        self.assertLess(len(moved), 10)
+        self.assertEqual(s.follow_assignment.reassigned, 11 + len(moved))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import random
+import unittest
+
+from infra.vmath import distance
+from infra.vmath import Vector
+from steer.globals import separation_added_force_magnitude
+from steer.globals import separation_radius
+from steer.movable_entity import MovableEntity
+from steer.spatial_hash import SpatialHash
+from steer.squad import Squad
+from steer.steer_behaviour import separation
+
+
+def brute_force_separation(squad, entity):
+    added_forces = Vector.zero()
+    count_neighbors = 0
+    for e1 in squad.active_iter():
+        if e1 == entity:
+            continue
+        delta = distance(e1.pos, entity.pos)
+        if delta < separation_radius and delta > 0.01:
+            added_forces += e1.pos - entity.pos
+            count_neighbors += 1
+    if count_neighbors > 0:
+        added_forces = (added_forces / count_neighbors) * -1
+        added_forces = added_forces.normalize() * separation_added_force_magnitude
+    return added_forces
+
+
+class TestSpatialHash(unittest.TestCase):
+    def test_query(self):
+        grid = SpatialHash(10)
+        a = MovableEntity(Vector(5, 5))
+        b = MovableEntity(Vector(14, 5))
+        c = MovableEntity(Vector(35, 5))
+        for i, e in enumerate((c, b, a)):
+            grid.insert(e, i)
+        out = []
+        self.assertEqual(grid.query(Vector(5, 5), 10, out), [b, a])
+        self.assertEqual(grid.query(Vector(5, 5), 30, out), [c, b, a])
+        self.assertEqual(len(grid), 3)
+
+    def test_move_and_remove(self):
+        grid = SpatialHash(10)
+        e = MovableEntity(Vector(5, 5))
+        grid.insert(e)
+        e.pos = Vector(55, -5)
+        grid.move(e)
+        self.assertEqual(grid.cell_of(e.pos), (5, -1))
+        self.assertEqual(grid.query(Vector(5, 5), 10, []), [])
+        self.assertEqual(grid.query(Vector(50, 0), 10, []), [e])
+        grid.remove(e)
+        self.assertNotIn(e, grid)
+        self.assertEqual(grid.query(Vector(50, 0), 10, []), [])
+
+    def test_sync(self):
+        grid = SpatialHash(10)
+        entities = [MovableEntity(Vector(i, 0)) for i in range(4)]
+        grid.sync(entities)
+        self.assertEqual(len(grid), 4)
+        entities[1].is_active = False
+        entities[2].pos = Vector(100, 100)
+        grid.sync(entities)
+        self.assertEqual(len(grid), 3)
+        self.assertEqual(grid.query(Vector(0, 0), 10, []), [entities[0], entities[3]])
+
+    def test_separation_matches_brute_force(self):
+        random.seed(7)
+        squad = Squad()
+        squad.entities = [
+            MovableEntity(Vector(random.uniform(0, 80), random.uniform(0, 80)))
+            for _ in range(60)
+        ]
+        squad.entities[5].is_active = False
+        force = separation(squad)
+        for _ in range(3):
+            for e in squad.entities:
+                expected = brute_force_separation(squad, e)
+                actual = force(e, None)
+                self.assertAlmostEqual(actual.x, expected.x)
+                self.assertAlmostEqual(actual.y, expected.y)
+            for e in squad.entities:
+                e.pos = e.pos + Vector(random.uniform(-8, 8), random.uniform(-8, 8))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+import random
 import unittest
 
 from infra.vmath import Vector
@@ -147,6 +148,55 @@ class TestSquad(unittest.TestCase):
         e5.is_active = False
         self.assertEqual(repr(s.get_leader()), "None")
 
+    def test_roster_follows_changes(self):
+        # the roster against a scan of the members, through random changes
+        random.seed(3)
+        s = Squad()
+        pool = [MovableEntity(Vector(i, i)) for i in range(30)]
+        s.entities = pool[:10]
+        for step in range(300):
+            op = random.randrange(6)
+            e = random.choice(pool)
+            if op < 3:
+                e.is_active = not e.is_active
+            elif op == 3 and e not in s.entities:
+                s.entities.append(e)
+            elif op == 4 and e in s.entities:
+                s.entities.remove(e)
+            elif op == 5 and e not in s.entities:
+                s.entities[random.randrange(len(s.entities))] = e
+            active = [e1 for e1 in s.entities if e1.is_active is True]
+            self.assertEqual(s.count(), len(active))
+            self.assertEqual(list(s.active_iter()), active)
+            self.assertIs(s.get_leader(), active[0] if active else None)
+            for e1 in pool:
+                index = next((i for i, e2 in enumerate(active) if e2 is e1), None)
+                self.assertEqual(s.get_index_of_entity(e1), index)
+                if index is not None:
+                    self.assertIs(s.get_entity_by_index(index), e1)
+                    self.assertIs(
+                        s.get_member_in_front_of(e1),
+                        active[index - 1] if index > 0 else None,
+                    )
+
+    def test_roster_incremental(self):
+        s = Squad()
+        entities = [MovableEntity(Vector(i, i)) for i in range(10)]
+        for e in entities:
+            s.entities.append(e)
+        self.assertEqual(s.count(), 10)
+        version = s.roster.version
+        entities[3].is_active = False
+        entities[3].is_active = False  # no change
+        entities[7].is_active = False
+        entities[3].is_active = True
+        self.assertEqual(s.get_index_of_entity(entities[8]), 7)
+        self.assertEqual(s.get_index_of_entity(entities[3]), 3)
+        s.entities.append(MovableEntity())
+        self.assertEqual(s.count(), 10)
+        self.assertEqual(s.roster.rebuilds, 1)
+        self.assertEqual(s.roster.version, version + 4)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,8 +1,10 @@
 import unittest
 
+from infra.vmath import Vector
 from steer.formation import FormationDiamond
 from steer.movable_entity import MovableEntity
 from steer.squad import Squad
+from steer.squad_behaviour import set_entities_follow_target
 from steer.squad_behaviour import wander
 
 
@@ -27,6 +29,33 @@ class TestSquadBehaviour(unittest.TestCase):
         self.assertAlmostEqual(s1.entities[1].pos.x, -2.7327, places=4)
         self.assertAlmostEqual(s1.entities[1].pos.y, -1.2378, places=4)
 
+    def test_follow_target_reassigned_only_when_needed(self):
+        s1 = Squad()
+        s1.entities = [MovableEntity(Vector(i, 0)) for i in range(6)]
+        s1.formation = FormationDiamond()
+        leader = s1.get_leader()
+        set_entities_follow_target(s1, leader, True)
+        state = s1.follow_assignment
+        self.assertEqual(state.reassigned, 5)
+        forces = [e.steer_force for e in s1.entities]
+
+        set_entities_follow_target(s1, leader, True)
+        self.assertEqual((state.calls, state.skipped, state.reassigned), (2, 1, 5))
+
+        # only the members behind the deactivated one move up in the chain
+        s1.entities[3].is_active = False
+        set_entities_follow_target(s1, leader, True)
+        self.assertEqual(state.reassigned, 7)
+        self.assertEqual([e.steer_force for e in s1.entities[:3]], forces[:3])
+        self.assertIsNot(s1.entities[4].steer_force, forces[4])
+        self.assertIs(s1.entities[4].target, s1.entities[2])
+
+        # a new leader reassigns everybody
+        s1.entities[0].is_active = False
+        set_entities_follow_target(s1, s1.get_leader(), False)
+        self.assertEqual(state.reassigned, 10)
+        self.assertIs(s1.entities[5].target, s1.entities[1])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,161 @@
+import unittest
+
+import numpy as np
+
+from infra.vmath import Vector
+from steer.entity_world import EntityWorld
+from steer.movable_entity import MovableEntity
+from steer.movable_entity import Waypoint
+from steer.steer_batch import apply_steering
+from steer.steer_batch import evade_batch
+from steer.squad import Squad
+from steer.steer_batch import flee_batch
+from steer.steer_batch import flocking_batch
+from steer.steer_batch import neighbour_pairs
+from steer.steer_batch import pursuit_batch
+from steer.steer_batch import seek_batch
+from steer.steer_batch import wander_batch
+from steer.steer_batch import world_state
+from steer.steer_behaviour import evade
+from steer.steer_behaviour import flee
+from steer.steer_behaviour import flocking
+from steer.steer_behaviour import pursuit
+from steer.steer_behaviour import seek
+from steer.steer_behaviour import wander
+
+
+class TestSteerBatch(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.world = EntityWorld()
+        self.entities = []
+        for x, y, vx, vy, mul in zip(
+            *rng.uniform(-100, 100, (4, 50)), rng.uniform(0.5, 1, 50)
+        ):
+            e = MovableEntity(Vector(x, y), world=self.world)
+            e.velocity = Vector(vx, vy)
+            e.force_mul_target = mul
+            e._force_mul = mul
+            self.entities.append(e)
+        self.entities[0].velocity = Vector(0, 0)
+        self.rows = self.world.active_rows()
+        self.targets = rng.uniform(-100, 100, (50, 2))
+        self.target_velocity = rng.uniform(-20, 20, (50, 2))
+
+    def scalar(self, force, waypoints):
+        forces = []
+        speed_mul_targets = []
+        for e, w in zip(self.entities, waypoints):
+            f = force(e, w)
+            forces.append((f.x, f.y))
+            speed_mul_targets.append(e.speed_mul_target)
+        return np.array(forces), np.array(speed_mul_targets)
+
+    def waypoints(self):
+        return [
+            Waypoint().reset(Vector(*p), Vector(*v))
+            for p, v in zip(self.targets.tolist(), self.target_velocity.tolist())
+        ]
+
+    def assertBatch(self, batch, expected):
+        np.testing.assert_allclose(batch[0], expected[0], rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(batch[1], expected[1], rtol=1e-9, atol=1e-9)
+
+    def test_seek(self):
+        pos, velocity, max_force, force_mul = world_state(self.world, self.rows)
+        batch = seek_batch(pos, velocity, self.targets, max_force, force_mul, 40)
+        self.assertBatch(batch, self.scalar(seek(40), self.waypoints()))
+
+    def test_seek_shared_target(self):
+        target = Vector(12, -7)
+        pos, velocity, max_force, force_mul = world_state(self.world, self.rows)
+        batch = seek_batch(pos, velocity, target, max_force, force_mul)
+        expected = self.scalar(seek(0), [Waypoint(target)] * len(self.entities))
+        self.assertBatch(batch, expected)
+
+    def test_seek_on_target(self):
+        force, _ = seek_batch([[1.0, 1.0]], [[0.0, 0.0]], Vector(1, 1), 30)
+        self.assertEqual(force.tolist(), [[0.0, 0.0]])
+
+    def test_flee(self):
+        pos, velocity, max_force, force_mul = world_state(self.world, self.rows)
+        batch = flee_batch(pos, velocity, self.targets, max_force, force_mul)
+        self.assertBatch(batch, self.scalar(flee(), self.waypoints()))
+
+    def test_pursuit_evade(self):
+        pos, velocity, max_force, force_mul = world_state(self.world, self.rows)
+        args = (pos, velocity, self.targets, self.target_velocity, max_force, force_mul)
+        self.assertBatch(pursuit_batch(*args), self.scalar(pursuit(), self.waypoints()))
+        self.assertBatch(evade_batch(*args), self.scalar(evade(), self.waypoints()))
+
+    def test_apply_steering(self):
+        target = Vector(500, 500)
+        for e in self.entities:
+            e.steer_force = seek(30)
+            e.target = Waypoint(target)
+        expected = EntityWorld()
+        copies = []
+        for e in self.entities:
+            c = MovableEntity(e.pos, world=expected)
+            c.velocity = e.velocity
+            c._force_mul = e._force_mul
+            c.force_mul_target = e.force_mul_target
+            c.steer_force = seek(30)
+            c.target = Waypoint(target)
+            copies.append(c)
+        expected.update(1 / 60)
+
+        self.world.begin_step(self.rows)
+        pos, velocity, max_force, force_mul = world_state(self.world, self.rows)
+        apply_steering(
+            self.world,
+            self.rows,
+            seek_batch(pos, velocity, target, max_force, force_mul, 30),
+        )
+        self.world.integrate(1 / 60, self.rows)
+        np.testing.assert_allclose(self.world.pos[self.rows], expected.pos[self.rows])
+        np.testing.assert_allclose(
+            self.world.velocity[self.rows], expected.velocity[self.rows]
+        )
+
+    def test_neighbour_pairs(self):
+        rng = np.random.default_rng(9)
+        pos = rng.uniform(0, 100, (200, 2))
+        i, j, delta, distance = neighbour_pairs(pos, 12)
+        d = np.sqrt(((pos[None, :, :] - pos[:, None, :]) ** 2).sum(axis=2))
+        expected = {(a, b) for a, b in zip(*np.nonzero(d < 12)) if a != b}
+        self.assertEqual(set(zip(i.tolist(), j.tolist())), expected)
+        self.assertEqual(len(i), len(expected))
+        np.testing.assert_allclose(delta, pos[j] - pos[i])
+        np.testing.assert_allclose(distance, d[i, j])
+
+    def test_flocking(self):
+        squad = Squad()
+        squad.entities = self.entities
+        pos, velocity, max_force, force_mul = world_state(self.world, self.rows)
+        batch = flocking_batch(pos, velocity, max_force, force_mul, 1.5, 0.7, 0.3)
+        force = flocking(squad, 1.5, 0.7, 0.3)
+        expected = [force(e, None) for e in self.entities]
+        np.testing.assert_allclose(
+            batch, [(f.x, f.y) for f in expected], rtol=1e-9, atol=1e-9
+        )
+
+    def test_wander(self):
+        # a second world with the same seed and the same entities
+        world = EntityWorld()
+        entities = [MovableEntity(world=world) for _ in self.entities]
+        rows = world.active_rows()
+        world.velocity[rows] = self.world.velocity[self.rows]
+        force = wander()
+        for _ in range(20):
+            expected = self.scalar(force, [None] * len(self.entities))[0]
+            np.testing.assert_allclose(
+                wander_batch(world, rows), expected, rtol=1e-9, atol=1e-9
+            )
+        self.assertEqual(
+            [e.wander_angle for e in entities], [e.wander_angle for e in self.entities]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
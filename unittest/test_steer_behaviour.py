@@ -3,9 +3,12 @@ import unittest
 from infra.vmath import Vector
 from steer.movable_entity import MovableEntity
 from steer.movable_entity import Waypoint
+from steer.squad import Squad
 from steer.steer_behaviour import flee
+from steer.steer_behaviour import flocking
 from steer.steer_behaviour import pursuit
 from steer.steer_behaviour import seek
+from steer.steer_behaviour import separation
 from steer.steer_behaviour import wander
 
 # from steer.globals import seek_near_velocity_multiplier
@@ -64,6 +67,20 @@ class TestSteerBehaviour(unittest.TestCase):
         print(f7(e, None))
         print(f7(e, None))
 
+    def test_wander_replays(self):
+        def run(seed):
+            e = MovableEntity(Vector(1, 1))
+            e.seed_random(seed)
+            e.velocity = Vector(10, 0)
+            e.steer_force = wander()
+            e.target = Waypoint.NAWaypoint()
+            for _ in range(40):
+                e.update_steer_behaviour(1 / 60)
+            return e.pos, e.wander_angle
+
+        self.assertEqual(run(3), run(3))
+        self.assertNotEqual(run(3), run(4))
+
     def test_update_steer_behaviour(self):
         w = Waypoint(Vector(3, 4))
         e = MovableEntity(Vector(1, 1))
@@ -75,6 +92,39 @@ class TestSteerBehaviour(unittest.TestCase):
             ((w.pos - e.pos).normalize() * e.max_force * 0.1).length(),
         )
 
+    def test_flocking(self):
+        squad = Squad()
+        squad.entities = [
+            MovableEntity(Vector(0, 0)),
+            MovableEntity(Vector(10, 0)),
+            MovableEntity(Vector(0, 25)),
+            MovableEntity(Vector(500, 500)),
+        ]
+        squad.entities[1].velocity = Vector(0, 10)
+        squad.entities[2].velocity = Vector(0, 10)
+        e = squad.entities[0]
+        # separation only is the separation force
+        f = flocking(squad, 1, 0, 0)(e, None)
+        expected = separation(squad)(e, None)
+        self.assertAlmostEqual(f.x, expected.x)
+        self.assertAlmostEqual(f.y, expected.y)
+        # aligns with the neighbours velocity (0, 10)
+        f = flocking(squad, 0, 1, 0)(e, None)
+        self.assertAlmostEqual(f.x, 0)
+        self.assertAlmostEqual(f.y, e.max_force)
+        # toward the center of the neighbours (5, 12.5)
+        f = flocking(squad, 0, 0, 1)(e, None)
+        self.assertAlmostEqual(f.x / f.y, 5 / 12.5)
+        self.assertAlmostEqual(f.length(), e.max_force)
+        # nobody around
+        self.assertEqual(flocking(squad)(squad.entities[3], None), Vector(0, 0))
+        # composes with the other forces
+        w = Waypoint(Vector(100, 0))
+        f = (flocking(squad, 0, 0, 1) + seek(0))(e, w)
+        expected = flocking(squad, 0, 0, 1)(e, None) + seek(0)(e, w)
+        self.assertAlmostEqual(f.x, expected.x)
+        self.assertAlmostEqual(f.y, expected.y)
+
 
 if __name__ == '__main__':
     unittest.main()
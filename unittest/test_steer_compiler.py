@@ -0,0 +1,107 @@
+import unittest
+
+from infra.vmath import Vector
+from steer.movable_entity import MovableEntity
+from steer.movable_entity import Waypoint
+from steer.squad import Squad
+from steer.steer_behaviour import evade
+from steer.steer_behaviour import flee
+from steer.steer_behaviour import follow
+from steer.steer_behaviour import pursuit
+from steer.steer_behaviour import seek
+from steer.steer_behaviour import separation
+from steer.steer_behaviour import SteeringForce
+from steer.steer_compiler import _ADD
+from steer.steer_compiler import _EVAL
+from steer.steer_compiler import _EVAL_MUL
+from steer.steer_compiler import _MUL
+from steer.steer_compiler import compile_force
+
+
+class CountingForce(SteeringForce):
+    # counts the calls through SteeringForce.__call__ - what the closures of a composed
+    # force do, a compiled plan calls the leaf function itself
+    calls = 0
+
+    def __call__(self, entity, target):
+        self.calls += 1
+        return super().__call__(entity, target)
+
+
+class TestSteerCompiler(unittest.TestCase):
+    def setUp(self):
+        self.squad = Squad()
+        for i in range(5):
+            e = MovableEntity(Vector(i * 7.3, i * 3.1))
+            e.velocity = Vector(i - 2.5, 1.25 * i)
+            self.squad.entities.append(e)
+        self.entity = self.squad.entities[2]
+        self.leader = self.squad.entities[0]
+        self.waypoint = Waypoint().reset(Vector(120.5, -33.25), Vector(3, 4))
+
+    def assertSameForce(self, force: SteeringForce, target):
+        compiled = compile_force(force)
+        expected = force(self.entity, target)
+        actual = compiled(self.entity, target)
+        # identical, not almost equal
+        self.assertEqual((actual.x, actual.y), (expected.x, expected.y))
+
+    def test_identical_results(self):
+        self.assertSameForce(seek(30), self.waypoint)
+        self.assertSameForce(seek(30) * 0.3 + flee() * 0.7, self.waypoint)
+        self.assertSameForce(pursuit() + evade() * 0.1, self.waypoint)
+        self.assertSameForce(
+            follow(Vector(-10, 20)) + (separation(self.squad) * 0.5), self.leader
+        )
+        self.assertSameForce(((seek(10) * 0.3) * 0.7) * 3.0, self.waypoint)
+        self.assertSameForce((seek(10) >= (pursuit() * 0.5)) * 1.5, self.waypoint)
+
+    def test_flat_plan(self):
+        compiled = compile_force(seek(30) + separation(self.squad) * 0.5)
+        self.assertEqual([code for code, _ in compiled.plan], [_EVAL, _EVAL_MUL, _ADD])
+        # * 1 is dropped
+        self.assertEqual(len(compile_force(seek(30) * 1).plan), 1)
+
+    def test_constant_folding(self):
+        # scaling by a power of two folds exactly
+        plan = compile_force(((seek(10) + flee()) * 0.5) * 0.3).plan
+        self.assertEqual(plan[-1], (_MUL, 0.15))
+        self.assertEqual(len(plan), 4)
+        # 0.3 * 0.7 would round differently than scaling twice, so it is kept
+        plan = compile_force(((seek(10) + flee()) * 0.3) * 0.7).plan
+        self.assertEqual(plan[-2:], [(_MUL, 0.3), (_MUL, 0.7)])
+
+    def test_composable(self):
+        compiled = compile_force(seek(30) * 0.5)
+        force = compiled + flee()
+        self.assertSameForce(force, self.waypoint)
+        expected = (seek(30) * 0.5 + flee())(self.entity, self.waypoint)
+        actual = force(self.entity, self.waypoint)
+        self.assertEqual((actual.x, actual.y), (expected.x, expected.y))
+
+    def test_update_steer_behaviour_runs_the_plan(self):
+        leaf = CountingForce(seek(30).f)
+        force = leaf * 0.3 + flee() * 0.7
+        compiled = compile_force(force)
+        self.assertEqual(compiled.f, compiled._evaluate)
+        e1 = MovableEntity(Vector(10, 20))
+        e2 = MovableEntity(Vector(10, 20))
+        e1.steer_force = force
+        e2.steer_force = compiled
+        e1.target = e2.target = self.waypoint
+        for _ in range(30):
+            e2.update_steer_behaviour(1 / 60)
+        self.assertEqual(leaf.calls, 0)
+        for _ in range(30):
+            e1.update_steer_behaviour(1 / 60)
+        self.assertEqual(leaf.calls, 30)
+        self.assertEqual(e1.pos, e2.pos)
+        self.assertEqual(e1.velocity, e2.velocity)
+
+    def test_missing_function(self):
+        with self.assertRaises(ValueError):
+            compile_force(seek(30) + SteeringForce())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import random
+import unittest
+
+from infra.tick_timers import TickTimers
+
+
+class TestTickTimers(unittest.TestCase):
+    def run_timers(self, timers, delays, ticks):
+        fired = []
+        for i, delay in enumerate(delays):
+            timers.schedule(delay, lambda i=i: fired.append((timers.now, i)))
+        for _ in range(ticks):
+            timers.advance()
+        return fired
+
+    def test_fires_at_the_deadline(self):
+        rng = random.Random(1)
+        delays = [rng.choice([1, 63, 64, 65, 4095, 4096, 4097]) for _ in range(50)]
+        delays += [rng.randint(1, 300_000) for _ in range(500)]
+        timers = TickTimers()
+        timers.advance()
+        start = timers.now
+        fired = self.run_timers(timers, delays, 300_000)
+        expected = sorted((start + d, i) for i, d in enumerate(delays))
+        self.assertEqual(fired, expected)  # on time, same tick in scheduling order
+        self.assertEqual((len(timers), timers.fired), (0, len(delays)))
+
+    def test_far_deadlines(self):
+        timers = TickTimers()
+        timers.now = (1 << 24) - 10
+        delays = [5, 10, 20, 5000, 300_000]
+        fired = self.run_timers(timers, delays, 300_000)
+        self.assertEqual(len(fired), 5)
+        self.assertEqual(
+            [t for t, _ in fired], [(1 << 24) - 10 + d for d in sorted(delays)]
+        )
+
+    def test_cancel(self):
+        timers = TickTimers()
+        fired = []
+        a = timers.schedule(3, lambda: fired.append('a'))
+        timers.schedule(3, lambda: fired.append('b'))
+        timers.cancel(a)
+        timers.cancel(a)
+        self.assertEqual(len(timers), 1)
+        for _ in range(5):
+            timers.advance()
+        self.assertEqual(fired, ['b'])
+        self.assertEqual((timers.fired, timers.cancelled), (1, 1))
+        with self.assertRaises(ValueError):
+            timers.schedule(0, lambda: None)
+
+    def test_ticks_for_matches_polling(self):
+        timers = TickTimers()
+        for dt in (1 / 60, 1 / 30, 0.1, 0.25):
+            for duration in (0, 0.05, 0.1, 0.3, 1, 2.5, 3, 10):
+                elapsed = 0
+                steps = 0
+                while True:
+                    steps += 1
+                    elapsed += dt
+                    if elapsed >= duration:
+                        break
+                with self.subTest(dt=dt, duration=duration):
+                    self.assertEqual(timers.ticks_for(duration, dt), steps)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import random
+import unittest
+
+from infra.vmath import distance
+from infra.vmath import Vector
+from steer.movable_entity import MovableEntity
+from steer.spatial_hash import SpatialHash
+from steer.verlet_lists import VerletLists
+
+
+class TestVerletLists(unittest.TestCase):
+    def setUp(self):
+        random.seed(5)
+        self.entities = [
+            MovableEntity(Vector(random.uniform(0, 100), random.uniform(0, 100)))
+            for _ in range(80)
+        ]
+        self.grid = SpatialHash(15)
+        self.grid.sync(self.entities)
+        self.lists = VerletLists(self.grid, 15, 6)
+
+    def assertComplete(self):
+        # every entity within radius is in the list
+        for e in self.entities:
+            candidates = self.lists.neighbours(e)
+            for e1 in self.entities:
+                if e1 is not e and distance(e1.pos, e.pos) < 15:
+                    self.assertIn(e1, candidates)
+
+    def test_reuse_until_moved(self):
+        self.lists.check()
+        self.assertComplete()
+        self.assertEqual(self.lists.rebuilds, 1)
+        e = self.entities[0]
+        for _ in range(3):
+            self.lists.check()
+            e.pos = e.pos + Vector(1, 0)
+            self.grid.move(e)
+            self.lists.moved(e)
+            self.assertComplete()
+        self.assertEqual(self.lists.rebuilds, 1)
+        # 4 units away from where it was, more than skin / 2 relative to the others
+        self.lists.check()
+        e.pos = e.pos + Vector(1, 0)
+        self.grid.move(e)
+        self.lists.moved(e)
+        self.assertComplete()
+        self.assertEqual(self.lists.rebuilds, 2)
+
+    def test_fallback(self):
+        # moves that are too big for the skin within a single tick: one rebuild and
+        # then the grid is queried directly for the rest of the tick
+        self.lists.check()
+        self.lists.neighbours(self.entities[0])
+        self.lists.check()
+        for e in self.entities:
+            e.pos = e.pos + Vector(random.uniform(-4, 4), random.uniform(-4, 4))
+            self.grid.move(e)
+            self.lists.moved(e)
+            self.assertComplete()
+        self.assertEqual(self.lists.rebuilds, 2)
+        self.assertGreater(self.lists.fallbacks, 0)
+
+    def test_formation_translation(self):
+        # moving together doesn't change any distance, the lists are kept
+        for _ in range(30):
+            self.lists.check()
+            for e in self.entities:
+                e.pos = e.pos + Vector(1, 0.5)  # a step per tick, far in total
+                self.grid.move(e)
+                self.lists.moved(e)
+            self.assertComplete()
+        self.assertEqual(self.lists.rebuilds, 1)
+
+    def test_fast_formation(self):
+        # 240 units per second at 60 Hz, more than skin / 2 per tick. Half way through a
+        # tick half of the entities moved, the lists have to cover that too
+        step = Vector(4, 0)
+        max_move = step.length() + 0.2
+        for _ in range(30):
+            self.lists.check(max_move)
+            for i, e in enumerate(self.entities):
+                if i == len(self.entities) // 2:
+                    self.assertComplete()
+                jitter = Vector(random.uniform(-0.1, 0.1), random.uniform(-0.1, 0.1))
+                e.pos = e.pos + step + jitter
+                self.grid.move(e)
+                self.lists.moved(e)
+        self.assertComplete()
+        self.assertEqual(self.lists.rebuilds, 1)
+        self.assertEqual(self.lists.fallbacks, 0)
+
+    def test_random_walk(self):
+        for _ in range(20):
+            for e in self.entities:
+                e.pos = e.pos + Vector(random.uniform(-1, 1), random.uniform(-1, 1))
+            self.grid.sync(self.entities)
+            self.lists.check()
+            self.assertComplete()
+        self.assertEqual(self.lists.checks, 20)
+        self.assertLess(self.lists.rebuilds, 20)
+
+    def test_members_change(self):
+        self.lists.check()
+        self.lists.neighbours(self.entities[0])
+        self.entities[1].is_active = False
+        self.grid.sync(self.entities)
+        self.assertTrue(self.lists.check())
+        self.assertNotIn(self.entities[1], self.lists.neighbours(self.entities[0]))
+        self.assertEqual(self.lists.rebuilds, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,17 @@
 import math
 import unittest
 
+import numpy as np
+
 from infra.vmath import angle_between
+from infra.vmath import did_reach_target
+from infra.vmath import did_reach_target_batch
+from infra.vmath import distance
+from infra.vmath import line_segment_intersect_circle
+from infra.vmath import line_segment_intersect_circle_batch
+from infra.vmath import Rotation2D
 from infra.vmath import Vector
+from infra.vmath import VectorArray
 
 
 class TestVmath(unittest.TestCase):
@@ -39,6 +48,176 @@ class TestVmath(unittest.TestCase):
             angle_between(Vector(0, 10), Vector(-4, -4)), math.pi / 4 * 3, places=2
         )
 
+    def test_in_place_matches_value_semantics(self):
+        v1 = Vector(3.3, -4.7)
+        v2 = Vector(-1.1, 0.9)
+        self.assertEqual(Vector(v1.x, v1.y).iadd(v2), v1 + v2)
+        self.assertEqual(Vector(v1.x, v1.y).isub(v2), v1 - v2)
+        self.assertEqual(Vector(v1.x, v1.y).imul(0.3), v1 * 0.3)
+        self.assertEqual(Vector(v1.x, v1.y).idiv(0.3), v1 / 0.3)
+        self.assertEqual(Vector(v1.x, v1.y).truncate_(2), v1.truncate(2))
+        self.assertEqual(Vector(v1.x, v1.y).truncate_(20), v1.truncate(20))
+        self.assertEqual(Vector(v1.x, v1.y).normalize_(), v1.normalize())
+        self.assertEqual(Vector.zero().normalize_(), Vector.zero())
+        self.assertEqual(distance(v1, v2), (v1 - v2).length())
+
+    def test_in_place_returns_self(self):
+        v = Vector(1, 2)
+        self.assertIs(v.set(3, 4).iadd(Vector(1, 1)).imul(2).truncate_(1), v)
+        self.assertAlmostEqual(v.length(), 1)
+
+
+class TestVectorArray(unittest.TestCase):
+    def setUp(self):
+        self.vectors = [Vector(3, 4), Vector(0, 0), Vector(-1.5, 2), Vector(0.1, -7)]
+        self.others = [Vector(1, 1), Vector(2, 0), Vector(0, 0), Vector(-3, 0.5)]
+        self.va = VectorArray.from_vectors(self.vectors)
+        self.vb = VectorArray.from_vectors(self.others)
+
+    def assert_rows(self, va, expected):
+        self.assertEqual(len(va), len(expected))
+        for row, v in zip(va.to_vectors(), expected):
+            self.assertTrue(row.almost_eq(v, 1e-9), f'{row} != {v}')
+
+    def test_round_trip(self):
+        self.assertEqual(self.va.data.shape, (4, 2))
+        self.assertTrue(self.va.data.flags['C_CONTIGUOUS'])
+        self.assertEqual(self.va.to_vectors(), self.vectors)
+        self.assertEqual(self.va[2], Vector(-1.5, 2))
+        self.assertEqual(len(VectorArray.from_vectors([])), 0)
+        with self.assertRaises(ValueError):
+            VectorArray(np.zeros((3, 3)))
+
+    def test_arithmetic(self):
+        self.assert_rows(
+            self.va + self.vb, [a + b for a, b in zip(self.vectors, self.others)]
+        )
+        self.assert_rows(
+            self.va - Vector(1, 2), [a - Vector(1, 2) for a in self.vectors]
+        )
+        self.assert_rows(self.va * 2.5, [a * 2.5 for a in self.vectors])
+        self.assert_rows(
+            self.va * [1, 2, 3, 4], [a * m for a, m in zip(self.vectors, [1, 2, 3, 4])]
+        )
+        va = self.va.copy()
+        self.assertIs(va.iadd(self.vb).imul(2), va)
+        self.assert_rows(va, [(a + b) * 2 for a, b in zip(self.vectors, self.others)])
+
+    def test_length_normalize_truncate(self):
+        np.testing.assert_allclose(self.va.length(), [v.length() for v in self.vectors])
+        np.testing.assert_allclose(
+            self.va.sqr_length(), [v.sqr_length() for v in self.vectors]
+        )
+        self.assert_rows(self.va.normalize(), [v.normalize() for v in self.vectors])
+        self.assert_rows(self.va.truncate(2), [v.truncate(2) for v in self.vectors])
+        limits = [10, 1, 1, 3]
+        self.assert_rows(
+            self.va.truncate(limits),
+            [v.truncate(m) for v, m in zip(self.vectors, limits)],
+        )
+
+    def test_rotate(self):
+        self.assert_rows(
+            self.va.rotate(math.pi / 3), [v.rotate(math.pi / 3) for v in self.vectors]
+        )
+        angles = [0, math.pi, -1, 2]
+        self.assert_rows(
+            self.va.rotate(angles), [v.rotate(a) for v, a in zip(self.vectors, angles)]
+        )
+
+    def test_dot_angle_between(self):
+        np.testing.assert_allclose(
+            self.va.dot(self.vb),
+            [a.x * b.x + a.y * b.y for a, b in zip(self.vectors, self.others)],
+        )
+        np.testing.assert_allclose(
+            self.va.angle_between(self.vb),
+            [angle_between(a, b) for a, b in zip(self.vectors, self.others)],
+        )
+        np.testing.assert_allclose(
+            self.va.angle_between(Vector(0, 1)),
+            [angle_between(a, Vector(0, 1)) for a in self.vectors],
+        )
+
+
+class TestRotation2D(unittest.TestCase):
+    def test_apply_matches_rotate(self):
+        v = Vector(3.5, -2)
+        for angle in (0, 0.3, math.pi / 2, -2.2, 7):
+            r = Rotation2D(angle)
+            self.assertEqual(r.apply(v), v.rotate(angle))
+            self.assertEqual(r.apply_(Vector(v.x, v.y)), v.rotate(angle))
+
+    def test_compose_and_inverse(self):
+        a = Rotation2D(0.4)
+        b = Rotation2D(1.1)
+        v = Vector(1, 2)
+        self.assertTrue((a * b).apply(v).almost_eq(v.rotate(1.5), 1e-9))
+        self.assertAlmostEqual((a * b).angle, 1.5)
+        self.assertTrue(a.inverse().apply(a.apply(v)).almost_eq(v, 1e-9))
+
+    def test_apply_batch(self):
+        offsets = [Vector(0, 0), Vector(-25, -25), Vector(25, -25), Vector(0, -50)]
+        r = Rotation2D(2.5)
+        self.assertEqual(
+            r.apply_batch(VectorArray.from_vectors(offsets)).to_vectors(),
+            [r.apply(v) for v in offsets],
+        )
+
+
+class TestReachTarget(unittest.TestCase):
+    def test_segment_sweep(self):
+        # moving fast through the target circle, both end points are outside of it
+        target = Vector(100, 100)
+        self.assertTrue(did_reach_target(Vector(110, 100), Vector(90, 100), target, 1))
+        self.assertTrue(did_reach_target(Vector(100, 110), Vector(100, 90), target, 1))
+        self.assertTrue(did_reach_target(Vector(110, 110), Vector(90, 90), target, 1))
+        self.assertFalse(
+            did_reach_target(Vector(110, 110), Vector(90, 90), Vector(100, 105), 1)
+        )
+        # the line crosses the circle but the segment stops before it
+        self.assertFalse(
+            line_segment_intersect_circle(Vector(90, 100), Vector(95, 100), target, 1)
+        )
+
+    def test_batch_matches_scalar(self):
+        rng = np.random.default_rng(7)
+        n = 2000
+        cur = rng.uniform(0, 50, (n, 2))
+        prev = cur - rng.uniform(-20, 20, (n, 2))
+        targets = rng.uniform(0, 50, (n, 2))
+        radius = rng.uniform(0.5, 6, n)
+        expected = [
+            did_reach_target(Vector(*c), Vector(*p), Vector(*t), r)
+            for c, p, t, r in zip(
+                cur.tolist(), prev.tolist(), targets.tolist(), radius.tolist()
+            )
+        ]
+        np.testing.assert_array_equal(
+            did_reach_target_batch(cur, prev, targets, radius), expected
+        )
+        self.assertTrue(0 < sum(expected) < n)
+
+        shared = Vector(25, 25)
+        expected = [
+            did_reach_target(Vector(*c), Vector(*p), shared, 4)
+            for c, p in zip(cur.tolist(), prev.tolist())
+        ]
+        np.testing.assert_array_equal(
+            did_reach_target_batch(VectorArray(cur), VectorArray(prev), shared, 4),
+            expected,
+        )
+
+        expected = [
+            line_segment_intersect_circle(Vector(*c), Vector(*p), Vector(*t), r)
+            for c, p, t, r in zip(
+                cur.tolist(), prev.tolist(), targets.tolist(), radius.tolist()
+            )
+        ]
+        np.testing.assert_array_equal(
+            line_segment_intersect_circle_batch(cur, prev, targets, radius), expected
+        )
+
 
 if __name__ == '__main__':
     unittest.main()
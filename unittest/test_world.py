@@ -0,0 +1,156 @@
+import random
+import unittest
+
+from infra.tick_timers import TickTimers
+from infra.vmath import Rect
+from infra.vmath import Vector
+from steer.behaviour_compiler import compile_behaviour
+from steer.entity_world import EntityWorld
+from steer.formation import FormationDiamond
+from steer.movable_entity import MovableEntity
+from steer.neighbour_index import NeighbourIndex
+from steer.squad import Squad
+from steer.squad_behaviour import dive_to
+from steer.squad_behaviour import do_while
+from steer.squad_behaviour import patrol_ext
+from steer.squad_behaviour import repeat_ex
+from steer.squad_behaviour import spiral_in_out
+from steer.squad_behaviour import zero_behaviour
+from steer.squad_behaviour_condition import infinite_behaviour_condition
+from steer.squad_behaviour_condition import time_elapsed
+from steer.world import World
+
+
+def make_world(max_workers):
+    random.seed(8)
+    entities = EntityWorld()
+    world = World(neighbour_index=NeighbourIndex(entities), max_workers=max_workers)
+    area = Rect(50, 50, 400, 400)
+    for i in range(8):
+        s = Squad()
+        s.entities = [
+            MovableEntity(Vector(100 + 20 * i, 100 + 5 * j), world=entities)
+            for j in range(6)
+        ]
+        s.formation = FormationDiamond()
+        if i % 3 == 0:
+            s.squad_behaviour = spiral_in_out(
+                infinite_behaviour_condition(), 3, s, area
+            )
+        elif i % 3 == 1:
+            s.squad_behaviour = patrol_ext(
+                infinite_behaviour_condition(), s, 4, True, area
+            )
+        else:
+            s.squad_behaviour = dive_to(time_elapsed(1), s, 100, 400)
+        world.add(s)
+    return world
+
+
+def run(max_workers, ticks=300):
+    with make_world(max_workers) as world:
+        random.seed(9)
+        for t in range(ticks):
+            if t == 100:
+                world.squads[1].entities[0].is_active = False
+            world.step(1 / 60)
+        return [
+            (e.pos.x, e.pos.y, e.velocity.x, e.velocity.y)
+            for s in world.squads
+            for e in s.entities
+        ], world
+
+
+class TestWorld(unittest.TestCase):
+    def test_threads_match_serial(self):
+        serial, world = run(1)
+        self.assertEqual(world.ticks, 300)
+        self.assertEqual(run(4)[0], serial)
+
+    def test_finished_behaviour_is_dropped(self):
+        _, world = run(1, 120)
+        done = [s.squad_behaviour is None for s in world.squads]
+        self.assertEqual(done, [i % 3 == 2 for i in range(8)])
+
+    def test_squads_share_the_index(self):
+        world = make_world(1)
+        index = world.neighbour_index
+        self.assertTrue(all(s.neighbour_index is index for s in world.squads))
+        self.assertEqual([index.group_of(s) for s in world.squads], list(range(8)))
+        world.step(1 / 60)
+        self.assertEqual(index.rebuilds, 1)
+
+    def test_errors_are_raised(self):
+        with make_world(2) as world:
+            world.squads[3].update_members = None  # not callable
+            with self.assertRaises(TypeError):
+                world.step(1 / 60)
+
+
+def timed_world(timers):
+    # the same scene, with its time conditions polled (timers None) or on TickTimers
+    random.seed(4)
+    world = World(timers=timers)
+    area = Rect(50, 50, 400, 400)
+    for i in range(4):
+        s = Squad()
+        s.entities = [
+            MovableEntity(Vector(100 + 30 * i, 100 + 5 * j)) for j in range(5)
+        ]
+        s.formation = FormationDiamond()
+        wait = zero_behaviour(time_elapsed(0.5 + i / 4, timers))
+        if i == 0:
+            b = wait >> dive_to(time_elapsed(1.5, timers), s, 300, 300)
+        elif i == 1:
+            b = repeat_ex(
+                infinite_behaviour_condition(),
+                wait >> dive_to(time_elapsed(0.75, timers), s, 100 + 50 * i, 400),
+                3,
+            )
+        elif i == 2:
+            b = do_while(
+                patrol_ext(time_elapsed(3, timers), s, 4, True, area),
+                1,
+                dive_to(time_elapsed(0.2, timers), s, 200, 200),
+                timers,
+            )
+        else:
+            b = wait >> (zero_behaviour(time_elapsed(1, timers)) | wait)
+        s.squad_behaviour = b if timers is None else compile_behaviour(b)
+        world.add(s)
+    return world
+
+
+class TestWorldTimers(unittest.TestCase):
+    def test_sleeping_matches_polling(self):
+        polled = timed_world(None)
+        timers = TickTimers()
+        timed = timed_world(timers)
+        for _ in range(360):
+            polled.step(1 / 60)
+            timed.step(1 / 60)
+            self.assertEqual(
+                [s.squad_behaviour is None for s in timed.squads],
+                [s.squad_behaviour is None for s in polled.squads],
+            )
+        self.assertEqual(
+            [e.pos for s in timed.squads for e in s.entities],
+            [e.pos for s in polled.squads for e in s.entities],
+        )
+        self.assertGreater(timed.skipped, 100)
+        self.assertEqual(timers.now, 360)
+
+    def test_replaced_behaviour_wakes(self):
+        timers = TickTimers()
+        world = timed_world(timers)
+        world.step(1 / 60)
+        sleeping = [world.sleeping(s) for s in world.squads]
+        self.assertEqual(sleeping, [True, True, False, True])
+        squad = world.squads[0]
+        squad.squad_behaviour = dive_to(infinite_behaviour_condition(), squad, 0, 0)
+        self.assertFalse(world.sleeping(squad))
+        self.assertEqual(len(timers), 2)  # squads 1 and 3 still sleep
+
+
+if __name__ == '__main__':
+    unittest.main()